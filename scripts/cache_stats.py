@@ -0,0 +1,28 @@
+import os
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run, Option
+
+from vitrina.cache import get_cache_stats, load_namespaces
+
+
+def main(
+    reset: bool = Option(False, help="Reset counters after printing them"),
+):
+    namespaces = load_namespaces()
+    for name, stats in get_cache_stats():
+        total = stats['hits'] + stats['misses']
+        rate = stats['hits'] / total * 100 if total else 0
+        print(
+            f"{name}: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['refreshes']} refreshes, {rate:.1f}% hit rate"
+        )
+        if reset:
+            namespaces[name].reset_stats()
+
+
+if __name__ == '__main__':
+    run(main)
@@ -1,125 +1,115 @@
 import math
 import os
 import django
-import pandas as pd
-import requests
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
 django.setup()
 
-from tqdm import tqdm
-from django.contrib.contenttypes.models import ContentType
-from vitrina.orgs.models import Organization
-from vitrina.resources.models import DatasetDistribution
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from typer import run, Option
+
 from vitrina.datasets.models import Dataset
+from vitrina.resources.models import DatasetDistribution
+from vitrina.resources.services import LINK_CHECK_DELAY, LINK_CHECK_PER_HOST, LINK_CHECK_TIMEOUT, \
+    LINK_CHECK_WORKERS, check_links
 from vitrina.tasks.models import Task
-from typer import run
-from datetime import datetime, timezone
-from time import sleep
+from vitrina.tasks.services import sync_dataset_tasks
 
 
-def main():
-    pbar = tqdm('Checking for external distributions', total=DatasetDistribution.objects.count())
+def main(
+    workers: int = Option(LINK_CHECK_WORKERS, help="Number of URLs checked at once"),
+    per_host: int = Option(LINK_CHECK_PER_HOST, help="Number of URLs of the same host checked at once"),
+    delay: float = Option(LINK_CHECK_DELAY, help="Seconds between two requests to the same host"),
+    timeout: float = Option(LINK_CHECK_TIMEOUT, help="Request timeout in seconds"),
+    limit: Optional[int] = Option(None, help="Check only this many distributions"),
+):
+    distributions = (
+        DatasetDistribution.objects.
+        filter(dataset__isnull=False, download_url__isnull=False).
+        exclude(download_url='').
+        select_related('dataset').
+        order_by('pk')
+    )
+    if limit is not None:
+        distributions = distributions[:limit]
+    distributions = list(distributions)
 
-    total_distributions = 0
+    print(f'Checking {len(distributions)} external distributions...')
+    results = check_links(
+        [item.download_url for item in distributions],
+        workers=workers,
+        per_host=per_host,
+        delay=delay,
+        timeout=timeout,
+    )
+
+    # A dataset has an error if any of its distributions is down, and is
+    # fixed if all of them are up. URLs, that could not be checked, change
+    # nothing.
+    broken = defaultdict(list)
+    checked = {}
     total_unavailable = 0
-    frequency_entries = 0
-    frequency_mismatch = 0
-    tasks_created = 0
-    tasks_closed = 0
+    for item in distributions:
+        result = results[item.download_url]
+        if result.available is None:
+            print(f'Error retrieving url: {item.download_url} ({result.error})')
+            continue
+        checked[item.dataset.pk] = item.dataset
+        if not result.available:
+            print('Distribution url is down:', item.download_url)
+            broken[item.dataset.pk].append(item.download_url)
+            total_unavailable += 1
 
-    with (pbar):
-        for item in DatasetDistribution.objects.all()[0:25]:
-            if item.is_external_url():
-                task = Task.objects.filter(content_type=ContentType.objects.get_for_model(item.dataset),
-                                           object_id=item.dataset.pk,
-                                           type=Task.ERROR_DISTRIBUTION).first()
-                url = item.download_url
-                try:
-                    request_response = requests.head(url)
-                    status_code = request_response.status_code
-                    website_is_up = status_code == 200
-                    if not website_is_up:
-                        print('Distribution url is down:', url)
-                        if not task:
-                            print(f'Task for {item.dataset.pk} does not exist, creating...')
-                            create_task_for_dataset(
-                                item.dataset.pk,
-                                f'Klaida duomenų rinkinio id: {item.dataset.pk} duomenų šaltinyje',
-                                f'Duomenų rinkinio šaltinio nuoroda {url} yra neveikianti.',
-                                Task.ERROR_DISTRIBUTION
-                            )
-                            tasks_created += 1
-                        total_unavailable += 1
-                    elif website_is_up:
-                        if task:
-                            close_task(task)
-                            tasks_closed += 1
-                    total_distributions += 1
-                    pbar.update(1)
-                    sleep(1.5)
-                except:
-                    print(f'Error retrieving url: {url}')
+    distribution_errors: Dict[Dataset, Tuple[str, str]] = {
+        checked[dataset_id]: (
+            f'Klaida duomenų rinkinio id: {dataset_id} duomenų šaltinyje',
+            f'Duomenų rinkinio šaltinio nuoroda {" ".join(urls)} yra neveikianti.',
+        )
+        for dataset_id, urls in broken.items()
+    }
+    tasks_created, tasks_closed = sync_dataset_tasks(
+        Task.ERROR_DISTRIBUTION,
+        distribution_errors,
+        [dataset_id for dataset_id in checked if dataset_id not in broken],
+    )
 
-    pbar2 = tqdm('Checking update frequencies', total=Dataset.objects.count())
-    with (pbar2):
-        for dt in Dataset.objects.all():
-            if dt.frequency is not None:
-                now = datetime.now(timezone.utc)
-                last_update = pd.to_datetime(dt.modified)
-                diff = abs(math.trunc((last_update - now).total_seconds() / 60 / 60))
-                task = Task.objects.filter(content_type=ContentType.objects.get_for_model(dt),
-                                           object_id=dt.pk,
-                                           type=Task.ERROR_FREQUENCY).first()
-                hours = dt.frequency.hours
-                if hours is not None:
-                    if hours < diff:
-                        if not task:
-                            print(f'Task for {dt.pk} does not exist, creating...')
-                            create_task_for_dataset(
-                                dt.pk,
-                                f'Klaida duomenų rinkinio id: {dt.pk} atnaujinimo intervale',
-                                f'Duomenų rinkinys neatnaujintas pagal numatytą atnaujinimo dažnumą.\n'
-                                f'Numatytas atnaujinimo dažnumas kas {dt.frequency.hours} valandas,'
-                                f' paskutinį kartą atnaujintas prieš {diff} valandas.',
-                                Task.ERROR_FREQUENCY
-                            )
-                            tasks_created += 1
-                        frequency_mismatch += 1
-                    elif dt.frequency.hours > diff:
-                        if task:
-                            close_task(task)
-                            tasks_closed += 1
-                    frequency_entries += 1
-            pbar2.update(1)
+    frequency_entries = 0
+    frequency_errors: Dict[Dataset, Tuple[str, str]] = {}
+    frequency_fixed = []
+    now = datetime.now(timezone.utc)
+    datasets = (
+        Dataset.objects.
+        filter(frequency__hours__isnull=False, modified__isnull=False).
+        select_related('frequency')
+    )
+    for dt in datasets:
+        diff = abs(math.trunc((dt.modified - now).total_seconds() / 60 / 60))
+        hours = dt.frequency.hours
+        if hours < diff:
+            frequency_errors[dt] = (
+                f'Klaida duomenų rinkinio id: {dt.pk} atnaujinimo intervale',
+                f'Duomenų rinkinys neatnaujintas pagal numatytą atnaujinimo dažnumą.\n'
+                f'Numatytas atnaujinimo dažnumas kas {hours} valandas,'
+                f' paskutinį kartą atnaujintas prieš {diff} valandas.',
+            )
+        elif hours > diff:
+            frequency_fixed.append(dt.pk)
+        frequency_entries += 1
 
-    print(f'Total external resources found: {total_distributions}.\n'
+    created, closed = sync_dataset_tasks(Task.ERROR_FREQUENCY, frequency_errors, frequency_fixed)
+    tasks_created += created
+    tasks_closed += closed
+
+    print(f'Total external resources found: {len(distributions)}.\n'
           f'Failed to fetch distributions: {total_unavailable}.\n'
           f'Total update frequencies: {frequency_entries}.\n'
-          f'Total errors in update frequency: {frequency_mismatch}.\n'
+          f'Total errors in update frequency: {len(frequency_errors)}.\n'
           f'Total tasks created: {tasks_created}.\n'
           f'Total tasks closed: {tasks_closed}.')
 
 
-def create_task_for_dataset(dataset_id, title, desc, error_type):
-    target_dataset = Dataset.objects.get(pk=dataset_id)
-    org = Organization.objects.get(pk=target_dataset.organization.pk)
-    Task.objects.create(
-        content_type=ContentType.objects.get_for_model(target_dataset),
-        object_id=target_dataset.pk,
-        organization=org,
-        title=title,
-        status=Task.CREATED,
-        type=error_type,
-        description=desc
-    )
-
-
-def close_task(task):
-    task.status = Task.COMPLETED
-    task.completed = datetime.now(timezone.utc)
-    task.save()
-
-
 if __name__ == '__main__':
     run(main)
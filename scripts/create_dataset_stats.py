@@ -12,9 +12,11 @@ import requests
 from tqdm import tqdm
 from typer import run
 from django.db.models import Count, F
+from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from vitrina.datasets.models import Dataset
 from vitrina.statistics.models import DatasetStats
+from vitrina.statistics.services import refresh_stats_rollups
 from vitrina.structure.models import Property, Model
 from vitrina.requests.models import RequestObject
 from vitrina.projects.models import Project
@@ -229,6 +231,11 @@ def main():
         pbar
     )
 
+    # bulk_update does not set auto_now fields, rollup refresh relies on them.
+    now = timezone.now()
+    for stat_obj in stats.values():
+        stat_obj.modified = now
+
     DatasetStats.objects.bulk_update(stats.values(), fields=[
         'object_count',
         'field_count',
@@ -236,9 +243,12 @@ def main():
         'distribution_count',
         'request_count',
         'project_count',
-        'maturity_level'
+        'maturity_level',
+        'modified',
     ])
 
+    refresh_stats_rollups()
+
 
 if __name__ == '__main__':
     run(main)
@@ -1,11 +1,14 @@
 import os
+import gzip
 import json
 import urllib.parse
 
 from tqdm import tqdm
 
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
 import user_agents
 import requests as req
@@ -50,6 +53,14 @@ def main(
         config_file: str = Option(os.path.expanduser('~/.config/vitrina/downloadstats.json')),
         state_file: str = Option(os.path.expanduser('~/.local/share/vitrina/state.json')),
         bot_status_file: str = Option(os.path.expanduser('~/.local/share/vitrina/downloadstats.json')),
+        batch_size: int = Option(1000, help="number of log lines parsed at once"),
+        workers: int = Option(0, help=(
+                "number of processes used to parse log lines, 0 parses in the current process"
+        )),
+        window: int = Option(3600, help=(
+                "seconds to keep a request, that did not get a response yet"
+        )),
+        upload_size: int = Option(1000, help="number of stats rows posted at once"),
 ):
     transactions = {}
     current_state = {'files': {}}
@@ -57,11 +68,8 @@ def main(
     bots_found = {'agents': {}}
     apikey = ""
 
-    limit = 1000
     total_lines_read = 0
-    lines_read = 0
     final_stats = {}
-    file_size = os.path.getsize(logfile)
     existing_size = 0
     existing_offset = 0
     temp = {}
@@ -102,54 +110,62 @@ def main(
         print(f'File {logfile} not found. Aborting.')
         return
 
+    file_size = os.path.getsize(logfile)
     if file_size == existing_size:
         # File did not change?
         return
 
-    endpoint_url = urllib.parse.urljoin(target, 'partner/api/1/downloads')
+    endpoint_url = urllib.parse.urljoin(target, 'partner/api/1/downloads/bulk')
     session = req.Session()
     session.headers.update({'Authorization': 'ApiKey {}'.format(apikey)})
 
-    total_lines_in_file = 0
-    d = deque([], maxlen=limit)
-
-    with open(logfile) as ff:
-        total_lines_in_file = sum(bl.count('\n') for bl in blocks(ff))
-
-    pbar = tqdm("Parsing download stats", total=total_lines_in_file)
-
-    with open(logfile) as f:
-        bytesread = 0
-        if existing_offset > 0:
-            f.seek(existing_offset)
-        line = f.readline()
-        while line:
-            bytesread += len(str.encode(line))
-            d.append(line)
-            total_lines_read += 1
-            lines_read += 1
-            if lines_read == limit:
-                find_transactions(name, d, final_stats, bot_status_file, bots_found, temp, transactions)
-                lines_read = 0
-            state_entry = {
-                logfile: {
-                    'size': file_size,
-                    'offset': f.tell()
-                }
-            }
-            pbar.update(1)
-            line = f.readline()
-        find_transactions(name, d, final_stats, bot_status_file, bots_found, temp, transactions)
-
-    post_data(temp, name, session, endpoint_url)
-
-    current_state.get('files', {}).update(state_entry)
+    pbar = tqdm(
+        desc="Parsing download stats",
+        total=file_size - existing_offset,
+        unit='B',
+        unit_scale=True,
+    )
+
+    def aggregate(entries):
+        aggregate_entries(name, entries, final_stats, bots_found, temp, transactions)
+        expire_transactions(transactions, timedelta(seconds=window))
+
+    with open(logfile, 'rb') as f:
+        f.seek(existing_offset)
+        batches = read_batches(f, batch_size)
+        if workers > 0:
+            with ProcessPoolExecutor(workers) as pool:
+                # Only a few batches are submitted ahead, so that the whole
+                # file is never loaded into memory at once.
+                pending = deque()
+                for lines, size in batches:
+                    pending.append((pool.submit(parse_lines, lines), len(lines), size))
+                    if len(pending) > workers * 2:
+                        total_lines_read += _aggregate_batch(pending.popleft(), aggregate, pbar)
+                while pending:
+                    total_lines_read += _aggregate_batch(pending.popleft(), aggregate, pbar)
+        else:
+            for lines, size in batches:
+                aggregate(parse_lines(lines))
+                total_lines_read += len(lines)
+                pbar.update(size)
+        offset = f.tell()
+
+    post_data(temp, name, session, endpoint_url, upload_size)
+
+    # State is saved only after all aggregated stats are posted, so that an
+    # interrupted run is repeated from the same offset.
+    current_state.get('files', {}).update({
+        logfile: {
+            'size': file_size,
+            'offset': offset,
+        }
+    })
 
     with open(state_file, "w") as outfile:
         outfile.write(json.dumps(current_state, indent=4))
 
-    with open(bot_status_file, "w+") as bot_file:
-        bot_file.write(json.dumps(bots_found, indent=4))
+    write_bot_status(bot_status_file, bots_found)
 
     print(f'Total lines read: {total_lines_read}')
     print(f'Total model entries found: {len(final_stats.keys())}')
@@ -157,149 +173,135 @@ def main(
     print(f'Peak Memory Usage = {get_peak_memory()}')
 
 
+def _aggregate_batch(batch, aggregate, pbar):
+    future, lines, size = batch
+    aggregate(future.result())
+    pbar.update(size)
+    return lines
+
+
+def read_batches(f, batch_size):
+    lines = iter(f)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            break
+        yield [line.decode() for line in batch], sum(len(line) for line in batch)
+
+
+def write_bot_status(bot_status_file, bots_found):
+    with open(bot_status_file, "w+") as bot_file:
+        bot_file.write(json.dumps(bots_found, indent=4))
+
+
 def parse_user_agent(agent):
     if isinstance(agent, str):
         return user_agents.parse(agent).browser.family
 
 
-def find_transactions(name, d, final_stats, bot_status_file, bots_found, temp, transactions):
-    for i in d:
-        if '"txn"' in i:
-            entry = json.loads(i)
-            txn = entry['txn']
-            timestamp = entry['time']
-            dt = None
-            try:
-                dt = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%f%z')
-            except ValueError:
-                print(f'Wrong timestamp format {timestamp}')
-            requests = 1
-            if txn not in transactions:
-                transactions[txn] = {'time': dt}
+def parse_time(timestamp):
+    try:
+        return datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%f%z')
+    except (TypeError, ValueError):
+        print(f'Wrong timestamp format {timestamp}')
+
+
+def parse_lines(lines):
+    return [
+        json.loads(line)
+        for line in lines
+        if '"txn"' in line
+    ]
+
+
+def aggregate_entries(name, entries, final_stats, bots_found, temp, transactions):
+    for entry in entries:
+        txn = entry['txn']
+        dt = parse_time(entry.get('time'))
+        transaction = transactions.setdefault(txn, {})
+        transaction['time'] = dt
+        for key in ('model', 'format', 'type', 'agent'):
+            if key in entry:
+                transaction[key] = entry[key]
+
+        if entry.get('type') != 'response':
+            continue
+
+        transactions.pop(txn)
+        if dt is None:
+            continue
+
+        model = transaction.get('model')
+        agent = transaction.get('agent')
+        frmt = transaction.get('format')
+        objects = entry.get('objects', 0)
+
+        if model:
+            final_stats[model] = final_stats.get(model, 0) + 1
+
+        bot = next((bt for bt in bots if agent and bt in agent), None)
+        if bot:
+            bots_found['agents'][bot] = bots_found['agents'].get(bot, 0) + 1
+            continue
+        if agent:
+            bots_found['agents'][agent] = bots_found['agents'].get(agent, 0) + 1
+
+        if model:
+            key = (model, dt.date(), dt.hour, frmt)
+            if key in temp:
+                temp[key]['time'] = dt
+                temp[key]['requests'] += 1
+                temp[key]['objects'] += objects
             else:
-                transactions[txn]['time'] = dt
-            if 'model' in entry:
-                transactions[txn]['model'] = entry.get('model')
-            if 'format' in entry:
-                transactions[txn]['format'] = entry.get('format')
-            if 'type' in entry:
-                transactions[txn]['type'] = entry.get('type')
-                transactions[txn]['requests'] = requests
-            if 'agent' in entry:
-                transactions[txn]['agent'] = entry.get('agent')
-            if entry.get('type') == 'response':
-                objects = entry.get('objects', 0)
-                transactions[txn]['objects'] = objects
-                model = transactions[txn].get('model')
-                if 'time' in entry:
-                    try:
-                        dt = datetime.strptime(entry.get('time'), '%Y-%m-%dT%H:%M:%S.%f%z')
-                    except ValueError:
-                        print('Wrong timestamp format {}'.format(entry.get('time')))
-                else:
-                    dt = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%f%z')
-                if dt:
-                    date = dt.date()
-                    hour = dt.hour
-                    minute = dt.minute
-                    agent = transactions[txn].get('agent')
-                    frmt = transactions[txn].get('format')
-                    obj = [
-                        {
-                            'date': date,
-                            'hour': hour,
-                            'minute': minute,
-                            'format': frmt,
-                            'reqs': requests,
-                            'count': objects,
-                            'agent': agent,
-                        }
-                    ]
-                if model is not None and len(model) > 0:
-                    if model not in final_stats:
-                        final_stats[model] = obj
-                bot_in_list = False
-                if agent:
-                    for bt in bots:
-                        if bt in agent:
-                            bot_in_list = True
-                            bots_found['agents'][bt] = bots_found.get('agents').get(bt, 0) + 1
-                            break
-                if not bot_in_list:
-                    if agent:
-                        bots_found['agents'][agent] = bots_found.get('agents').get(agent, 0) + 1
-                    data = [{
-                        "source": name,
-                        "model": model,
-                        "time": dt,
-                        "date": date,
-                        "hour": hour,
-                        'minute': minute,
-                        "format": frmt,
-                        "requests": requests,
-                        "objects": objects
-                    }]
-                    transactions.pop(txn)
-                    if model:
-                        if model not in temp:
-                            temp[model] = data
-                        else:
-                            if any(d['date'] == date for d in temp[model]):
-                                hour_found = False
-                                for index, dictionary in enumerate(temp[model]):
-                                    if (
-                                            dictionary.get('hour') == hour
-                                            and dictionary.get('source') == name
-                                            and dictionary.get('format') == frmt
-                                    ) or (
-                                            dictionary.get('hour') == hour + 1
-                                            and dictionary.get('minute') == 1
-                                            and dictionary.get('source') == name
-                                            and dictionary.get('format') == frmt
-                                    ):
-                                        hour_found = True
-                                        obj_count = temp[model][index]['objects']
-                                        requests = temp[model][index]['requests']
-                                        temp[model][index] = {'source': name, 'model': model, 'time': dt, 'date': date,
-                                                              'hour': hour, 'format': frmt, 'requests': requests + 1,
-                                                              'objects': obj_count + objects}
-                                if not hour_found:
-                                    temp[model].append(
-                                        {'source': name, 'model': model, 'time': dt, 'date': date, 'hour': hour,
-                                         'format': frmt, 'requests': requests, 'objects': objects})
-                            else:
-                                temp[model].append(
-                                    {'source': name, 'model': model, 'time': dt, 'date': date, 'hour': hour,
-                                     'format': frmt, 'requests': requests, 'objects': objects})
-
-            with open(bot_status_file, "w+") as bot_file:
-                bot_file.write(json.dumps(bots_found, indent=4))
-
-
-def post_data(data, name, session, endpoint):
-    pbar = tqdm("Posting download stats", total=sum([len(stats) for stats in data.values()]))
-    for model, stats in list(data.items()):
-        for st in stats:
-            info = {
+                temp[key] = {
+                    'source': name,
+                    'model': model,
+                    'time': dt,
+                    'format': frmt,
+                    'requests': 1,
+                    'objects': objects,
+                }
+
+
+def expire_transactions(transactions, window):
+    # Requests, that did not get a response within the window, will never be
+    # counted, so they are dropped to keep memory usage flat.
+    times = [t['time'] for t in transactions.values() if t.get('time')]
+    if not times:
+        return
+    cutoff = max(times) - window
+    for txn in [txn for txn, t in transactions.items() if not t.get('time') or t['time'] < cutoff]:
+        del transactions[txn]
+
+
+def post_data(data, name, session, endpoint, batch_size=1000):
+    pbar = tqdm(desc="Posting download stats", total=len(data))
+    keys = list(data)
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i:i + batch_size]
+        lines = []
+        for key in batch:
+            st = data[key]
+            lines.append(json.dumps({
                 "source": name,
-                "model": model,
-                "time": st.get('time'),
+                "model": st.get('model'),
+                "time": st.get('time').isoformat(),
                 "format": st.get('format'),
                 "requests": st.get('requests'),
                 "objects": st.get('objects')
-            }
-            req = session.post(endpoint, data=info)
-            req.raise_for_status()
-            pbar.update(1)
-        del data[model]
-
-
-def blocks(files, size=65536):
-    while True:
-        b = files.read(size)
-        if not b:
-            break
-        yield b
+            }))
+        res = session.post(
+            endpoint,
+            data=gzip.compress('\n'.join(lines).encode()),
+            headers={
+                'Content-Type': 'application/x-ndjson',
+                'Content-Encoding': 'gzip',
+            },
+        )
+        res.raise_for_status()
+        pbar.update(len(batch))
+        for key in batch:
+            del data[key]
 
 
 if __name__ == '__main__':
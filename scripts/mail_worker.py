@@ -0,0 +1,28 @@
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run, Option
+
+from vitrina.messages.services import send_queued_mail
+
+
+def main(
+    once: bool = Option(False, help="Exit when there are no queued e-mails left"),
+    sleep: int = Option(5, help="Seconds to wait before checking the queue again"),
+    batch_size: int = Option(100, help="Number of queued e-mails sent over one connection"),
+):
+    while True:
+        count = send_queued_mail(batch_size)
+        if count == 0:
+            if once:
+                break
+            time.sleep(sleep)
+
+
+if __name__ == '__main__':
+    run(main)
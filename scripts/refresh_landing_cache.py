@@ -0,0 +1,18 @@
+import os
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run
+
+from vitrina.landing import refresh_aggregates
+
+
+def main():
+    for key in refresh_aggregates():
+        print(f"{key} refreshed")
+
+
+if __name__ == '__main__':
+    run(main)
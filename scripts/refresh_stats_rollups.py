@@ -0,0 +1,20 @@
+import os
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run, Option
+
+from vitrina.statistics.services import refresh_stats_rollups
+
+
+def main(
+    full: bool = Option(False, help="Rebuild all rollups instead of rows changed since the last refresh"),
+):
+    for source, updated in refresh_stats_rollups(full=full).items():
+        print(f"{source}: {updated} daily rollup rows updated")
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,28 @@
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run, Option
+
+from vitrina.datasets.services import process_search_index_updates
+
+
+def main(
+    once: bool = Option(False, help="Exit when there are no queued search index updates left"),
+    sleep: int = Option(5, help="Seconds to wait before checking the queue again"),
+    batch_size: int = Option(500, help="Number of queued updates indexed at once"),
+):
+    while True:
+        count = process_search_index_updates(batch_size)
+        if count == 0:
+            if once:
+                break
+            time.sleep(sleep)
+
+
+if __name__ == '__main__':
+    run(main)
@@ -11,7 +11,7 @@ from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 
-from vitrina.helpers import email
+from vitrina.messages.services import email_many
 from vitrina.tasks.services import get_holidays, get_past_work_date
 from vitrina.datasets.models import Dataset
 from vitrina.requests.models import Request
@@ -27,6 +27,9 @@ def main():
     date_5 = get_past_work_date(5, holidays)
     date_10 = get_past_work_date(10, holidays)
     domain = Site.objects.get_current().domain
+    # Every coordinator gets a separate message about each late request, all
+    # of them are sent at once.
+    messages = []
 
     # For Requests that have related Datasets
     for request in Request.objects.filter(
@@ -62,16 +65,11 @@ def main():
 
                 emails.extend(list(coordinator_emails))
 
-        if emails:
-            email(
-                emails,
-                'request-late',
-                'vitrina/emails/request_late_response.md',
-                {
-                    'request': request.title,
-                    'link': "https://" + domain + request.get_absolute_url()
-                }
-            )
+        context = {
+            'request': request.title,
+            'link': "https://" + domain + request.get_absolute_url()
+        }
+        messages.extend((address, context) for address in dict.fromkeys(emails) if address)
 
     # For Requests that don't have related Datasets, but have related RequestAssignment
     for request in Request.objects.filter(
@@ -108,16 +106,13 @@ def main():
 
                 emails.extend(list(coordinator_emails))
 
-        if emails:
-            email(
-                emails,
-                'request-late',
-                'vitrina/emails/request_late_response.md',
-                {
-                    'request': request.title,
-                    'link': "https://" + domain + request.get_absolute_url()
-                }
-            )
+        context = {
+            'request': request.title,
+            'link': "https://" + domain + request.get_absolute_url()
+        }
+        messages.extend((address, context) for address in dict.fromkeys(emails) if address)
+
+    email_many('request-late', 'vitrina/emails/request_late_response.md', messages)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,32 @@
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vitrina.settings")
+django.setup()
+
+from typer import run, Option
+
+from vitrina.structure.services import run_structure_import_job
+
+
+def main(
+    once: bool = Option(False, help="Exit when there are no queued structure imports left"),
+    sleep: int = Option(5, help="Seconds to wait before checking the queue again"),
+):
+    while True:
+        job = run_structure_import_job()
+        if job is None:
+            if once:
+                break
+            time.sleep(sleep)
+            continue
+
+        print(f"{job.structure}: {job.get_status_display()}")
+        if job.error:
+            print(job.error)
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.test import RequestFactory
+
+from vitrina.api.factories import APIKeyFactory
+from vitrina.api.services import get_api_key_organization_and_user
+from vitrina.orgs.factories import OrganizationFactory, RepresentativeFactory
+from vitrina.orgs.services import hash_api_key
+from vitrina.users.factories import UserFactory
+
+
+def _request(key='test'):
+    return RequestFactory().get('/', HTTP_AUTHORIZATION=f'ApiKey {key}')
+
+
+def _create_api_key(organization):
+    return APIKeyFactory(
+        representative=RepresentativeFactory(
+            content_type=ContentType.objects.get_for_model(organization),
+            object_id=organization.pk,
+            user=UserFactory(),
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_api_key_is_cached(django_assert_num_queries):
+    organization = OrganizationFactory()
+    api_key = _create_api_key(organization)
+    assert get_api_key_organization_and_user(_request()) == (organization, api_key.representative.user)
+
+    # Organization and user are loaded only when used.
+    with django_assert_num_queries(0):
+        result = get_api_key_organization_and_user(_request())
+    with django_assert_num_queries(2):
+        assert result == (organization, api_key.representative.user)
+
+
+@pytest.mark.django_db
+def test_disabled_api_key_is_not_cached():
+    organization = OrganizationFactory()
+    api_key = _create_api_key(organization)
+    assert get_api_key_organization_and_user(_request()) == (organization, api_key.representative.user)
+
+    api_key.enabled = False
+    api_key.save()
+    assert get_api_key_organization_and_user(_request()) == (None, None)
+
+
+@pytest.mark.django_db
+def test_regenerated_api_key_is_not_cached():
+    organization = OrganizationFactory()
+    api_key = _create_api_key(organization)
+    assert get_api_key_organization_and_user(_request()) == (organization, api_key.representative.user)
+
+    api_key.api_key = hash_api_key('new')
+    api_key.save()
+    assert get_api_key_organization_and_user(_request()) == (None, None)
+    assert get_api_key_organization_and_user(_request('new')) == (organization, api_key.representative.user)
+
+
+@pytest.mark.django_db
+def test_representative_change_is_not_cached():
+    organization = OrganizationFactory()
+    api_key = _create_api_key(organization)
+    assert get_api_key_organization_and_user(_request()) == (organization, api_key.representative.user)
+
+    other = OrganizationFactory()
+    api_key.representative.object_id = other.pk
+    api_key.representative.save()
+    assert get_api_key_organization_and_user(_request()) == (other, api_key.representative.user)
@@ -1,9 +1,15 @@
+import gzip
+import json
+import re
 import secrets
 from datetime import datetime
+from typing import List
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django_webtest import DjangoTestApp
@@ -1965,6 +1971,102 @@ def test_create_model_statistics(app: DjangoTestApp):
     }
 
 
+@pytest.mark.django_db
+def test_create_model_statistics_in_bulk(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    ct = ContentType.objects.get_for_model(organization)
+    user = UserFactory(
+        is_staff=True
+    )
+    representative = RepresentativeFactory(
+        content_type=ct,
+        object_id=organization.pk,
+        user=user
+    )
+    APIKeyFactory(representative=representative)
+    ModelDownloadStats.objects.create(
+        source='get.data.gov.lt',
+        model='datasets/gov/example/City',
+        model_format='csv',
+        model_requests=1,
+        model_objects=1,
+        created=datetime(2023, 1, 1, 10, tzinfo=timezone.utc),
+    )
+    rows = [
+        {
+            'source': 'get.data.gov.lt',
+            'model': 'datasets/gov/example/City',
+            'format': 'csv',
+            'time': '2023-01-01T10:00:00+00:00',
+            'requests': 5,
+            'objects': 50,
+        },
+        {
+            'source': 'get.data.gov.lt',
+            'model': 'datasets/gov/example/City',
+            'format': 'json',
+            'time': '2023-01-01T10:00:00+00:00',
+            'requests': 2,
+            'objects': 20,
+        },
+        {
+            'source': 'get.data.gov.lt',
+            'model': 'datasets/gov/example/Country',
+            'format': 'json',
+            'time': '2023-01-01T10:00:00+00:00',
+            'requests': 0,
+            'objects': 0,
+        },
+    ]
+    res = app.post(
+        reverse('api-download-stats-bulk'),
+        gzip.compress('\n'.join(json.dumps(row) for row in rows).encode()),
+        headers={
+            'Authorization': 'ApiKey test',
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+        },
+    )
+    assert res.json == {'count': 2}
+    assert sorted(ModelDownloadStats.objects.values_list(
+        'model_format',
+        'model_requests',
+        'model_objects',
+    )) == [
+        ('csv', 5, 50),
+        ('json', 2, 20),
+    ]
+    assert not ModelDownloadStats.objects.filter(modified__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_create_model_statistics_in_bulk_with_extra_fields(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    ct = ContentType.objects.get_for_model(organization)
+    user = UserFactory(
+        is_staff=True
+    )
+    representative = RepresentativeFactory(
+        content_type=ct,
+        object_id=organization.pk,
+        user=user
+    )
+    APIKeyFactory(representative=representative)
+    res = app.post_json(reverse('api-download-stats-bulk'), [{
+        'source': 'get.data.gov.lt',
+        'model': 'datasets/gov/example/City',
+        'format': 'csv',
+        'time': '2023-01-01T10:00:00+00:00',
+        'requests': 5,
+        'objects': 50,
+        'extra': 1,
+    }], headers={
+        'Authorization': 'ApiKey test',
+    }, expect_errors=True)
+    assert res.status_code == 400
+    assert ModelDownloadStats.objects.count() == 0
+
+
 @pytest.mark.django_db
 def test_edp_dcat_ap_rdf(app: DjangoTestApp):
     iana = 'http://www.iana.org/assignments'
@@ -2114,3 +2216,238 @@ def test_edp_dcat_ap_rdf(app: DjangoTestApp):
         </dcat:distribution>
     </dcat:Dataset>
 </rdf:RDF>'''
+
+
+def _get_rdf_datasets(res) -> List[int]:
+    return [
+        int(pk)
+        for pk in re.findall(r'<dcat:Dataset rdf:about="http://example.com/datasets/(\d+)/">', res.text)
+    ]
+
+
+def _create_rdf_dataset(**kwargs) -> Dataset:
+    dataset = DatasetFactory(category=[CategoryFactory()], **kwargs)
+    DatasetDistributionFactory(dataset=dataset)
+    return dataset
+
+
+@pytest.mark.django_db
+def test_edp_dcat_ap_rdf__query_count(app: DjangoTestApp):
+    _create_rdf_dataset()
+    with CaptureQueriesContext(connection) as queries:
+        app.get('/edp/dcat-ap.rdf')
+    count = len(queries)
+
+    for i in range(5):
+        _create_rdf_dataset()
+    with CaptureQueriesContext(connection) as queries:
+        res = app.get('/edp/dcat-ap.rdf')
+    assert len(queries) == count
+    assert len(_get_rdf_datasets(res)) == 6
+
+
+@pytest.mark.django_db
+def test_edp_dcat_ap_rdf__cached(app: DjangoTestApp):
+    dataset = _create_rdf_dataset(title={'lt': 'Testas'})
+    res = app.get('/edp/dcat-ap.rdf')
+    with CaptureQueriesContext(connection) as queries:
+        assert app.get('/edp/dcat-ap.rdf').text == res.text
+    assert not any('dataset_distribution' in q['sql'] for q in queries)
+
+    dataset.set_current_language('lt')
+    dataset.title = 'Pakeistas'
+    dataset.save()
+    res = app.get('/edp/dcat-ap.rdf')
+    assert 'Pakeistas' in res.text
+    assert 'Testas' not in res.text
+
+
+@pytest.mark.django_db
+def test_edp_dcat_ap_rdf__conditional_get(app: DjangoTestApp):
+    _create_rdf_dataset()
+    res = app.get('/edp/dcat-ap.rdf')
+    etag = res.headers['ETag']
+    res = app.get('/edp/dcat-ap.rdf', headers={'If-None-Match': etag})
+    assert res.status_code == 304
+
+    _create_rdf_dataset()
+    res = app.get('/edp/dcat-ap.rdf', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.headers['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_edp_dcat_ap_rdf__since_and_page(app: DjangoTestApp, monkeypatch):
+    monkeypatch.setattr('vitrina.api.dcat.DCAT_PAGE_SIZE', 2)
+    old = _create_rdf_dataset(published=datetime(2020, 1, 1))
+    new = [
+        _create_rdf_dataset(published=datetime(2021, 1, i))
+        for i in range(1, 4)
+    ]
+    Dataset.objects.filter(pk=old.pk).update(modified=timezone.make_aware(datetime(2020, 1, 1)))
+
+    res = app.get('/edp/dcat-ap.rdf?since=2021-01-01')
+    assert _get_rdf_datasets(res) == [d.pk for d in new]
+
+    res = app.get('/edp/dcat-ap.rdf?page=1')
+    assert _get_rdf_datasets(res) == [old.pk, new[0].pk]
+    res = app.get('/edp/dcat-ap.rdf?page=2')
+    assert _get_rdf_datasets(res) == [new[1].pk, new[2].pk]
+    res = app.get('/edp/dcat-ap.rdf?page=3')
+    assert _get_rdf_datasets(res) == []
+
+    res = app.get('/edp/dcat-ap.rdf?since=yesterday', expect_errors=True)
+    assert res.status_code == 400
+    res = app.get('/edp/dcat-ap.rdf?page=0', expect_errors=True)
+    assert res.status_code == 400
+
+
+def _use_partner_api_key(app: DjangoTestApp, organization) -> None:
+    ct = ContentType.objects.get_for_model(organization)
+    representative = RepresentativeFactory(
+        content_type=ct,
+        object_id=organization.pk,
+    )
+    APIKeyFactory(representative=representative)
+    app.extra_environ.update({
+        'HTTP_AUTHORIZATION': 'ApiKey test'
+    })
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__query_count(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    DatasetFactory(organization=organization, category=[CategoryFactory()])
+    with CaptureQueriesContext(connection) as queries:
+        app.get(reverse("api-dataset"))
+    count = len(queries)
+
+    for i in range(5):
+        dataset = DatasetFactory(organization=organization, category=[CategoryFactory()])
+        dataset.tags.add('tag')
+    with CaptureQueriesContext(connection) as queries:
+        res = app.get(reverse("api-dataset"))
+    assert len(res.json) == 6
+    assert len(queries) <= count + 1
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__cursor_pagination(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    datasets = [DatasetFactory(organization=organization) for i in range(3)]
+
+    res = app.get(reverse("api-dataset"), {'page_size': 2})
+    assert [item['id'] for item in res.json['results']] == [str(d.pk) for d in datasets[:2]]
+    assert res.json['previous'] is None
+    res = app.get(res.json['next'])
+    assert [item['id'] for item in res.json['results']] == [str(datasets[2].pk)]
+    assert res.json['next'] is None
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__sparse_fields(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    dataset = DatasetFactory(organization=organization)
+
+    res = app.get(reverse("api-dataset"), {'fields': 'id,modified'})
+    assert res.json == [{
+        'id': str(dataset.pk),
+        'modified': timezone.localtime(dataset.modified).isoformat(),
+    }]
+
+    res = app.get(reverse("api-dataset"), {'fields': 'id,unknown'}, expect_errors=True)
+    assert res.status_code == 400
+    assert res.json == {'fields': ['Unknown fields: unknown.']}
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__modified_since(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    old = DatasetFactory(organization=organization)
+    new = DatasetFactory(organization=organization)
+    Dataset.objects.filter(pk=old.pk).update(modified=timezone.make_aware(datetime(2020, 1, 1)))
+
+    res = app.get(reverse("api-dataset"), {'modified_since': '2021-01-01', 'fields': 'id'})
+    assert res.json == [{'id': str(new.pk)}]
+
+    res = app.get(reverse("api-dataset"), {'modified_since': 'yesterday'}, expect_errors=True)
+    assert res.status_code == 400
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__etag(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    dataset = DatasetFactory(organization=organization)
+
+    res = app.get(reverse("api-dataset"))
+    etag = res.headers['ETag']
+    res = app.get(reverse("api-dataset"), headers={'If-None-Match': etag})
+    assert res.status_code == 304
+
+    dataset.save()
+    res = app.get(reverse("api-dataset"), headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.headers['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_get_all_datasets__etag_related(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    dataset = DatasetFactory(organization=organization)
+    dataset.tags.add('senas')
+
+    def get_etag():
+        res = app.get(reverse("api-dataset"))
+        return res.headers['ETag']
+
+    def assert_changed(etag):
+        res = app.get(reverse("api-dataset"), headers={'If-None-Match': etag})
+        assert res.status_code == 200
+        return res
+
+    etag = get_etag()
+    dataset.tags.remove('senas')
+    dataset.tags.add('naujas')
+    res = assert_changed(etag)
+    assert res.json[0]['keyword'] == ['naujas']
+
+    etag = get_etag()
+    dataset.category.add(CategoryFactory())
+    assert_changed(etag)
+
+    etag = get_etag()
+    translation = dataset.get_translation('lt')
+    translation.title = 'Naujas pavadinimas'
+    translation.save()
+    res = assert_changed(etag)
+    assert res.json[0]['title'] == 'Naujas pavadinimas'
+
+    etag = get_etag()
+    organization.title = 'Nauja organizacija'
+    organization.save()
+    res = assert_changed(etag)
+    assert res.json[0]['organization_title'] == 'Nauja organizacija'
+
+
+@pytest.mark.django_db
+def test_get_dataset__etag(app: DjangoTestApp):
+    organization = OrganizationFactory()
+    _use_partner_api_key(app, organization)
+    dataset = DatasetFactory(organization=organization)
+    url = reverse("api-single-dataset", kwargs={'datasetId': dataset.pk})
+
+    res = app.get(url)
+    etag = res.headers['ETag']
+    res = app.get(url, headers={'If-None-Match': etag})
+    assert res.status_code == 304
+
+    dataset.save()
+    res = app.get(url, headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.json['id'] == str(dataset.pk)
@@ -1,8 +1,12 @@
 import pytest
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from vitrina.comments.forms import DatasetCommentForm, CommentForm, RequestCommentForm
-from vitrina.comments.services import get_comment_form_class
+from vitrina.comments.factories import CommentFactory
+from vitrina.comments.models import Comment
+from vitrina.comments.services import get_comment_form_class, get_comment_threads
 from vitrina.datasets.factories import DatasetFactory
 from vitrina.orgs.factories import RepresentativeFactory
 from vitrina.orgs.models import Representative
@@ -74,3 +78,76 @@ def test_get_comment_form_class_for_project():
     user = UserFactory()
     res = get_comment_form_class(project, user)
     assert res == CommentForm
+
+
+def _create_thread(dataset, replies):
+    ct = ContentType.objects.get_for_model(dataset)
+    comment = CommentFactory(content_type=ct, object_id=dataset.pk)
+    parent = comment
+    for i in range(replies):
+        parent = CommentFactory(
+            content_type=ct,
+            object_id=dataset.pk,
+            parent=parent if i % 2 else comment,
+            is_public=i != 2,
+        )
+    return comment
+
+
+def _get_threads(dataset):
+    return Comment.objects.filter(
+        content_type=ContentType.objects.get_for_model(dataset),
+        object_id=dataset.pk,
+        parent_id__isnull=True,
+    )
+
+
+@pytest.mark.django_db
+def test_get_comment_threads():
+    dataset = DatasetFactory()
+    threads = [_create_thread(dataset, 4), _create_thread(dataset, 2)]
+    expected = [
+        reply
+        for comment in threads
+        for reply in comment.descendants(include_self=True)
+    ]
+    comments, page_obj = get_comment_threads(_get_threads(dataset))
+    assert comments == expected
+    assert page_obj is None
+    assert [c.parent for c in comments] == [c.parent for c in expected]
+
+
+@pytest.mark.django_db
+def test_get_comment_threads_include_private():
+    dataset = DatasetFactory()
+    comment = _create_thread(dataset, 4)
+    comments, _ = get_comment_threads(_get_threads(dataset), include_private=True)
+    assert comments == comment.descendants(include_self=True, permission=True)
+    assert len(comments) == 5
+
+
+@pytest.mark.django_db
+def test_get_comment_threads_queries_do_not_depend_on_comment_count():
+    counts = []
+    for n in (1, 5):
+        dataset = DatasetFactory()
+        for i in range(n):
+            _create_thread(dataset, n)
+        with CaptureQueriesContext(connection) as queries:
+            comments, _ = get_comment_threads(_get_threads(dataset))
+            for comment in comments:
+                str(comment.user)
+                if comment.parent:
+                    str(comment.parent.user)
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_get_comment_threads_page():
+    dataset = DatasetFactory()
+    threads = [_create_thread(dataset, 1) for i in range(3)]
+    comments, page_obj = get_comment_threads(_get_threads(dataset), page=2, per_page=2)
+    assert page_obj.number == 2
+    assert page_obj.paginator.num_pages == 2
+    assert comments == threads[2].descendants(include_self=True)
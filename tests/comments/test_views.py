@@ -10,6 +10,7 @@ from reversion.models import Version
 from vitrina.classifiers.factories import FrequencyFactory
 from vitrina.comments.factories import CommentFactory
 from vitrina.comments.models import Comment
+from vitrina.comments.services import COMMENT_THREADS_PER_PAGE
 from vitrina.requests.models import RequestAssignment
 from vitrina.datasets.factories import DatasetFactory
 from vitrina.requests.factories import RequestFactory, RequestAssignmentFactory
@@ -310,7 +311,7 @@ def test_object_data_comment_with_register_request(app: DjangoTestApp):
         type='string',
     )
 
-    with patch('vitrina.structure.services.requests.get') as mock_get:
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
         data = {
             '_id': 'c7d66fa2-a880-443d-8ab5-2ab7f9c79886',
             'prop': "test 1",
@@ -454,3 +455,20 @@ def test_object_data_reply_on_non_public_dataset_without_permission(app: DjangoT
     }, expect_errors=True)
 
     assert resp.status_code == 403
+
+
+@pytest.mark.django_db
+def test_comments_page(app: DjangoTestApp):
+    dataset = DatasetFactory()
+    ct = ContentType.objects.get_for_model(dataset)
+    comments = [
+        CommentFactory(content_type=ct, object_id=dataset.pk, body=f"Comment {i}", is_public=True)
+        for i in range(COMMENT_THREADS_PER_PAGE + 1)
+    ]
+
+    resp = app.get(dataset.get_absolute_url())
+    assert [c for c, form, is_child in resp.context['comments']] == comments[:COMMENT_THREADS_PER_PAGE]
+
+    resp = app.get(dataset.get_absolute_url(), {'comments_page': 2})
+    assert [c for c, form, is_child in resp.context['comments']] == comments[COMMENT_THREADS_PER_PAGE:]
+    assert resp.context['page_obj'].number == 2
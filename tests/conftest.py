@@ -3,6 +3,7 @@ import builtins
 import pytest
 
 from django.apps import apps
+from django.core.cache import cache
 from django.core.management import call_command
 
 from pytest_django.lazy_django import skip_if_no_django
@@ -23,6 +24,18 @@ def manage_unmanaged_models():
         model._meta.managed = False
 
 
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    # Tests use a local cache, and cached responses and aggregates must not
+    # leak between tests.
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    cache.clear()
+
+
 @pytest.fixture()
 def app(django_app_factory):
     yield django_app_factory(csrf_checks=False)
@@ -34,6 +47,14 @@ def pytest_configure(config):
     )
 
 
+def pytest_collection_modifyitems(items):
+    # Search index is updated after commit, so tests using it need real
+    # transactions.
+    for item in items:
+        if item.get_closest_marker('haystack'):
+            item.add_marker(pytest.mark.django_db(transaction=True))
+
+
 @pytest.fixture(autouse=True)
 def _haystack_marker(request):
     if request.keywords.get('haystack'):
@@ -41,12 +62,13 @@ def _haystack_marker(request):
         skip_if_no_django()
 
         # Haystack requires database
-        request.getfixturevalue('db')
+        request.getfixturevalue('transactional_db')
 
-        # Switch to test index
+        # Switch to test index, that is updated right after commit
         settings = request.getfixturevalue('settings')
         settings.HAYSTACK_CONNECTIONS = {
             'default': settings.HAYSTACK_CONNECTIONS['test'],
         }
+        settings.SEARCH_INDEX_QUEUE = False
 
         call_command('clear_index', interactive=False, using=['default'])
@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from haystack.backends.simple_backend import SimpleSearchBackend
+
+from vitrina.classifiers.factories import CategoryFactory
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.datasets.models import Dataset, SearchIndexUpdate
+from vitrina.datasets.search_indexes import DatasetIndex
+from vitrina.datasets.services import process_search_index_updates, queue_search_index_updates
+from vitrina.orgs.factories import OrganizationFactory, RepresentativeFactory
+from vitrina.resources.factories import DatasetDistributionFactory
+from vitrina.structure.factories import MetadataFactory, ModelFactory, PropertyFactory
+
+
+def _create_datasets(n):
+    parent = CategoryFactory(title=f'parent{n}')
+    DatasetFactory().category.add(parent)
+    root = OrganizationFactory()
+    for i in range(n):
+        category = parent.add_child(title=f'child{n}-{i}', version=1, featured=False)
+        org = root.add_child(title=f'org{n}-{i}', name=f'org{n}_{i}', kind='org', version=1)
+        dataset = DatasetFactory(organization=org)
+        dataset.category.add(category)
+        dataset.tags.add(f'tag{i}')
+        DatasetDistributionFactory(dataset=dataset)
+        RepresentativeFactory(content_object=dataset)
+        model = ModelFactory(dataset=dataset)
+        MetadataFactory(object=model, dataset=dataset, name=f'datasets/gov/ds{i}/Model')
+        for j in range(3):
+            prop = PropertyFactory(model=model)
+            MetadataFactory(object=prop, dataset=dataset, name=f'prop{j}')
+    return list(Dataset.objects.filter(organization__path__startswith=root.path).order_by('pk'))
+
+
+def _prepare(datasets):
+    index = DatasetIndex()
+    index.prepare_batch(datasets)
+    return [index.full_prepare(dataset) for dataset in datasets]
+
+
+@pytest.mark.django_db
+def test_prepare_batch():
+    datasets = _create_datasets(2)
+    expected = [DatasetIndex().full_prepare(dataset) for dataset in datasets]
+    datasets = list(Dataset.objects.filter(pk__in=[dataset.pk for dataset in datasets]).order_by('pk'))
+    assert _prepare(datasets) == expected
+
+
+@pytest.mark.django_db
+def test_prepare_batch_queries_do_not_depend_on_dataset_count():
+    counts = []
+    for n in (2, 6):
+        datasets = _create_datasets(n)
+        with CaptureQueriesContext(connection) as queries:
+            _prepare(datasets)
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_saved_objects_are_queued_once(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        dataset = DatasetFactory()
+        dataset.save()
+        dataset.save()
+    assert SearchIndexUpdate.objects.filter(
+        content_type__model='dataset',
+        object_id=dataset.pk,
+    ).count() == 1
+
+
+@pytest.mark.django_db
+def test_rolled_back_objects_are_not_queued(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(DatabaseError):
+            with transaction.atomic():
+                DatasetFactory()
+                raise DatabaseError
+        dataset = DatasetFactory()
+    assert list(SearchIndexUpdate.objects.filter(
+        content_type__model='dataset',
+    ).values_list('object_id', flat=True)) == [dataset.pk]
+
+
+@pytest.mark.django_db
+def test_process_search_index_updates():
+    dataset = DatasetFactory()
+    deleted = DatasetFactory()
+    queue_search_index_updates([
+        (Dataset, dataset.pk),
+        (Dataset, deleted.pk),
+        (Dataset, dataset.pk),
+    ])
+    deleted_pk = deleted.pk
+    deleted.delete()
+
+    with patch.object(SimpleSearchBackend, 'update') as update, \
+            patch.object(SimpleSearchBackend, 'remove') as remove:
+        assert process_search_index_updates() == 3
+    update.assert_called_once()
+    assert update.call_args[0][1] == [dataset]
+    remove.assert_called_once_with(f'vitrina_datasets.dataset.{deleted_pk}')
+    assert SearchIndexUpdate.objects.count() == 0
@@ -10,6 +10,7 @@ from django_webtest import DjangoTestApp
 import pytest
 from factory.django import FileField
 from filer.models import File
+import reversion
 from reversion.models import Version
 from webtest import Upload
 
@@ -22,6 +23,7 @@ from vitrina.datasets.factories import DatasetFactory, DatasetStructureFactory,
     DatasetRelationFactory
 from vitrina.datasets.factories import MANIFEST
 from vitrina.datasets.models import Dataset, DatasetStructure
+from vitrina.datasets.views import DatasetHistoryView
 from vitrina.messages.models import Subscription
 from vitrina.orgs.factories import OrganizationFactory
 from vitrina.orgs.factories import RepresentativeFactory
@@ -31,6 +33,7 @@ from vitrina.plans.models import Plan, PlanDataset
 from vitrina.projects.factories import ProjectFactory
 from vitrina.resources.factories import DatasetDistributionFactory
 from vitrina.users.factories import UserFactory, ManagerFactory
+from vitrina.structure.models import Model, StructureImportJob
 from vitrina.users.models import User
 
 timezone = pytz.timezone(settings.TIME_ZONE)
@@ -1072,6 +1075,28 @@ def test_dataset_history_view_with_permission(app: DjangoTestApp):
     assert resp.context['history'][0]['user'] == user
 
 
+@pytest.mark.django_db
+def test_dataset_history_view_pages(app: DjangoTestApp, monkeypatch):
+    monkeypatch.setattr(DatasetHistoryView, 'history_page_size', 2)
+    user = ManagerFactory(is_staff=True)
+    dataset = DatasetFactory(organization=user.organization)
+    for comment in ['first', 'second', 'third']:
+        with reversion.create_revision():
+            reversion.add_to_revision(dataset)
+            reversion.set_comment(comment)
+    app.set_user(user)
+
+    resp = app.get(reverse('dataset-history', args=[dataset.pk]))
+    assert [h['action'] for h in resp.context['history']] == ['third', 'second']
+    assert resp.context['history_next_cursor']
+
+    resp = app.get(reverse('dataset-history', args=[dataset.pk]), {
+        'after': resp.context['history_next_cursor'],
+    })
+    assert [h['action'] for h in resp.context['history']] == ['first']
+    assert resp.context['history_next_cursor'] is None
+
+
 @pytest.mark.django_db
 def test_dataset_structure_import_without_permission(app: DjangoTestApp):
     user = UserFactory()
@@ -1111,13 +1136,34 @@ def test_dataset_structure_import_standardized(app: DjangoTestApp):
     resp = app.get(reverse('dataset-structure-import', args=[dataset.pk]))
     form = resp.forms['dataset-structure-form']
     form['file'] = Upload('file.csv', MANIFEST.encode())
-    form.submit()
+    resp = form.submit().follow()
 
     dataset.refresh_from_db()
     structure = DatasetStructure.objects.get(dataset=dataset)
     assert dataset.current_structure == structure
     assert File.objects.count() == 1
     assert structure.file.original_filename == "file.csv"
+    assert list(StructureImportJob.objects.values_list('structure', 'user', 'status')) == [
+        (structure.pk, user.pk, StructureImportJob.QUEUED),
+    ]
+    job = StructureImportJob.objects.get()
+    assert resp.html.find('a', href=reverse('structure-import-job', args=[dataset.pk, job.pk]))
+
+
+@pytest.mark.django_db
+def test_dataset_structure_import_without_queue(app: DjangoTestApp, settings):
+    settings.STRUCTURE_IMPORT_QUEUE = False
+    user = UserFactory(is_staff=True)
+    dataset = DatasetFactory()
+
+    app.set_user(user)
+    resp = app.get(reverse('dataset-structure-import', args=[dataset.pk]))
+    form = resp.forms['dataset-structure-form']
+    form['file'] = Upload('file.csv', MANIFEST.encode())
+    form.submit()
+
+    assert StructureImportJob.objects.count() == 0
+    assert Model.objects.filter(dataset=dataset).exists()
 
 
 @pytest.mark.django_db
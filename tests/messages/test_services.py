@@ -0,0 +1,99 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.db.models import Q
+
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.datasets.models import Dataset
+from vitrina.messages.models import QueuedMail, SentMail, Subscription
+from vitrina.messages.services import email_many, get_subscriptions, queue_email, send_queued_mail
+from vitrina.orgs.models import Organization
+from vitrina.users.factories import UserFactory
+
+
+def _subscribe(user, obj, sub_type, object_id=None):
+    return Subscription.objects.create(
+        user=user,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=object_id,
+        sub_type=sub_type,
+        dataset_update_sub=True,
+    )
+
+
+@pytest.mark.django_db
+def test_get_subscriptions(django_assert_num_queries):
+    dataset = DatasetFactory()
+    user1 = UserFactory()
+    user2 = UserFactory()
+    user3 = UserFactory()
+    _subscribe(user1, dataset, Subscription.DATASET, dataset.pk)
+    org_sub = _subscribe(user1, dataset.organization, Subscription.ORGANIZATION, dataset.organization.pk)
+    dataset_sub = _subscribe(user2, dataset, Subscription.DATASET, dataset.pk)
+    _subscribe(user3, dataset, Subscription.DATASET, dataset.pk)
+
+    with django_assert_num_queries(1):
+        subs = get_subscriptions(
+            Q(sub_type=Subscription.ORGANIZATION, content_type=ContentType.objects.get_for_model(Organization)),
+            Q(sub_type=Subscription.DATASET, content_type=ContentType.objects.get_for_model(Dataset)),
+            exclude_user=user3,
+        )
+        assert [sub.user.pk for sub in subs] == [user1.pk, user2.pk]
+    assert subs == [org_sub, dataset_sub]
+    assert [sub.priority for sub in subs] == [0, 1]
+
+
+@pytest.mark.django_db
+def test_get_subscriptions_merges_flags():
+    dataset = DatasetFactory()
+    user = UserFactory()
+    dataset_sub = _subscribe(user, dataset, Subscription.DATASET, dataset.pk)
+    org_sub = _subscribe(user, dataset.organization, Subscription.ORGANIZATION, dataset.organization.pk)
+    org_sub.dataset_comments_sub = True
+    org_sub.save()
+
+    subs = get_subscriptions(
+        Q(sub_type=Subscription.DATASET, content_type=ContentType.objects.get_for_model(Dataset)),
+        Q(sub_type=Subscription.ORGANIZATION, content_type=ContentType.objects.get_for_model(Organization)),
+    )
+    assert subs == [dataset_sub]
+    assert subs[0].priority == 0
+    assert subs[0].dataset_comments_sub
+
+
+@pytest.mark.django_db
+def test_send_queued_mail():
+    queue_email(
+        ['a@example.com', 'b@example.com', 'a@example.com'],
+        'dataset-updated',
+        'vitrina/datasets/emails/sub/updated.md',
+        {'title': 'Dataset', 'link': 'http://localhost/'},
+    )
+    queue_email([], 'dataset-updated', 'vitrina/datasets/emails/sub/updated.md')
+    assert QueuedMail.objects.count() == 1
+    assert len(mail.outbox) == 0
+
+    assert send_queued_mail() == 1
+    assert [message.to for message in mail.outbox] == [['a@example.com'], ['b@example.com']]
+    assert sorted(SentMail.objects.values_list('recipient', 'email_sent')) == [
+        ("['a@example.com']", True),
+        ("['b@example.com']", True),
+    ]
+    assert QueuedMail.objects.count() == 0
+    assert send_queued_mail() == 0
+
+
+@pytest.mark.django_db
+def test_email_many():
+    assert email_many('request-late', 'vitrina/emails/request_late_response.md', [
+        ('a@example.com', {'request': 'A', 'link': 'http://localhost/a/'}),
+        ('b@example.com', {'request': 'B', 'link': 'http://localhost/b/'}),
+    ]) == 2
+    assert [message.to for message in mail.outbox] == [['a@example.com'], ['b@example.com']]
+    assert 'http://localhost/a/' in mail.outbox[0].body
+    assert 'http://localhost/b/' in mail.outbox[1].body
+    assert sorted(SentMail.objects.values_list('recipient', 'email_sent')) == [
+        ("['a@example.com']", True),
+        ("['b@example.com']", True),
+    ]
+    assert email_many('request-late', 'vitrina/emails/request_late_response.md', []) == 0
@@ -10,6 +10,7 @@ from vitrina.comments.models import Comment
 from vitrina.datasets.factories import DatasetFactory
 from vitrina.datasets.models import Dataset
 from vitrina.messages.models import Subscription
+from vitrina.messages.services import send_queued_mail
 from vitrina.orgs.factories import OrganizationFactory, RepresentativeFactory
 from vitrina.orgs.models import Organization
 from vitrina.projects.models import Project
@@ -160,6 +161,7 @@ def test_request_comment_subscription_email(app: DjangoTestApp, subscription_dat
     created_comment = Comment.objects.filter(content_type=ct, object_id=subscription_data['request'].pk)
     assert created_comment.count() == 1
     assert Subscription.objects.count() == 2
+    send_queued_mail()
     assert len(mail.outbox) == 2
 
 
@@ -279,6 +281,7 @@ def test_dataset_comment_subscription_email(app: DjangoTestApp, subscription_dat
     created_comment = Comment.objects.filter(content_type=ct, object_id=subscription_data['dataset'].pk)
     assert created_comment.count() == 1
     assert Subscription.objects.count() == 2
+    send_queued_mail()
     assert len(mail.outbox) == 2
 
 
@@ -308,6 +311,7 @@ def test_dataset_update_subscription_email(app: DjangoTestApp, subscription_data
     dataset.refresh_from_db()
     assert resp.status_code == 302
     assert resp.url == dataset.get_absolute_url()
+    send_queued_mail()
     assert len(mail.outbox) == 2
 
 
@@ -334,6 +338,7 @@ def test_dataset_update_global_org_subscription_email(app: DjangoTestApp, subscr
     dataset.refresh_from_db()
     assert resp.status_code == 302
     assert resp.url == dataset.get_absolute_url()
+    send_queued_mail()
     assert len(mail.outbox) == 1
 
 
@@ -424,6 +429,7 @@ def test_project_comment_subscription_email(app: DjangoTestApp, subscription_dat
     created_comment = Comment.objects.filter(content_type=ct, object_id=subscription_data['project'].pk)
     assert created_comment.count() == 1
     assert Subscription.objects.count() == 2
+    send_queued_mail()
     assert len(mail.outbox) == 2
 
 
@@ -483,6 +489,7 @@ def test_auto_subscribe_for_comment_and_reply_mail(app: DjangoTestApp, subscript
     assert comments.count() == 2
     assert comment in list(resp.context['comments'])[0]
     assert reply in list(resp.context['comments'])[1]
+    send_queued_mail()
     assert len(mail.outbox) == 1
 
 
@@ -527,6 +534,7 @@ def test_dataset_and_org_sub_mail(app: DjangoTestApp, subscription_data):
     dataset.refresh_from_db()
     assert resp.status_code == 302
     assert resp.url == dataset.get_absolute_url()
+    send_queued_mail()
     assert len(mail.outbox) == 3
 
 
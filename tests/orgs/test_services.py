@@ -6,7 +6,7 @@ from vitrina.datasets.factories import DatasetFactory
 from vitrina.datasets.models import Dataset, DatasetStructure
 from vitrina.orgs.factories import OrganizationFactory, RepresentativeFactory
 from vitrina.orgs.models import Organization, Representative
-from vitrina.orgs.services import has_perm, Action, pre_representative_delete
+from vitrina.orgs.services import has_perm, Action, pre_representative_delete, user_roles_cache
 from vitrina.projects.factories import ProjectFactory
 from vitrina.projects.models import Project
 from vitrina.requests.factories import RequestFactory
@@ -14,6 +14,7 @@ from vitrina.requests.models import Request
 from vitrina.resources.factories import DatasetDistributionFactory
 from vitrina.resources.models import DatasetDistribution
 from vitrina.users.factories import UserFactory
+from vitrina.users.models import User
 
 
 @pytest.mark.django_db
@@ -727,3 +728,62 @@ def test_pre_representative_delete__different_organization_dataset():
     pre_representative_delete(rep)
     user.refresh_from_db()
     assert user.is_active is True
+
+
+@pytest.mark.django_db
+def test_has_perm_loads_roles_once(django_assert_num_queries):
+    organization = OrganizationFactory()
+    datasets = [DatasetFactory(organization=organization) for _ in range(5)]
+    user = UserFactory()
+    RepresentativeFactory(
+        content_type=ContentType.objects.get_for_model(organization),
+        object_id=organization.pk,
+        user=user,
+        role=Representative.MANAGER,
+    )
+    datasets = list(Dataset.objects.filter(pk__in=[d.pk for d in datasets]).select_related('organization'))
+    has_perm(user, Action.UPDATE, organization)
+    with django_assert_num_queries(0):
+        for dataset in datasets:
+            assert has_perm(user, Action.UPDATE, dataset) is True
+            assert has_perm(user, Action.STRUCTURE, dataset) is True
+        assert has_perm(user, Action.UPDATE, organization) is False
+
+
+@pytest.mark.django_db
+def test_has_perm_after_role_change():
+    organization = OrganizationFactory()
+    user = UserFactory()
+    representative = RepresentativeFactory(
+        content_type=ContentType.objects.get_for_model(organization),
+        object_id=organization.pk,
+        user=user,
+        role=Representative.MANAGER,
+    )
+    assert has_perm(user, Action.UPDATE, organization) is False
+
+    representative.role = Representative.COORDINATOR
+    representative.save()
+    assert has_perm(user, Action.UPDATE, organization) is True
+
+    representative.delete()
+    assert has_perm(user, Action.UPDATE, organization) is False
+
+
+@pytest.mark.django_db
+def test_has_perm_keeps_roles_for_request():
+    organization = OrganizationFactory()
+    user = UserFactory()
+    representative = RepresentativeFactory(
+        content_type=ContentType.objects.get_for_model(organization),
+        object_id=organization.pk,
+        user=user,
+        role=Representative.MANAGER,
+    )
+    assert has_perm(user, Action.UPDATE, organization) is False
+
+    # Changed by another process, seen on the next request only.
+    Representative.objects.filter(pk=representative.pk).update(role=Representative.COORDINATOR)
+    user_roles_cache.scope(user.pk).invalidate()
+    assert has_perm(user, Action.UPDATE, organization) is False
+    assert has_perm(User.objects.get(pk=user.pk), Action.UPDATE, organization) is True
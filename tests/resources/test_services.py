@@ -0,0 +1,122 @@
+import os
+import pathlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from vitrina.resources.models import LinkCheck
+from vitrina.resources.services import check_links, detect_csv_format, get_distribution_preview, \
+    read_distribution_preview
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('a;b\n1;2\n'.encode(), ('utf-8', ';')),
+    ('a,b\n1,2\n'.encode(), ('utf-8', ',')),
+    ('a\tb\n1\t2\n'.encode(), ('utf-8', '\t')),
+    ('pavadinimas;šalis\nčia;ten\n'.encode('cp1257'), ('cp1257', ';')),
+    (b'a\nb\n', ('utf-8', ';')),
+])
+def test_detect_csv_format(content: bytes, expected: tuple):
+    assert detect_csv_format(content) == expected
+
+
+def test_csv_preview_reads_only_first_rows(tmp_path: pathlib.Path):
+    path = tmp_path / 'data.csv'
+    with path.open('w', encoding='cp1257') as f:
+        f.write('šalis,kiekis\n')
+        for i in range(100_000):
+            f.write(f'Lietuva,{i}\n')
+    assert read_distribution_preview(str(path)) == [
+        ['šalis', 'kiekis'],
+        ['Lietuva', 0],
+        ['Lietuva', 1],
+        ['Lietuva', 2],
+        ['Lietuva', 3],
+        ['Lietuva', 4],
+    ]
+
+
+def test_xlsx_preview(tmp_path: pathlib.Path):
+    path = tmp_path / 'data.xlsx'
+    pd.DataFrame({'a': range(10), 'b': range(10)}).to_excel(path, index=False)
+    assert read_distribution_preview(str(path), rows=2) == [['a', 'b'], [0, 0], [1, 1]]
+
+
+def test_xlsx_preview_with_many_sheets(tmp_path: pathlib.Path):
+    path = tmp_path / 'data.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'a': [1]}).to_excel(writer, sheet_name='first', index=False)
+        pd.DataFrame({'a': [1]}).to_excel(writer, sheet_name='second', index=False)
+    assert read_distribution_preview(str(path)) == [['Only one sheet is allowed in file']]
+
+
+def test_preview_is_cached_until_file_changes(tmp_path: pathlib.Path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a;b\n1;2\n')
+    assert get_distribution_preview(str(path)) == [['a', 'b'], [1, 2]]
+
+    path.write_text('a;b\n3;4\n')
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime - 10))
+    assert get_distribution_preview(str(path)) == [['a', 'b'], [3, 4]]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_HEAD(self):
+        self.requests.append((self.command, self.path, self.headers.get('If-None-Match')))
+        if self.path == '/data.csv':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+            else:
+                self.send_response(200)
+                self.send_header('ETag', '"v1"')
+        elif self.path == '/no-head.csv':
+            self.send_response(405)
+        else:
+            self.send_response(404)
+        self.end_headers()
+
+    def do_GET(self):
+        self.requests.append((self.command, self.path, self.headers.get('Range')))
+        self.send_response(206)
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        self.wfile.write(b'a')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubHandler.requests = []
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+def test_check_links(stub_server):
+    urls = [f'{stub_server}/data.csv', f'{stub_server}/no-head.csv', f'{stub_server}/missing.csv']
+    results = check_links(urls, delay=0)
+    assert {url: result.available for url, result in results.items()} == {
+        urls[0]: True,
+        urls[1]: True,
+        urls[2]: False,
+    }
+    assert ('GET', '/no-head.csv', 'bytes=0-0') in StubHandler.requests
+    assert LinkCheck.objects.get(url=urls[0]).etag == '"v1"'
+
+    # Unchanged resources are checked with conditional requests.
+    results = check_links(urls[:1], delay=0)
+    assert results[urls[0]].status_code == 304
+    assert results[urls[0]].available
+    assert StubHandler.requests[-1] == ('HEAD', '/data.csv', '"v1"')
+    assert LinkCheck.objects.count() == 3
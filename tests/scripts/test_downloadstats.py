@@ -1,18 +1,19 @@
 import uuid
+import gzip
 import json
-from datetime import datetime
+from datetime import timedelta
 from pathlib import Path
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
-from django.utils import timezone
 
 from typer.testing import CliRunner
 from typer import Typer
 
 from scripts.downloadstats import main, post_data
-from scripts.downloadstats import find_transactions
+from scripts.downloadstats import aggregate_entries, expire_transactions
+from scripts.downloadstats import parse_lines, write_bot_status
 
 
 @pytest.fixture()
@@ -21,6 +22,15 @@ def patcher():
         yield mock
 
 
+def posted(session: MagicMock, call=None):
+    calls = session.post.call_args_list if call is None else [call]
+    return [
+        json.loads(line)
+        for c in calls
+        for line in gzip.decompress(c.kwargs['data']).decode().splitlines()
+    ]
+
+
 def flatten(entries: list[list[str]]):
     return [
         line
@@ -126,16 +136,30 @@ def test_downloadstats(patcher: MagicMock, tmp_path: Path):
 
     session = patcher.return_value
 
-    # Only one request per day must be made
-    assert session.post.call_count == 2
-    assert session.post.call_args.kwargs['data'] == {
-        'format': 'html',
-        'model': 'datasets/example/City',
-        'objects': 7,
-        'requests': 3,
-        'source': 'get.data.gov.lt',
-        'time': datetime(2000, 1, 2, tzinfo=timezone.utc),
+    # All rows must be posted in a single request, one row per day
+    assert session.post.call_count == 1
+    assert session.post.call_args.kwargs['headers'] == {
+        'Content-Type': 'application/x-ndjson',
+        'Content-Encoding': 'gzip',
     }
+    assert posted(session) == [
+        {
+            'format': 'html',
+            'model': 'datasets/example/City',
+            'objects': 1,
+            'requests': 1,
+            'source': 'get.data.gov.lt',
+            'time': '2000-01-01T00:00:00+00:00',
+        },
+        {
+            'format': 'html',
+            'model': 'datasets/example/City',
+            'objects': 7,
+            'requests': 3,
+            'source': 'get.data.gov.lt',
+            'time': '2000-01-02T00:00:00+00:00',
+        },
+    ]
 
     # Authorization must be used
     # assert session.post.call_args.kwargs['headers'] == {
@@ -162,7 +186,7 @@ def test_downloadstats(patcher: MagicMock, tmp_path: Path):
     }
 
 
-def test_find_transactions(tmp_path: Path):
+def test_aggregate_entries(tmp_path: Path):
     bots_found = {'agents': {}}
     transactions = {}
     temp = {}
@@ -176,27 +200,28 @@ def test_find_transactions(tmp_path: Path):
     session = MagicMock()
     final_stats = {}
     bot_status_file = tmp_path / 'state.json'
-    find_transactions(
+    aggregate_entries(
         name,
-        lines,
+        parse_lines(lines),
         final_stats,
-        bot_status_file,
         bots_found,
         temp,
         transactions
     )
-    post_data(temp, name, session, endpoint_url)
+    write_bot_status(bot_status_file, bots_found)
+    post_data(temp, name, session, endpoint_url, batch_size=1)
 
-    # Only one request per day must be made
+    # One request per batch must be made
     assert session.post.call_count == 2
-    assert session.post.call_args.kwargs['data'] == {
+    assert posted(session, session.post.call_args) == [{
         'format': 'html',
         'model': 'datasets/example/City',
         'objects': 1,
         'requests': 1,
         'source': 'get.data.gov.lt',
-        'time': datetime(2000, 1, 2, tzinfo=timezone.utc)
-    }
+        'time': '2000-01-02T00:00:00+00:00',
+    }]
+    assert temp == {}
 
     assert json.loads(bot_status_file.read_text()) == {
         'agents': {
@@ -208,29 +233,81 @@ def test_find_transactions(tmp_path: Path):
     lines = flatten([
         log(day='3', txn='1', request=False),
     ])
-    find_transactions(
+    aggregate_entries(
         name,
-        lines,
+        parse_lines(lines),
         final_stats,
-        bot_status_file,
         bots_found,
         temp,
         transactions
     )
-    post_data(temp, name, session, endpoint_url)
+    write_bot_status(bot_status_file, bots_found)
+    post_data(temp, name, session, endpoint_url, batch_size=1)
 
     assert session.post.call_count == 3
-    assert session.post.call_args.kwargs['data'] == {
+    assert posted(session, session.post.call_args) == [{
         'format': 'html',
         'model': 'datasets/example/City',
         'objects': 1,
         'requests': 1,
         'source': 'get.data.gov.lt',
-        'time': datetime(2000, 1, 3, tzinfo=timezone.utc)
-    }
+        'time': '2000-01-03T00:00:00+00:00',
+    }]
 
     assert json.loads(bot_status_file.read_text()) == {
         'agents': {
             'HTTPie/2.6.0': 3,
         },
     }
+
+
+def test_downloadstats_workers(patcher: MagicMock, tmp_path: Path):
+    log_file = tmp_path / 'accesslog.json'
+    log_file.write_text('\n'.join(flatten([
+        log(day='1'),
+        log(day='2'),
+        log(day='2', objects=5),
+    ])))
+
+    app = Typer()
+    app.command()(main)
+    res = CliRunner().invoke(
+        app,
+        [
+            'get.data.gov.lt',
+            str(log_file),
+            '--config-file', str(tmp_path / 'config.json'),
+            '--state-file', str(tmp_path / 'state.json'),
+            '--bot-status-file', str(tmp_path / 'downloadstats.json'),
+            '--batch-size', '1',
+            '--workers', '2',
+        ],
+        catch_exceptions=False,
+    )
+    assert res.exit_code == 0
+
+    session = patcher.return_value
+    assert session.post.call_count == 1
+    assert posted(session)[-1] == {
+        'format': 'html',
+        'model': 'datasets/example/City',
+        'objects': 6,
+        'requests': 2,
+        'source': 'get.data.gov.lt',
+        'time': '2000-01-02T00:00:00+00:00',
+    }
+
+
+def test_expire_transactions():
+    transactions = {}
+    aggregate_entries('get.data.gov.lt', [
+        json.loads(line)
+        for line in flatten([
+            log(day='1', txn='1', response=False),
+            log(day='3', txn='2', response=False),
+        ])
+    ], {}, {'agents': {}}, {}, transactions)
+    assert set(transactions) == {'1', '2'}
+
+    expire_transactions(transactions, timedelta(days=1))
+    assert set(transactions) == {'2'}
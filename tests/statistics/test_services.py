@@ -0,0 +1,235 @@
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from freezegun import freeze_time
+
+from vitrina.comments.factories import CommentFactory
+from vitrina.comments.models import Comment
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.datasets.models import Dataset
+from vitrina.datasets.views import DatasetsOrganizationsView, DatasetStatsView, PublicationStatsView, \
+    get_model_download_total
+from vitrina.orgs.factories import OrganizationFactory
+from vitrina.statistics.models import DatasetStats, ModelDownloadStats, DatasetStatsRollup, StatsRollup
+from vitrina.statistics.services import get_period_key, get_time_series, group_time_series_data, \
+    refresh_stats_rollups
+from vitrina.structure.factories import MetadataFactory, ModelFactory
+from vitrina.structure.models import Model
+
+
+def test_get_period_key():
+    label = pd.Period('2023-05', freq='M')
+    assert get_period_key('Y', 'created', label) == '2023'
+    assert get_period_key('Q', 'created', label) == '2023-2'
+    assert get_period_key('M', 'created', label) == '2023-5'
+
+
+def test_group_time_series_data():
+    data = [
+        {'pk': 1, 'created__year': 2022, 'count': 1},
+        {'pk': 2, 'created__year': 2023, 'count': 2},
+    ]
+    groups = {'a': [1, 2], 'b': [2]}
+    assert group_time_series_data(data, groups, ['created__year']) == [
+        {'group': 'a', 'period': '2022', 'count': 1, 'n': None},
+        {'group': 'a', 'period': '2023', 'count': 2, 'n': None},
+        {'group': 'b', 'period': '2023', 'count': 2, 'n': None},
+    ]
+
+
+def test_get_time_series_cumulative():
+    data = [
+        {'group': 'a', 'period': '2021', 'count': 1, 'n': None},
+        {'group': 'a', 'period': '2023', 'count': 2, 'n': None},
+        {'group': 'b', 'period': '2022', 'count': 3, 'n': None},
+        {'group': 'b', 'period': '2022', 'count': 1, 'n': None},
+        {'group': 'b', 'period': '2019', 'count': 5, 'n': None},
+    ]
+    assert get_time_series(data, ['a', 'b', 'c'], ['2021', '2022', '2023']) == {
+        'a': [1, 1, 3],
+        'b': [0, 4, 4],
+        'c': [0, 0, 0],
+    }
+
+
+def test_get_time_series_last_value():
+    data = [
+        {'group': 'a', 'period': '2021', 'count': 5, 'n': None},
+        {'group': 'a', 'period': '2023', 'count': None, 'n': None},
+    ]
+    assert get_time_series(data, ['a'], ['2021', '2022', '2023'], cumulative=False) == {
+        'a': [5, 5, 0],
+    }
+
+
+def test_get_time_series_average():
+    data = [
+        {'group': 'a', 'period': '2021', 'count': 3, 'n': 1},
+        {'group': 'a', 'period': '2021', 'count': 2, 'n': 2},
+        {'group': 'a', 'period': '2022', 'count': None, 'n': 0},
+    ]
+    assert get_time_series(data, ['a'], ['2021', '2022', '2023'], cumulative=False) == {
+        'a': [5 / 3, 0, 0],
+    }
+
+
+def test_get_time_series_no_data():
+    assert get_time_series([], ['a'], ['2021', '2022']) == {'a': [0, 0]}
+    assert get_time_series([], [], ['2021', '2022']) == {}
+
+
+@pytest.mark.django_db
+def test_stats_view_time_series_data(django_assert_num_queries):
+    org1 = OrganizationFactory()
+    org2 = OrganizationFactory()
+    dataset1 = DatasetFactory(organization=org1)
+    dataset2 = DatasetFactory(organization=org1)
+    dataset3 = DatasetFactory(organization=org2)
+    DatasetStats.objects.create(dataset_id=dataset1.pk, created=date(2022, 1, 1), object_count=10)
+    DatasetStats.objects.create(dataset_id=dataset2.pk, created=date(2022, 6, 1), object_count=5)
+    DatasetStats.objects.create(dataset_id=dataset3.pk, created=date(2023, 1, 1), object_count=1)
+    refresh_stats_rollups()
+
+    view = DatasetsOrganizationsView()
+    groups = {
+        org1.pk: [dataset1.pk, dataset2.pk],
+        org2.pk: [dataset3.pk],
+    }
+    with django_assert_num_queries(1):
+        data = view.get_time_series_data('object-count', 'Y', ['created__year'], groups)
+
+    series = get_time_series(data, list(groups), ['2022', '2023'], cumulative=view.is_cumulative('object-count'))
+    assert series == {
+        org1.pk: [15, 15],
+        org2.pk: [0, 1],
+    }
+
+
+@pytest.mark.django_db
+def test_stats_view_model_download_data(django_assert_num_queries):
+    model = ModelFactory()
+    dataset = model.dataset
+    MetadataFactory(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=model.pk,
+        dataset=dataset,
+        name="test/dataset/TestModel"
+    )
+    ModelDownloadStats.objects.create(
+        model="test/dataset/TestModel",
+        created=datetime(2022, 1, 1, tzinfo=timezone.utc),
+        model_requests=3,
+    )
+    ModelDownloadStats.objects.create(
+        model="test/dataset/TestModel",
+        created=datetime(2023, 1, 1, tzinfo=timezone.utc),
+        model_requests=4,
+    )
+    refresh_stats_rollups()
+
+    view = DatasetsOrganizationsView()
+    groups = {dataset.organization.pk: [dataset.pk]}
+    ContentType.objects.get_for_model(Model)
+    with django_assert_num_queries(2):
+        data = view.get_time_series_data('download-request-count', 'Y', ['created__year'], groups)
+
+    assert get_time_series(data, list(groups), ['2022', '2023']) == {
+        dataset.organization.pk: [3, 7],
+    }
+
+    assert PublicationStatsView().get_dataset_totals('download-request-count', [dataset.pk]) == [
+        (dataset.pk, 7),
+    ]
+
+    with django_assert_num_queries(1):
+        assert get_model_download_total('download-request-count', [dataset.pk]) == 7
+
+
+@pytest.mark.django_db
+def test_dataset_status_time_series_data():
+    dataset1 = DatasetFactory(status=Dataset.HAS_DATA)
+    dataset2 = DatasetFactory(status=Dataset.UNASSIGNED)
+    with freeze_time('2022-05-01'):
+        CommentFactory(
+            content_object=dataset1,
+            status=Comment.OPENED,
+        )
+
+    view = DatasetStatsView()
+    groups = {
+        Dataset.HAS_DATA: [dataset1.pk],
+        Dataset.UNASSIGNED: [dataset2.pk],
+    }
+    data = view.get_time_series_data('dataset-count', 'Y', ['created__year'], groups)
+    series = get_time_series(data, list(groups), ['2022', str(dataset2.created.year)])
+    assert series[Dataset.HAS_DATA][0] == 1
+    assert series[Dataset.UNASSIGNED][-1] == 1
+
+
+def _get_rollups(period):
+    return list(DatasetStatsRollup.objects.filter(period=period).order_by('dataset_id', 'created').values_list(
+        'dataset_id',
+        'created',
+        'object_count',
+        'maturity_level',
+        'maturity_level_count',
+    ))
+
+
+@pytest.mark.django_db
+def test_refresh_stats_rollups():
+    DatasetStats.objects.create(dataset_id=1, created=date(2022, 1, 1), object_count=1, maturity_level=2)
+    DatasetStats.objects.create(dataset_id=1, created=date(2022, 1, 2), object_count=2, maturity_level=4)
+    DatasetStats.objects.create(dataset_id=1, created=date(2022, 3, 1), object_count=3)
+    DatasetStats.objects.create(dataset_id=2, created=date(2023, 1, 1), object_count=4)
+
+    refresh_stats_rollups()
+
+    assert _get_rollups(StatsRollup.DAY) == [
+        (1, date(2022, 1, 1), 1, 2, 1),
+        (1, date(2022, 1, 2), 2, 4, 1),
+        (1, date(2022, 3, 1), 3, None, 0),
+        (2, date(2023, 1, 1), 4, None, 0),
+    ]
+    assert _get_rollups(StatsRollup.MONTH) == [
+        (1, date(2022, 1, 1), 3, 6, 2),
+        (1, date(2022, 3, 1), 3, None, 0),
+        (2, date(2023, 1, 1), 4, None, 0),
+    ]
+    assert _get_rollups(StatsRollup.YEAR) == [
+        (1, date(2022, 1, 1), 6, 6, 2),
+        (2, date(2023, 1, 1), 4, None, 0),
+    ]
+
+
+@pytest.mark.django_db
+def test_refresh_stats_rollups_incremental():
+    stats = DatasetStats.objects.create(dataset_id=1, created=date(2022, 1, 1), object_count=1)
+    DatasetStats.objects.create(dataset_id=1, created=date(2022, 2, 1), object_count=2)
+    DatasetStats.objects.create(dataset_id=2, created=date(2022, 1, 1), object_count=3)
+    refresh_stats_rollups()
+
+    stats.object_count = 10
+    stats.save()
+    DatasetStats.objects.create(dataset_id=1, created=date(2022, 1, 5), object_count=5)
+    DatasetStatsRollup.objects.filter(dataset_id=2).update(object_count=100)
+    refresh_stats_rollups()
+
+    assert _get_rollups(StatsRollup.MONTH) == [
+        (1, date(2022, 1, 1), 15, None, 0),
+        (1, date(2022, 2, 1), 2, None, 0),
+        # Not changed since last refresh, so rollups are left as they are.
+        (2, date(2022, 1, 1), 100, None, 0),
+    ]
+    assert _get_rollups(StatsRollup.YEAR) == [
+        (1, date(2022, 1, 1), 17, None, 0),
+        (2, date(2022, 1, 1), 100, None, 0),
+    ]
+
+    refresh_stats_rollups(full=True)
+    assert _get_rollups(StatsRollup.YEAR) == [
+        (1, date(2022, 1, 1), 17, None, 0),
+        (2, date(2022, 1, 1), 3, None, 0),
+    ]
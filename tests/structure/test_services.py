@@ -1,5 +1,13 @@
+import asyncio
+import json
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+import openpyxl
 import pytest
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_webtest import DjangoTestApp
 from factory.django import FileField
@@ -12,8 +20,10 @@ from vitrina.datasets.models import Dataset
 from vitrina.resources.factories import DatasetDistributionFactory, FileFormat
 from vitrina.resources.models import DatasetDistribution
 from vitrina.structure.models import Metadata, Prefix, Model, Property, PropertyList, Enum, Param, EnumItem, \
-    ParamItem, Base
-from vitrina.structure.services import create_structure_objects
+    ParamItem, Base, StructureImportJob
+from vitrina.structure.services import create_structure_objects, queue_structure_import, run_structure_import_job, \
+    datasets_to_tabular
+from vitrina.structure.services import get_data_from_spinta, get_data_from_spinta_async
 from vitrina.users.factories import UserFactory
 
 
@@ -474,6 +484,14 @@ def test_structure_with_denorm_prop(app: DjangoTestApp):
     assert props.filter(metadata__name='country.continent')[0].property.metadata.first().name == 'country'
     assert props.filter(metadata__name='country.id')[0].property.metadata.first().name == 'country'
     assert props.filter(metadata__name='country')[0].property is None
+    assert sorted(props.values_list('meta_name', flat=True)) == [
+        'country',
+        'country.continent',
+        'country.continent.id',
+        'country.id',
+        'id',
+        'title',
+    ]
 
 
 @pytest.mark.django_db
@@ -1955,6 +1973,105 @@ def test_structure_export__params(app: DjangoTestApp):
     )
 
 
+def _create_structure(props: int) -> Dataset:
+    manifest = (
+        'id,dataset,resource,base,model,property,type,ref,source,prepare,level,access,uri,title,description\n'
+        f',datasets/gov/ivpk/adp{props},,,,,,,,,,,,,\n'
+        ',,,,,,prefix,dct,,,,,http://purl.org/dc/terms/,,\n'
+        ',,resource,,,,,,http://www.example.com,,,,,,\n'
+        ',,,,Country,,,id,,,,,,,\n'
+    ) + ''.join(
+        f',,,,,p{i},string,,,,,open,,,\n'
+        for i in range(props)
+    ) + (
+        ',,,,,,enum,Size,,SMALL,,,,,\n'
+        ',,,,,,,,,BIG,,,,,\n'
+        ',,,,,continent,ref,Continent,,,,open,,,\n'
+        ',,,,Continent,,,id,,,,,,,\n'
+        ',,,,,id,integer,,,,,open,,,\n'
+    )
+    structure = DatasetStructureFactory(
+        file=FilerFileFactory(
+            file=FileField(filename='file.csv', data=manifest)
+        )
+    )
+    structure.dataset.current_structure = structure
+    structure.dataset.save()
+    create_structure_objects(structure)
+    return structure.dataset
+
+
+@pytest.mark.django_db
+def test_structure_export__query_count():
+    def count_queries(dataset):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(datasets_to_tabular(dataset))
+        return len(rows), len(ctx.captured_queries)
+
+    small = count_queries(_create_structure(2))
+    large = count_queries(_create_structure(20))
+    assert large[0] == small[0] + 18
+    assert large[1] == small[1]
+
+
+@pytest.mark.django_db
+def test_structure_export__cached(app: DjangoTestApp):
+    app.set_user(UserFactory(is_staff=True))
+    dataset = _create_structure(2)
+    url = reverse("dataset-structure-export", args=[dataset.pk])
+
+    resp = app.get(url)
+    etag = resp.headers['ETag']
+    assert 'p1,string' in resp.text
+    app.get(url, headers={'If-None-Match': etag}, status=304)
+
+    meta = Property.objects.get(metadata__name='p1').metadata.first()
+    meta.name = 'renamed'
+    meta.save()
+
+    resp = app.get(url, headers={'If-None-Match': etag})
+    assert resp.headers['ETag'] != etag
+    assert 'renamed,string' in resp.text
+
+
+@pytest.mark.django_db
+def test_structure_export__cached_ref_to_other_dataset(app: DjangoTestApp):
+    app.set_user(UserFactory(is_staff=True))
+    dataset = _create_structure(1)
+    other = _create_structure(2)
+    ref_prop = Property.objects.get(model__dataset=other, metadata__name='p0')
+    PropertyList.objects.create(
+        content_type=ContentType.objects.get_for_model(Property),
+        object_id=Property.objects.get(model__dataset=dataset, metadata__name='continent').pk,
+        property=ref_prop,
+        order=1,
+    )
+    url = reverse("dataset-structure-export", args=[dataset.pk])
+
+    resp = app.get(url)
+    etag = resp.headers['ETag']
+    assert 'Continent[p0]' in resp.text
+
+    meta = ref_prop.metadata.first()
+    meta.name = 'renamed'
+    meta.save()
+
+    resp = app.get(url, headers={'If-None-Match': etag})
+    assert resp.headers['ETag'] != etag
+    assert 'Continent[renamed]' in resp.text
+
+
+@pytest.mark.django_db
+def test_structure_export__xlsx(app: DjangoTestApp):
+    app.set_user(UserFactory(is_staff=True))
+    dataset = _create_structure(2)
+
+    resp = app.get(reverse("dataset-structure-export", args=[dataset.pk]), {'format': 'xlsx'})
+    assert resp.headers['Content-Disposition'] == 'attachment; filename=manifest.xlsx'
+    sheet = openpyxl.load_workbook(BytesIO(resp.body)).active
+    assert [cell.value for cell in next(sheet.iter_rows())][:5] == ['id', 'dataset', 'resource', 'base', 'model']
+
+
 @pytest.mark.django_db
 def test_import_structure_with_wrong_datasets_name(app: DjangoTestApp):
     manifest = (
@@ -1980,3 +2097,118 @@ def test_import_structure_with_wrong_datasets_name(app: DjangoTestApp):
     )
     assert comments.count() == 1
     assert 'kodiniame pavadinime gali būti naudojamos tik lotyniškos raidės.' in comments[0].body
+
+
+def _import_props_manifest(n: int):
+    manifest = (
+        'id,dataset,resource,base,model,property,type,ref,source,prepare,level,access,uri,title,description\n'
+        f',datasets/gov/ivpk/adp{n},,,,,,,,,,,,,\n'
+        ',,,,City,,,,,,,,,,\n'
+    ) + ''.join(
+        f',,,,,prop{i},string,,,,3,open,,,\n'
+        for i in range(n)
+    )
+    structure = DatasetStructureFactory(
+        file=FilerFileFactory(
+            file=FileField(filename='file.csv', data=manifest)
+        )
+    )
+    structure.dataset.current_structure = structure
+    structure.dataset.save()
+    return structure
+
+
+@pytest.mark.django_db
+def test_structure_import_queries_do_not_depend_on_property_count(app: DjangoTestApp):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    counts = []
+    for n in (2, 20):
+        structure = _import_props_manifest(n)
+        create_structure_objects(structure)
+        # Second import updates existing properties.
+        with CaptureQueriesContext(connection) as queries:
+            create_structure_objects(structure)
+        counts.append(len(queries))
+
+        props = Property.objects.filter(model__dataset=structure.dataset)
+        assert props.count() == n
+        assert set(Metadata.objects.filter(
+            content_type=ContentType.objects.get_for_model(Property),
+            object_id__in=props.values_list('pk', flat=True),
+        ).values_list('version', flat=True)) == {2}
+
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_run_structure_import_job(app: DjangoTestApp):
+    structure = _import_props_manifest(3)
+    user = UserFactory()
+    job = queue_structure_import(structure, user)
+    assert job.status == StructureImportJob.QUEUED
+
+    assert run_structure_import_job() == job
+    job.refresh_from_db()
+    assert job.status == StructureImportJob.DONE
+    assert job.started is not None
+    assert job.finished is not None
+    assert job.error == ''
+    assert job.progress == {
+        'datasets': {'done': 1, 'total': 1},
+        'models': {'done': 1, 'total': 1},
+        'properties': {'done': 3, 'total': 3},
+    }
+    assert Property.objects.filter(model__dataset=structure.dataset).count() == 3
+
+    # Nothing left in the queue.
+    assert run_structure_import_job() is None
+
+
+@pytest.mark.django_db
+def test_run_structure_import_job_with_errors(app: DjangoTestApp, caplog):
+    structure = _import_props_manifest(3)
+    job = queue_structure_import(structure)
+
+    with patch('vitrina.structure.services._load_datasets', side_effect=ValueError('Boom')):
+        run_structure_import_job()
+    job.refresh_from_db()
+    assert job.status == StructureImportJob.FAILED
+    assert job.error.startswith('Struktūros importuoti nepavyko.')
+    assert 'Boom' not in job.error
+    assert 'ValueError: Boom' in caplog.text
+    assert Property.objects.filter(model__dataset=structure.dataset).count() == 0
+
+
+def test_get_data_from_spinta_is_cached():
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
+        mock_get.return_value = Mock(content=json.dumps({'_data': [{'count()': 1}]}))
+        assert get_data_from_spinta('datasets/gov/Model', query='count()') == {'_data': [{'count()': 1}]}
+        assert get_data_from_spinta('datasets/gov/Model', query='count()') == {'_data': [{'count()': 1}]}
+        assert mock_get.call_count == 1
+
+
+def test_get_data_from_spinta_errors_are_not_cached():
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
+        mock_get.return_value = Mock(content=b'not json')
+        assert 'errors' in get_data_from_spinta('datasets/gov/Model')
+        assert 'errors' in get_data_from_spinta('datasets/gov/Model')
+        assert mock_get.call_count == 2
+
+
+def test_get_data_from_spinta_async():
+    def get(url, timeout):
+        return Mock(content=json.dumps({'url': url}))
+
+    async def fetch():
+        return await asyncio.gather(
+            get_data_from_spinta_async('datasets/gov/Model', query='count()'),
+            get_data_from_spinta_async('datasets/gov/Model', uuid='abc'),
+        )
+
+    with patch('vitrina.structure.services.spinta_session.get', side_effect=get):
+        assert [data['url'].split('/', 3)[-1] for data in asyncio.run(fetch())] == [
+            'datasets/gov/Model/?count()',
+            'datasets/gov/Model/abc/?',
+        ]
@@ -4,6 +4,8 @@ import uuid
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_webtest import DjangoTestApp
 from unittest.mock import Mock, patch
@@ -23,8 +25,8 @@ from vitrina.resources.factories import DatasetDistributionFactory
 from vitrina.settings import SPINTA_SERVER_URL
 from vitrina.structure.factories import ModelFactory, MetadataFactory, PropertyFactory, EnumFactory, EnumItemFactory, \
     PrefixFactory, ParamItemFactory, ParamFactory, BaseFactory, VersionFactory
-from vitrina.structure.models import Metadata, Enum, EnumItem, Param
-from vitrina.structure.services import create_structure_objects
+from vitrina.structure.models import Metadata, Enum, EnumItem, Param, Model
+from vitrina.structure.services import create_structure_objects, queue_structure_import, run_structure_import_job
 from vitrina.users.factories import UserFactory
 from vitrina.structure.models import Version as _Version
 
@@ -341,6 +343,82 @@ def test_object_data(app: DjangoTestApp):
     }
 
 
+def _create_models(dataset, n: int):
+    for i in range(n):
+        model = ModelFactory(dataset=dataset)
+        MetadataFactory(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=model.pk,
+            dataset=dataset,
+            name=f"test/dataset/Model{i}",
+        )
+        prop = PropertyFactory(model=model)
+        MetadataFactory(
+            content_type=ContentType.objects.get_for_model(prop),
+            object_id=prop.pk,
+            dataset=dataset,
+            name='prop',
+            access=Metadata.PUBLIC,
+        )
+
+
+@pytest.mark.django_db
+def test_model_metadata_fields():
+    model = ModelFactory()
+    metadata = MetadataFactory(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=model.pk,
+        dataset=model.dataset,
+        name="test/dataset/TestModel",
+        title="Test model",
+        order=2,
+    )
+    model.refresh_from_db()
+    assert (model.meta_name, model.meta_short_name, model.meta_title, model.meta_order) == (
+        "test/dataset/TestModel", "TestModel", "Test model", 2,
+    )
+
+    metadata.name = "test/dataset/Renamed"
+    metadata.save()
+    assert Model.objects.get(dataset=model.dataset, meta_short_name="Renamed") == model
+
+    metadata.delete()
+    model.refresh_from_db()
+    assert model.meta_name == ''
+    assert model.name == ''
+
+
+@pytest.mark.django_db
+def test_metadata_fields_are_not_overwritten_by_stale_instance():
+    model = ModelFactory()
+    stale = Model.objects.get(pk=model.pk)
+    MetadataFactory(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=model.pk,
+        dataset=model.dataset,
+        name="test/dataset/TestModel",
+    )
+    stale.save()
+    model.refresh_from_db()
+    assert model.meta_name == "test/dataset/TestModel"
+
+
+@pytest.mark.django_db
+def test_dataset_structure_query_count(app: DjangoTestApp):
+    app.set_user(UserFactory(is_staff=True))
+
+    def count_queries(n):
+        dataset = DatasetFactory()
+        _create_models(dataset, n)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = app.get(reverse('dataset-structure', args=[dataset.pk]))
+        assert len(resp.context['models']) == n
+        return len(ctx.captured_queries)
+
+    count_queries(1)
+    assert count_queries(2) == count_queries(6)
+
+
 @pytest.mark.django_db
 def test_structure_tab_from_dataset_detail(app: DjangoTestApp):
     model = ModelFactory()
@@ -847,7 +925,7 @@ def test_getall(app: DjangoTestApp):
         type='integer'
     )
 
-    with patch('vitrina.structure.services.requests.get') as mock_get:
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
         data = {
             '_data': [
                 {
@@ -930,7 +1008,7 @@ def test_getall_with_query(app: DjangoTestApp):
         type='integer'
     )
 
-    with patch('vitrina.structure.services.requests.get') as mock_get:
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
         data = {
             '_data': [
                 {
@@ -1014,7 +1092,7 @@ def test_getone(app: DjangoTestApp):
         type='integer'
     )
 
-    with patch('vitrina.structure.services.requests.get') as mock_get:
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
         data = {
             '_id': 'c7d66fa2-a880-443d-8ab5-2ab7f9c79886',
             'prop_1': "test 1",
@@ -1089,7 +1167,7 @@ def test_changes(app: DjangoTestApp):
         type='integer'
     )
 
-    with patch('vitrina.structure.services.requests.get') as mock_get:
+    with patch('vitrina.structure.services.spinta_session.get') as mock_get:
         data = {
             '_data': [
                 {
@@ -3182,3 +3260,43 @@ def test_api_with_non_public_dataset_with_access(app: DjangoTestApp):
     app.set_user(user)
     response = app.get(reverse('getall-api', args=[dataset.pk, model.name]))
     assert response.context['model'] == model
+
+
+@pytest.mark.django_db
+def test_structure_import_job_status(app: DjangoTestApp):
+    structure = DatasetStructureFactory(
+        file=FilerFileFactory(
+            file=FileField(filename='file.csv', data=(
+                'id,dataset,resource,base,model,property,type,ref,source,prepare,level,access,uri,title,description\n'
+                ',datasets/gov/ivpk/adp,,,,,,,,,,,,,\n'
+                ',,,,City,,,,,,,,,,\n'
+                ',,,,,name,string,,,,3,open,,,\n'
+            ))
+        )
+    )
+    structure.dataset.current_structure = structure
+    structure.dataset.save()
+    job = queue_structure_import(structure)
+    url = reverse('structure-import-job', args=[structure.dataset.pk, job.pk])
+
+    resp = app.get(url, expect_errors=True)
+    assert resp.status_code == 302
+
+    app.set_user(UserFactory(is_staff=True))
+    resp = app.get(url)
+    assert resp.json == {'status': 'queued', 'progress': {}, 'error': ''}
+
+    run_structure_import_job()
+    resp = app.get(url)
+    assert resp.json == {
+        'status': 'done',
+        'progress': {
+            'datasets': {'done': 1, 'total': 1},
+            'models': {'done': 1, 'total': 1},
+            'properties': {'done': 1, 'total': 1},
+        },
+        'error': '',
+    }
+
+    resp = app.get(reverse('structure-import-job', args=[DatasetFactory().pk, job.pk]), expect_errors=True)
+    assert resp.status_code == 404
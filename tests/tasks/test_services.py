@@ -2,11 +2,13 @@ import pytest
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.datasets.models import Dataset
 from vitrina.orgs.factories import OrganizationFactory, RepresentativeFactory
 from vitrina.orgs.models import Representative
 from vitrina.tasks.factories import TaskFactory
 from vitrina.tasks.models import Task
-from vitrina.tasks.services import get_active_tasks
+from vitrina.tasks.services import get_active_tasks, sync_dataset_tasks
 from vitrina.users.factories import UserFactory
 
 
@@ -228,3 +230,30 @@ def test_get_active_tasks_with_staff_after_10_work_days():
         task_for_child_organization1,
         task_for_child_organization2
     ]
+
+
+@pytest.mark.django_db
+def test_sync_dataset_tasks(django_assert_num_queries):
+    broken, fixed, other = DatasetFactory.create_batch(3)
+    content_type = ContentType.objects.get_for_model(Dataset)
+    for dataset in (broken, fixed):
+        Task.objects.create(
+            content_type=content_type,
+            object_id=dataset.pk,
+            type=Task.ERROR_DISTRIBUTION,
+            title='Klaida',
+        )
+
+    with django_assert_num_queries(3):
+        assert sync_dataset_tasks(Task.ERROR_DISTRIBUTION, {
+            broken: ('Klaida', 'Neveikia'),
+            other: ('Klaida', 'Neveikia'),
+        }, [fixed.pk]) == (1, 1)
+
+    tasks = Task.objects.filter(type=Task.ERROR_DISTRIBUTION).order_by('object_id')
+    assert [(t.object_id, t.status) for t in tasks] == [
+        (broken.pk, Task.CREATED),
+        (fixed.pk, Task.COMPLETED),
+        (other.pk, Task.CREATED),
+    ]
+    assert tasks.get(object_id=other.pk).organization == other.organization
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from vitrina.cache import CacheNamespace, load_namespaces
+
+
+def test_namespace_get_set():
+    ns = CacheNamespace('test-get-set')
+    assert ns.get('a') is None
+    assert ns.get('a', 0) == 0
+    ns.set('a', None)
+    assert ns.get('a', 0) is None
+    ns.set_many({'b': 2, 'c': 3})
+    assert ns.get_many(['a', 'b', 'd']) == {'a': None, 'b': 2}
+    ns.delete_many(['a', 'b'])
+    assert ns.get_many(['a', 'b', 'c']) == {'c': 3}
+
+
+@pytest.mark.django_db
+def test_namespace_invalidate():
+    ns = CacheNamespace('test-invalidate', versioned=True)
+    ns.set('a', 1)
+    ns.scope(1).set('a', 2)
+    ns.scope(2).set('a', 3)
+
+    ns.scope(1).invalidate()
+    assert ns.get('a') == 1
+    assert ns.scope(1).get('a') is None
+    assert ns.scope(2).get('a') == 3
+
+    ns.invalidate()
+    assert ns.get('a') is None
+
+
+def test_namespace_get_or_set():
+    ns = CacheNamespace('test-get-or-set')
+    calls = []
+
+    def build():
+        calls.append(1)
+        return len(calls)
+
+    assert ns.get_or_set('a', build) == 1
+    assert ns.get_or_set('a', build) == 1
+    assert len(calls) == 1
+
+
+def test_namespace_early_refresh(settings):
+    settings.CACHE_STATS = True
+    ns = CacheNamespace('test-early-refresh', 10, early_refresh=0.5)
+    ns.reset_stats()
+    ns.set('a', 1)
+    assert ns.get_or_set('a', lambda: 2) == 1
+
+    # Value, that is about to expire, is refreshed by one process only, others
+    # are still served the old value.
+    ns.cache.set(ns.key('a'), (1, time.time() - 1), 10)
+    with ns.lock('a', wait=False) as locked:
+        assert locked
+        assert ns.get_or_set('a', lambda: 2) == 1
+    assert ns.get_or_set('a', lambda: 3) == 3
+    assert ns.get_or_set('a', lambda: 4) == 3
+    assert ns.get_stats() == {'hits': 3, 'misses': 0, 'refreshes': 1}
+
+
+def test_namespace_lock():
+    ns = CacheNamespace('test-lock')
+    with ns.lock('a') as locked:
+        assert locked
+        with ns.lock('a', wait=False) as locked_again:
+            assert not locked_again
+    with ns.lock('a', wait=False) as locked:
+        assert locked
+
+
+def test_namespace_stats_are_shared_by_scopes(settings):
+    settings.CACHE_STATS = True
+    ns = CacheNamespace('test-stats')
+    ns.reset_stats()
+    ns.get('a')
+    ns.scope(1).set('a', 1)
+    ns.scope(1).get('a')
+    ns.scope(2).get_or_set('a', lambda: 2)
+    assert ns.get_stats() == {'hits': 1, 'misses': 2, 'refreshes': 0}
+
+
+def test_namespace_keys_are_valid_memcached_keys():
+    ns = CacheNamespace('test-keys')
+    key = ns.key('datasets/gov/Model/?select(a, b)&' + 'x' * 300)
+    assert len(key) < 250
+    assert ' ' not in key
+
+
+def test_load_namespaces():
+    namespaces = load_namespaces()
+    assert {'api-key', 'dcat', 'spinta-count', 'structure-export', 'user-roles'} <= set(namespaces)
@@ -2,9 +2,16 @@ from unittest.mock import Mock
 
 import pytest
 from django.test import RequestFactory
+from django.utils import translation
 
-from vitrina.helpers import get_selected_value, get_filter_url
+from vitrina.datasets.factories import DatasetGroupFactory
+from vitrina.datasets.models import DatasetGroup
+from vitrina.helpers import get_facet_labels, get_selected_value, get_filter_url
+from vitrina.orgs.factories import OrganizationFactory
+from vitrina.orgs.models import Organization
 from vitrina.helpers import prepare_email_by_identifier
+from vitrina.helpers import invalidate_email_templates, render_email
+from vitrina.messages.models import EmailTemplate
 
 
 @pytest.mark.django_db
@@ -62,3 +69,66 @@ def test_get_filter_url_with_page(rf: RequestFactory):
     filter_url = get_filter_url(request, 'key', 'value')
     assert filter_url == "?selected_facets=key_exact%3Avalue"
 
+
+
+@pytest.mark.django_db
+def test_get_facet_labels(django_assert_num_queries):
+    org1 = OrganizationFactory(title='Org 1')
+    org2 = OrganizationFactory(title='Org 2')
+    values = [str(org1.pk), str(org2.pk), '-1']
+    with django_assert_num_queries(1):
+        assert get_facet_labels(Organization, values) == {
+            str(org1.pk): 'Org 1',
+            str(org2.pk): 'Org 2',
+        }
+    with django_assert_num_queries(0):
+        assert get_facet_labels(Organization, values)[str(org1.pk)] == 'Org 1'
+
+    org1.title = 'Changed'
+    org1.save()
+    assert get_facet_labels(Organization, values)[str(org1.pk)] == 'Changed'
+
+
+@pytest.mark.django_db
+def test_get_facet_labels_translated():
+    group = DatasetGroupFactory()
+    group.set_current_language('lt')
+    group.title = 'Grupė'
+    group.set_current_language('en')
+    group.title = 'Group'
+    group.save()
+    with translation.override('lt'):
+        assert get_facet_labels(DatasetGroup, [group.pk]) == {str(group.pk): 'Grupė'}
+    with translation.override('en'):
+        assert get_facet_labels(DatasetGroup, [group.pk]) == {str(group.pk): 'Group'}
+
+
+EMAIL_TEMPLATE = 'vitrina/datasets/emails/sub/updated.md'
+
+
+@pytest.mark.django_db
+def test_render_email_compiles_template_once(django_assert_num_queries):
+    invalidate_email_templates()
+    context = {'title': 'Duomenys', 'link': 'http://localhost/'}
+    subject, content, html_message = render_email('test-updated', EMAIL_TEMPLATE, context)
+    assert subject == 'Pakeistas duomenų rinkinys: Duomenys'
+    assert '<a href="http://localhost/">Duomenys</a>' in html_message
+    assert EmailTemplate.objects.filter(identifier='test-updated').count() == 1
+
+    # Template is recompiled once from the saved EmailTemplate.
+    render_email('test-updated', EMAIL_TEMPLATE, context)
+    with django_assert_num_queries(0):
+        assert render_email('test-updated', EMAIL_TEMPLATE, context) == (subject, content, html_message)
+    assert EmailTemplate.objects.filter(identifier='test-updated').count() == 1
+
+
+@pytest.mark.django_db
+def test_render_email_after_template_is_changed():
+    invalidate_email_templates()
+    render_email('test-updated', EMAIL_TEMPLATE, {'title': 'Duomenys'})
+    template = EmailTemplate.objects.get(identifier='test-updated')
+    template.subject = 'Atnaujinta: {{title}}'
+    template.save()
+    subject, content, html_message = render_email('test-updated', EMAIL_TEMPLATE, {'title': 'Duomenys'})
+    assert subject == 'Atnaujinta: Duomenys'
+
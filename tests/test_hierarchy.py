@@ -0,0 +1,63 @@
+import pytest
+
+from vitrina.classifiers.factories import CategoryFactory
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.hierarchy import get_ancestors, get_ancestors_with_datasets, get_children_count, get_descendants, \
+    get_root, get_root_with_children
+from vitrina.orgs.factories import OrganizationFactory
+
+
+def _add_child(parent, name):
+    return parent.add_child(title=name, name=name, kind='org', version=1)
+
+
+@pytest.mark.django_db
+def test_organization_hierarchy(django_assert_num_queries):
+    root = OrganizationFactory()
+    child = _add_child(root, 'child')
+    grandchild = _add_child(child, 'grandchild')
+    other = OrganizationFactory()
+    # Sorted inserts can change paths of other nodes.
+    for node in (root, child, grandchild):
+        node.refresh_from_db()
+
+    assert get_root(grandchild) == root
+    with django_assert_num_queries(0):
+        assert get_root(grandchild) == root
+        assert get_ancestors(grandchild) == [root, child]
+        assert get_descendants(root) == [child, grandchild]
+        assert get_descendants(other) == []
+        assert get_children_count(root) == 1
+        assert get_root_with_children(grandchild) == root
+        assert get_root_with_children(other) is None
+
+
+@pytest.mark.django_db
+def test_organization_hierarchy_is_updated():
+    root = OrganizationFactory()
+    child = _add_child(root, 'child')
+    other = OrganizationFactory()
+    # Sorted inserts can change paths of other nodes.
+    root.refresh_from_db()
+    child.refresh_from_db()
+    assert get_root(child) == root
+
+    child.move(other, 'sorted-child')
+    root.refresh_from_db()
+    child.refresh_from_db()
+    assert get_root(child) == other
+    assert get_descendants(root) == []
+
+    _add_child(root, 'new')
+    assert get_children_count(root) == 1
+
+
+@pytest.mark.django_db
+def test_category_ancestors_with_datasets():
+    parent = CategoryFactory(title='parent')
+    child = parent.add_child(title='child', version=1, featured=False)
+    grandchild = child.add_child(title='grandchild', version=1, featured=False)
+    assert get_ancestors_with_datasets(grandchild) == []
+
+    DatasetFactory().category.add(parent)
+    assert get_ancestors_with_datasets(grandchild) == [parent]
@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from vitrina.classifiers.factories import CategoryFactory
+from vitrina.datasets.factories import DatasetFactory
+from vitrina.landing import get_aggregate, invalidate_aggregates, refresh_aggregates
+
+
+@pytest.mark.django_db
+def test_counts_are_cached(django_assert_num_queries):
+    invalidate_aggregates('counts')
+    DatasetFactory()
+    assert get_aggregate('counts')['dataset'] == 1
+    with django_assert_num_queries(0):
+        assert get_aggregate('counts')['dataset'] == 1
+
+    DatasetFactory()
+    assert get_aggregate('counts')['dataset'] == 2
+
+
+@pytest.mark.django_db
+def test_featured_categories_are_refreshed(django_assert_num_queries):
+    category = CategoryFactory(featured=True)
+    refresh_aggregates()
+    with django_assert_num_queries(0):
+        assert get_aggregate('categories') == [category]
+        assert get_aggregate('menu') == []
+        assert get_aggregate('deployment') is None
+
+    category.featured = False
+    category.save()
+    assert get_aggregate('categories') == []
+
+
+@pytest.mark.django_db
+def test_home_is_served_from_cache(app):
+    DatasetFactory()
+    app.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        resp = app.get('/')
+    assert resp.context['counts']['dataset'] == 1
+    sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+    assert 'DISTINCT ON' not in sql
+    assert '"deployment"' not in sql
+    assert '"cms_page"' not in sql
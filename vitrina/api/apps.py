@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     name = 'vitrina.api'
     label = 'vitrina_api'
+
+    def ready(self):
+        import vitrina.api.signals
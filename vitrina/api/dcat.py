@@ -0,0 +1,93 @@
+import datetime
+import time
+from typing import Dict, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.template.loader import get_template, render_to_string
+
+from vitrina.api.helpers import get_datasets_for_rdf
+from vitrina.cache import CacheNamespace
+from vitrina.datasets.models import Dataset
+
+DCAT_PAGE_SIZE = 1000
+DCAT_BATCH_SIZE = 100
+
+# Rendered datasets are dropped when a dataset or its distributions change,
+# and all of them, when shared classifiers or organizations change, see
+# vitrina/signals.py.
+DCAT_CACHE_TIMEOUT = 86400
+
+dcat_cache = CacheNamespace('dcat', DCAT_CACHE_TIMEOUT, versioned=True)
+
+DCAT_RDF_FOOTER = '</rdf:RDF>\n'
+
+
+def get_dcat_datasets(
+    since: Optional[datetime.datetime] = None,
+    page: Optional[int] = None,
+) -> List[int]:
+    qs = Dataset.public.all()
+    if since:
+        qs = qs.filter(modified__gte=since)
+    qs = qs.order_by('published', 'pk').values_list('pk', flat=True)
+    if page:
+        qs = qs[(page - 1) * DCAT_PAGE_SIZE:page * DCAT_PAGE_SIZE]
+    return list(qs)
+
+
+def get_dcat_version() -> int:
+    # Changes when any of exported datasets change, used as an ETag.
+    return dcat_cache.get_or_set('changed', time.time_ns, None)
+
+
+def render_dcat_rdf(datasets: List[int], domain: str) -> Iterator[str]:
+    yield render_to_string('vitrina/api/edp/dcat_ap_rdf_header.html', {
+        'current_domain_full': domain,
+    })
+    for start in range(0, len(datasets), DCAT_BATCH_SIZE):
+        yield from _render_datasets(datasets[start:start + DCAT_BATCH_SIZE], domain)
+    yield DCAT_RDF_FOOTER
+
+
+def _render_datasets(datasets: List[int], domain: str) -> Iterator[str]:
+    # Each dataset is cached as {domain: rdf}, so that a dataset can be
+    # dropped from cache without knowing all domains it was rendered for.
+    cached = dcat_cache.get_many(datasets)
+    missing = [pk for pk in datasets if domain not in cached.get(pk, {})]
+    if missing:
+        rendered = _render_missing(Dataset.objects.filter(pk__in=missing), domain)
+        dcat_cache.set_many({
+            pk: {**cached.get(pk, {}), domain: rdf}
+            for pk, rdf in rendered.items()
+        })
+        for pk, rdf in rendered.items():
+            cached.setdefault(pk, {})[domain] = rdf
+    for pk in datasets:
+        if pk in cached and domain in cached[pk]:
+            yield cached[pk][domain]
+
+
+def _render_missing(qs: QuerySet, domain: str) -> Dict[int, str]:
+    template = get_template('vitrina/api/edp/dcat_ap_rdf_dataset.html')
+    return {
+        dataset['pk']: template.render({
+            'dataset': dataset,
+            'current_domain_full': domain,
+        })
+        for dataset in get_datasets_for_rdf(qs)
+    }
+
+
+def invalidate_dcat_datasets(*datasets: int) -> None:
+    def invalidate():
+        dcat_cache.delete_many([*datasets, 'changed'])
+
+    # Other processes could render datasets again before the change is
+    # committed, so they are dropped once more after commit.
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def invalidate_dcat() -> None:
+    dcat_cache.invalidate()
@@ -1,6 +1,11 @@
-from typing import Optional
+import datetime
+from typing import Optional, Set
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from vitrina.datasets.models import Dataset
+from vitrina.hierarchy import get_root
 from vitrina.resources.models import DatasetDistribution as Distribution
 from vitrina.resources.models import Format
 from vitrina.resources.models import FormatName
@@ -9,16 +14,37 @@ from vitrina.classifiers.models import Frequency
 from vitrina.classifiers.models import Licence
 
 
+def parse_since(value: str) -> datetime.datetime:
+    # Raises ValueError if value is not a date or a datetime.
+    if since := parse_datetime(value):
+        return since if timezone.is_aware(since) else timezone.make_aware(since)
+    if since := parse_date(value):
+        return timezone.make_aware(datetime.datetime.combine(since, datetime.time()))
+    raise ValueError(f"Invalid date: {value!r}.")
+
+
+HVD_GROUP_TITLE = "Didelės vertės rinkiniai"
+
+
 def get_datasets_for_rdf(qs):
+    # Everything is prefetched, so a batch of datasets is loaded with a fixed
+    # number of queries.
+    hvd_categories = set(
+        Category.objects.
+        filter(groups__translations__title=HVD_GROUP_TITLE).
+        values_list('pk', flat=True)
+    )
     datasets = (
         qs.
         select_related('organization').
         select_related('licence').
+        select_related('frequency').
         prefetch_related('category').
         prefetch_related('translations').
+        prefetch_related('tags').
         prefetch_related('datasetdistribution_set').
         prefetch_related('datasetdistribution_set__format').
-        order_by('published')
+        order_by('published', 'pk')
     )
     for dataset in datasets:
         distributions = [
@@ -27,6 +53,7 @@ def get_datasets_for_rdf(qs):
         ]
 
         yield {
+            'pk': dataset.pk,
             'uri': dataset.get_absolute_url(),
             'translations': (
                 {
@@ -34,14 +61,13 @@ def get_datasets_for_rdf(qs):
                     'title': t.title,
                     'description': t.description,
                 }
-                for t in dataset.translations.order_by('language_code')
+                for t in sorted(dataset.translations.all(), key=lambda t: t.language_code)
             ),
-            'categories': _get_categories(dataset),
+            'categories': _get_categories(dataset, hvd_categories),
             'hvd_categories': [
                 _get_category(c)
-                for c in dataset.category.filter(
-                    groups__translations__title="Didelės vertės rinkiniai"
-                )
+                for c in dataset.category.all()
+                if c.pk in hvd_categories
             ],
             'keywords': [
                 k.name
@@ -89,13 +115,13 @@ def _get_distribution(dataset: Dataset, dist: Distribution):
     }
 
 
-def _get_categories(dataset):
+def _get_categories(dataset, hvd_categories: Set[int]):
     categories = []
 
-    for c in dataset.category.exclude(
-        groups__translations__title="Didelės vertės rinkiniai"
-    ):
-        root_category = c.get_root()
+    for c in dataset.category.all():
+        if c.pk in hvd_categories:
+            continue
+        root_category = get_root(c)
         if root_category not in categories:
             categories.append(root_category)
 
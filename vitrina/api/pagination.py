@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PartnerCursorPagination(CursorPagination):
+    # Lists are paginated only if clients ask for it with ?cursor or
+    # ?page_size, existing clients still get plain lists.
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_query_param not in request.query_params and
+            self.page_size_query_param not in request.query_params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
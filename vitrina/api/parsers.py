@@ -0,0 +1,22 @@
+import gzip
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class JSONLinesParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        if request is not None and request.META.get('HTTP_CONTENT_ENCODING') == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream)
+        try:
+            return [
+                json.loads(line)
+                for line in stream
+                if line.strip()
+            ]
+        except (OSError, EOFError, ValueError) as exc:
+            raise ParseError('JSON lines parse error - %s' % str(exc))
@@ -10,7 +10,9 @@ class APIKeyPermission(BasePermission):
 
     def has_permission(self, request: HttpRequest, view: View):
         organization, user = get_api_key_organization_and_user(request)
-        if organization and user:
+        # Organization and user are loaded lazily, so they are not evaluated
+        # here.
+        if organization is not None and user is not None:
             view.organization = organization
             view.user = user
             return True
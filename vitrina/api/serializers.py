@@ -57,7 +57,27 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['description', 'id', 'title']
 
 
-class DatasetSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    # Only fields listed in ?fields=a,b are returned.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        fields = request.query_params.get('fields')
+        if not fields:
+            return
+        fields = {name.strip() for name in fields.split(',') if name.strip()}
+        if unknown := fields - set(self.fields):
+            raise serializers.ValidationError({
+                'fields': [f"Unknown fields: {', '.join(sorted(unknown))}."],
+            })
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+
+class DatasetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created = serializers.DateTimeField(required=False, label="")
     id = serializers.CharField(required=False, allow_blank=True, label="")
     origin = serializers.CharField(required=False, allow_blank=True, label="")
@@ -313,7 +333,7 @@ class PatchDatasetSerializer(PostDatasetSerializer):
         return instance
 
 
-class DatasetDistributionSerializer(serializers.ModelSerializer):
+class DatasetDistributionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     description = serializers.CharField(required=False, allow_blank=True, label="")
     file = serializers.CharField(required=False, label="", allow_blank=True, source="filename_without_path")
     id = serializers.IntegerField(required=False, label="")
@@ -604,7 +624,7 @@ class PatchDatasetDistributionSerializer(DatasetDistributionSerializer):
         return instance
 
 
-class DatasetStructureSerializer(serializers.ModelSerializer):
+class DatasetStructureSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created = serializers.DateTimeField(required=False, label="")
     id = serializers.IntegerField(required=False, label="")
     size = serializers.IntegerField(required=False, label="file_size")
@@ -674,6 +694,13 @@ class PostDatasetStructureSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ModelDownloadStatsListSerializer(serializers.ListSerializer):
+
+    def run_child_validation(self, data):
+        self.child.initial_data = data
+        return super().run_child_validation(data)
+
+
 class ModelDownloadStatsSerializer(serializers.Serializer):
     source = serializers.CharField(required=True, allow_blank=False, label="")
     model = serializers.CharField(required=True, allow_blank=False, label="")
@@ -682,6 +709,9 @@ class ModelDownloadStatsSerializer(serializers.Serializer):
     requests = serializers.IntegerField(required=True, allow_null=False, label="", source="model_requests")
     objects = serializers.IntegerField(required=True, allow_null=False, label="", source="model_objects")
 
+    class Meta:
+        list_serializer_class = ModelDownloadStatsListSerializer
+
     def create(self, validated_data):
         return ModelDownloadStats(id=None, **validated_data)
 
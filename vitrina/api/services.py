@@ -1,23 +1,31 @@
+import hashlib
 import json
-from datetime import datetime
+from typing import Any, Dict, Optional, Type
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
 import requests
-from django.core.cache import cache
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
 from vitrina.api.models import ApiKey
 from vitrina.api.exceptions import DuplicateAPIKeyException
+from vitrina.cache import CacheNamespace
 from vitrina.datasets.models import Dataset
 from vitrina.helpers import get_current_domain
-from vitrina.orgs.models import Organization
+from vitrina.orgs.models import Organization, Representative
 from vitrina.orgs.services import hash_api_key
 from vitrina.settings import SPINTA_SERVER_CLIENT_SECRET, SPINTA_SERVER_CLIENT_ID, SPINTA_SERVER_URL
 from vitrina.users.models import User
 
 
+api_key_cache = CacheNamespace('api-key', settings.API_KEY_CACHE_TIMEOUT)
+spinta_auth_cache = CacheNamespace('spinta-auth', None)
+
+
 def get_api_key_organization_and_user(
     request: HttpRequest,
     raise_error: bool = True
@@ -39,55 +47,133 @@ def get_api_key_organization_and_user(
                     )
                     raise DuplicateAPIKeyException(url=url)
             else:
-                hashed_key = hash_api_key(api_key)
-                api_key_obj = (
-                    ApiKey.objects.
-                    filter(
-                        api_key=hashed_key,
-                    ).first()
-                )
-                if api_key_obj and api_key_obj.enabled and (
-                    not api_key_obj.expires or
-                    api_key_obj.expires > timezone.make_aware(datetime.now())
+                api_key_auth = get_api_key_auth(api_key)
+                if api_key_auth and api_key_auth['enabled'] and (
+                    not api_key_auth['expires'] or
+                    api_key_auth['expires'] > timezone.now()
                 ):
-                    if isinstance(api_key_obj.representative.content_object, Organization):
-                        organization = api_key_obj.representative.content_object
-                    elif isinstance(api_key_obj.representative.content_object, Dataset):
-                        organization = api_key_obj.representative.content_object.organization
-                    user = api_key_obj.representative.user
+                    organization = _get_lazy(Organization, api_key_auth['organization_id'])
+                    user = _get_lazy(User, api_key_auth['user_id'])
     return organization, user
 
 
-def is_duplicate_key(api_key: str) -> (Organization, bool):
-    duplicate_keys = (
-        ApiKey.objects
-        .filter(
-            api_key__contains=api_key,
-            api_key__startswith=ApiKey.DUPLICATE,
-            enabled=False
-        )
+def _get_lazy(model: Type[Model], pk: Optional[int]) -> Optional[Model]:
+    # Cached key costs no queries, objects are loaded only where they are used.
+    # Keys are dropped from cache when their representative is deleted,
+    # together with its organization or user, so pk is not stale.
+    if pk is None:
+        return None
+    return SimpleLazyObject(lambda: model.objects.filter(pk=pk).first())
+
+
+def get_api_key_auth(api_key: str) -> Optional[Dict[str, Any]]:
+    # Hashing an API key is slow on purpose, so hashes are cached by a fast
+    # digest of the key.
+    digest = hashlib.sha256(api_key.encode()).hexdigest()
+    hashed_key = api_key_cache.get_or_set(f'hash:{digest}', lambda: hash_api_key(api_key))
+    api_key_auth = api_key_cache.get_or_set(
+        get_api_key_cache_key(hashed_key),
+        lambda: _load_api_key_auth(hashed_key),
     )
-    if duplicate_keys:
-        organization = duplicate_keys.first().representative.content_object
+    return api_key_auth or None
+
+
+def _load_api_key_auth(hashed_key: str) -> Dict[str, Any]:
+    # Unknown keys are cached too, as an empty dict.
+    api_key_auth = {}
+    api_key_obj = (
+        ApiKey.objects.
+        select_related('representative').
+        filter(
+            api_key=hashed_key,
+        ).first()
+    )
+    if api_key_obj and api_key_obj.representative:
+        api_key_auth = {
+            'organization_id': get_representative_organization_id(api_key_obj.representative),
+            'user_id': api_key_obj.representative.user_id,
+            'expires': api_key_obj.expires,
+            'enabled': api_key_obj.enabled,
+        }
+    return api_key_auth
+
+
+def get_api_key_cache_key(hashed_key: str) -> str:
+    return f'auth:{hashlib.sha256(hashed_key.encode()).hexdigest()}'
+
+
+def get_representative_organization_id(representative: Representative) -> Optional[int]:
+    if isinstance(representative.content_object, Organization):
+        return representative.content_object.pk
+    elif isinstance(representative.content_object, Dataset):
+        return representative.content_object.organization_id
+    return None
+
+
+def is_duplicate_key(api_key: str) -> (Organization, bool):
+    duplicate_keys = get_duplicate_keys()
+    if api_key in duplicate_keys:
+        organization = None
+        if duplicate_keys[api_key]:
+            organization = Organization.objects.filter(pk=duplicate_keys[api_key]).first()
         return organization, True
     return None, False
 
 
+DUPLICATE_KEYS_CACHE_KEY = 'duplicates'
+
+
+def get_duplicate_keys() -> Dict[str, Optional[int]]:
+    # Duplicate keys are stored as DUPLICATE-<n>-<key>, so they are looked up
+    # by prefix once and then kept in cache.
+    return api_key_cache.get_or_set(DUPLICATE_KEYS_CACHE_KEY, _load_duplicate_keys)
+
+
+def _load_duplicate_keys() -> Dict[str, Optional[int]]:
+    duplicate_keys = {}
+    for api_key_obj in (
+        ApiKey.objects.
+        select_related('representative').
+        filter(
+            api_key__startswith=ApiKey.DUPLICATE,
+            enabled=False,
+        )
+    ):
+        parts = api_key_obj.api_key.split('-', 2)
+        if len(parts) == 3:
+            duplicate_keys[parts[2]] = (
+                get_representative_organization_id(api_key_obj.representative)
+                if api_key_obj.representative else None
+            )
+    return duplicate_keys
+
+
+def invalidate_api_key_cache(*hashed_keys: Optional[str]) -> None:
+    hashed_keys = [key for key in hashed_keys if key]
+    api_key_cache.delete_many([get_api_key_cache_key(key) for key in hashed_keys])
+    if any(key.startswith(ApiKey.DUPLICATE) for key in hashed_keys):
+        api_key_cache.delete(DUPLICATE_KEYS_CACHE_KEY)
+
+
 def get_spinta_auth():
-    token = cache.get('auth_token')
+    token = spinta_auth_cache.get('token')
     if not token:
-        data = {
-            'grant_type': 'client_credentials',
-            'scope': 'spinta_auth_clients'
-        }
-        resp = requests.post(SPINTA_SERVER_URL + '/auth/token',
-                             data=data, auth=(SPINTA_SERVER_CLIENT_ID, SPINTA_SERVER_CLIENT_SECRET))
-        if resp.status_code < 300:
-            resp_data = resp.json()
-            token = resp_data['access_token']
-            cache.set('auth_token', token, resp_data['expires_in'])
-        else:
-            return None
+        # Only one process asks for a new token, others wait for it.
+        with spinta_auth_cache.lock('token'):
+            token = spinta_auth_cache.get('token')
+            if not token:
+                data = {
+                    'grant_type': 'client_credentials',
+                    'scope': 'spinta_auth_clients'
+                }
+                resp = requests.post(SPINTA_SERVER_URL + '/auth/token',
+                                     data=data, auth=(SPINTA_SERVER_CLIENT_ID, SPINTA_SERVER_CLIENT_SECRET))
+                if resp.status_code < 300:
+                    resp_data = resp.json()
+                    token = resp_data['access_token']
+                    spinta_auth_cache.set('token', token, resp_data['expires_in'])
+                else:
+                    return None
     return {'Authorization': 'Bearer {}'.format(token)}
 
 
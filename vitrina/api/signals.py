@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from vitrina.api.models import ApiKey
+from vitrina.api.services import invalidate_api_key_cache
+from vitrina.orgs.models import Representative
+
+
+@receiver(pre_save, sender=ApiKey)
+def invalidate_old_api_key(sender, instance, **kwargs):
+    # Keys are regenerated in place, so the old key must stop working too.
+    if instance.pk:
+        invalidate_api_key_cache(*ApiKey.objects.filter(pk=instance.pk).values_list('api_key', flat=True))
+
+
+@receiver(post_save, sender=ApiKey)
+@receiver(post_delete, sender=ApiKey)
+def invalidate_api_key(sender, instance, **kwargs):
+    invalidate_api_key_cache(instance.api_key)
+
+
+@receiver(post_save, sender=Representative)
+@receiver(post_delete, sender=Representative)
+def invalidate_representative_api_keys(sender, instance, **kwargs):
+    invalidate_api_key_cache(*ApiKey.objects.filter(representative=instance).values_list('api_key', flat=True))
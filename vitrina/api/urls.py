@@ -112,6 +112,10 @@ urlpatterns = [
          DatasetModelDownloadViewSet.as_view({
              'post': 'create'
          }), name="api-download-stats-internal"),
+    path('partner/api/1/downloads/bulk',
+         DatasetModelDownloadViewSet.as_view({
+             'post': 'bulk_create'
+         }), name="api-download-stats-bulk"),
 
     path('public/api/1/', TemplateView.as_view(template_name="vitrina/api/public_api.html"), name="public-api"),
     path('edp/dcat-ap.rdf', edp_dcat_ap_rdf, name="edp-dcat-ap-rdf"),
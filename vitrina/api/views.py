@@ -1,10 +1,14 @@
+import hashlib
+
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Max
 from django.db.utils import IntegrityError
 from django.http import HttpRequest
-from django.http import HttpResponse
-from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.templatetags.static import static
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.apps import apps
 
 from drf_yasg import openapi
@@ -15,6 +19,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework import status, permissions, exceptions
 from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import ListModelMixin, DestroyModelMixin, CreateModelMixin, UpdateModelMixin
+from rest_framework.parsers import FormParser
 from rest_framework.parsers import JSONParser
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
@@ -22,8 +27,11 @@ from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from reversion import set_comment, set_user
 from reversion.views import RevisionMixin
 
-from vitrina.api.helpers import get_datasets_for_rdf
+from vitrina.api.dcat import get_dcat_datasets, get_dcat_version, render_dcat_rdf
+from vitrina.api.helpers import parse_since
 from vitrina.api.models import ApiDescription, ApiKey
+from vitrina.api.pagination import PartnerCursorPagination
+from vitrina.api.parsers import JSONLinesParser
 from vitrina.api.permissions import APIKeyPermission, HasStatsPostPermission
 from vitrina.api.serializers import (
     CatalogSerializer, CategorySerializer,
@@ -36,11 +44,13 @@ from vitrina.api.serializers import (
 )
 from vitrina.catalogs.models import Catalog
 from vitrina.classifiers.models import Category, Licence
+from vitrina.context_processors import current_domain
 from vitrina.datasets.models import Dataset, DatasetStructure
 from vitrina.resources.models import DatasetDistribution, Format
 from vitrina.statistics.models import ModelDownloadStats
+from vitrina.statistics.services import upsert_model_download_stats
 from vitrina.structure.models import Metadata
-from vitrina.structure.services import _resource_models_to_tabular, create_or_get_uapi_format
+from vitrina.structure.services import export_resource_structure, create_or_get_uapi_format
 from vitrina.tasks.models import Task
 
 CATALOG_TAG = 'Catalogs'
@@ -137,6 +147,80 @@ INTERNAL_ID = openapi.Parameter('internalId', in_=openapi.IN_PATH, type=openapi.
 DATASET_ID = openapi.Parameter('datasetId', in_=openapi.IN_PATH, type=openapi.TYPE_INTEGER)
 DISTRIBUTION_ID = openapi.Parameter('distributionId', in_=openapi.IN_PATH, type=openapi.TYPE_INTEGER)
 STRUCTURE_ID = openapi.Parameter('structureId', in_=openapi.IN_PATH, type=openapi.TYPE_INTEGER)
+FIELDS = openapi.Parameter(
+    'fields',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description="Comma separated list of fields to return",
+)
+MODIFIED_SINCE = openapi.Parameter(
+    'modified_since',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description="Return only objects modified since this date or time",
+)
+CURSOR = openapi.Parameter(
+    'cursor',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description="Page cursor, taken from next or previous link of a page",
+)
+PAGE_SIZE = openapi.Parameter(
+    'page_size',
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_INTEGER,
+    description="Number of objects in a page, lists are paginated if given",
+)
+LIST_PARAMS = [FIELDS, MODIFIED_SINCE, CURSOR, PAGE_SIZE]
+
+
+def _get_etag(request: HttpRequest, *parts) -> str:
+    key = ':'.join(map(str, [request.get_full_path(), *parts]))
+    return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+class PartnerListMixin:
+    # Lists are filtered by ?modified_since and paginated by ?cursor and
+    # ?page_size. ETags are computed from modification times, before objects
+    # are serialized, so unchanged data is neither serialized nor sent again.
+    # Modification times of related objects, that are serialized too, are
+    # listed in etag_related.
+    pagination_class = PartnerCursorPagination
+    etag_related = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and (since := self.request.query_params.get('modified_since')):
+            try:
+                since = parse_since(since)
+            except ValueError as e:
+                raise exceptions.ValidationError({'modified_since': [str(e)]})
+            queryset = queryset.filter(modified__gte=since)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            *(Max(field) for field in self.etag_related),
+            count=Count('pk', distinct=True),
+            modified=Max('modified'),
+            last=Max('pk'),
+        )
+        etag = _get_etag(request, *stats.values())
+        if response := get_conditional_response(request, etag=etag):
+            return response
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = _get_etag(request, instance.pk, instance.modified)
+        if response := get_conditional_response(request, etag=etag):
+            return response
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        response['ETag'] = etag
+        return response
 
 
 class CatalogViewSet(ListModelMixin, GenericViewSet):
@@ -184,24 +268,35 @@ class LicenceViewSet(ListModelMixin, GenericViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class DatasetViewSet(RevisionMixin, ModelViewSet):
+class DatasetViewSet(PartnerListMixin, RevisionMixin, ModelViewSet):
     serializer_class = DatasetSerializer
     permission_classes = (APIKeyPermission,)
     lookup_url_kwarg = 'datasetId'
+    etag_related = (
+        'organization__modified',
+        'licence__modified',
+        'frequency__modified',
+        'category__modified',
+    )
     organization = None
     user = None
 
     def get_queryset(self):
         if self.organization:
-            return Dataset.objects.filter(
-                organization=self.organization,
-                deleted__isnull=True
+            return (
+                Dataset.objects.
+                filter(
+                    organization=self.organization,
+                    deleted__isnull=True
+                ).
+                select_related('organization', 'licence', 'frequency').
+                prefetch_related('translations', 'tags', 'category')
             )
         return Dataset.objects.none()
 
     @swagger_auto_schema(
         operation_summary="List all datasets",
-        manual_parameters=[HEADER_PARAM],
+        manual_parameters=[HEADER_PARAM, *LIST_PARAMS],
         tags=[RETRIEVING_DATA_TAG],
     )
     def list(self, request, *args, **kwargs):
@@ -322,7 +417,7 @@ class InternalDatasetViewSet(DatasetViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class DatasetDistributionViewSet(ModelViewSet):
+class DatasetDistributionViewSet(PartnerListMixin, ModelViewSet):
     serializer_class = DatasetDistributionSerializer
     permission_classes = (APIKeyPermission,)
     parser_classes = [MultiPartParser, JSONParser]
@@ -330,7 +425,11 @@ class DatasetDistributionViewSet(ModelViewSet):
 
     def get_queryset(self):
         dataset = self.get_dataset()
-        queryset = DatasetDistribution.objects.filter(dataset=dataset)
+        queryset = (
+            DatasetDistribution.objects.
+            filter(dataset=dataset).
+            select_related('dataset__organization', 'dataset__frequency')
+        )
         return queryset
 
     def get_dataset(self):
@@ -338,7 +437,7 @@ class DatasetDistributionViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Get all dataset distributions",
-        manual_parameters=[HEADER_PARAM, DATASET_ID],
+        manual_parameters=[HEADER_PARAM, DATASET_ID, *LIST_PARAMS],
         tags=[RETRIEVING_DATA_TAG]
     )
     def list(self, request, *args, **kwargs):
@@ -439,7 +538,7 @@ class InternalDatasetDistributionViewSet(DatasetDistributionViewSet):
     @swagger_auto_schema(
         operation_summary="Get all dataset distributions",
         operation_id="datasets_distributions_list_internal",
-        manual_parameters=[HEADER_PARAM, INTERNAL_ID],
+        manual_parameters=[HEADER_PARAM, INTERNAL_ID, *LIST_PARAMS],
         tags=[RETRIEVING_DATA_TAG]
     )
     def list(self, request, *args, **kwargs):
@@ -497,14 +596,17 @@ class InternalDatasetDistributionViewSet(DatasetDistributionViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class UploadToStorageViewSet(ModelViewSet):
+class UploadToStorageViewSet(PartnerListMixin, ModelViewSet):
     serializer_class = UploadToStorageSerializer
     permission_classes = (APIKeyPermission,)
     queryset = DatasetDistribution.objects.filter(upload_to_storage=True)\
-        .exclude(download_url__icontains="get.data.gov.lt")
+        .exclude(download_url__icontains="get.data.gov.lt")\
+        .select_related('dataset__organization', 'dataset__frequency')
+    etag_related = ('dataset__organization__modified', 'dataset__frequency__modified')
 
     @swagger_auto_schema(
         operation_summary="List all uploadable distributions",
+        manual_parameters=LIST_PARAMS,
         tags=["Retrieving Data"],
     )
     def list(self, request, *args, **kwargs):
@@ -553,8 +655,7 @@ class DistributionTabularDataViewSet(ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         distribution_id = kwargs.get('distributionId')
         dataset_distribution_instance = DatasetDistribution.objects.get(id=distribution_id)
-        tabular_data = _resource_models_to_tabular(dataset_distribution_instance)
-        tabular_data_list = list(tabular_data)
+        tabular_data_list = export_resource_structure(dataset_distribution_instance)
         return Response(tabular_data_list)
 
 
@@ -664,6 +765,7 @@ class TaskViewSet(ModelViewSet):
 
 
 class DatasetStructureViewSet(
+    PartnerListMixin,
     CreateModelMixin,
     DestroyModelMixin,
     ListModelMixin,
@@ -684,7 +786,7 @@ class DatasetStructureViewSet(
 
     @swagger_auto_schema(
         operation_summary="Get all dataset structure entries",
-        manual_parameters=[HEADER_PARAM, DATASET_ID],
+        manual_parameters=[HEADER_PARAM, DATASET_ID, *LIST_PARAMS],
         tags=[RETRIEVING_DATA_TAG]
     )
     def list(self, request, *args, **kwargs):
@@ -732,7 +834,7 @@ class InternalDatasetStructureViewSet(DatasetStructureViewSet):
     @swagger_auto_schema(
         operation_summary="Get all dataset structure entries",
         operation_id="datasets_structure_list_internal",
-        manual_parameters=[HEADER_PARAM, INTERNAL_ID],
+        manual_parameters=[HEADER_PARAM, INTERNAL_ID, *LIST_PARAMS],
         tags=[RETRIEVING_DATA_TAG]
     )
     def list(self, request, *args, **kwargs):
@@ -761,6 +863,7 @@ class InternalDatasetStructureViewSet(DatasetStructureViewSet):
 
 class DatasetModelDownloadViewSet(CreateModelMixin, UpdateModelMixin, GenericViewSet):
     permission_classes = (HasStatsPostPermission,)
+    parser_classes = [JSONParser, JSONLinesParser, FormParser, MultiPartParser]
 
     @swagger_auto_schema(
         operation_summary="Add model statistics",
@@ -798,8 +901,46 @@ class DatasetModelDownloadViewSet(CreateModelMixin, UpdateModelMixin, GenericVie
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_200_OK, headers=headers)
 
+    @swagger_auto_schema(
+        operation_summary="Add model statistics in bulk",
+        operation_description=(
+            "Accepts a JSON list or JSON lines (application/x-ndjson, "
+            "optionally with Content-Encoding: gzip) of model statistics."
+        ),
+        request_body=ModelDownloadStatsSerializer(many=True),
+        responses={status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'count': openapi.Schema(type=openapi.TYPE_INTEGER)},
+        )},
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise exceptions.ValidationError('Expected a list of items')
+        serializer = ModelDownloadStatsSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        count = upsert_model_download_stats(serializer.validated_data)
+        return Response({'count': count}, status=status.HTTP_200_OK)
+
 
 def edp_dcat_ap_rdf(request: HttpRequest) -> HttpResponse:
-    return render(request, 'vitrina/api/edp/dcat_ap_rdf.html', {
-        'datasets': get_datasets_for_rdf(Dataset.public.all()),
-    }, content_type='application/rdf+xml')
+    # ?since=<date> exports only datasets modified since then, ?page=<n>
+    # exports one page of DCAT_PAGE_SIZE datasets.
+    try:
+        since = parse_since(request.GET['since']) if request.GET.get('since') else None
+        page = int(request.GET['page']) if request.GET.get('page') else None
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if page is not None and page < 1:
+        return HttpResponseBadRequest("Page must be a positive number.")
+
+    etag = quote_etag(str(get_dcat_version()))
+    if response := get_conditional_response(request, etag=etag):
+        return response
+
+    domain = current_domain(request)['current_domain_full']
+    response = StreamingHttpResponse(
+        render_dcat_rdf(get_dcat_datasets(since, page), domain),
+        content_type='application/rdf+xml',
+    )
+    response['ETag'] = etag
+    return response
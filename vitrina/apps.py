@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     name = 'vitrina'
     label = 'vitrina'
+
+    def ready(self):
+        import vitrina.signals
@@ -0,0 +1,256 @@
+import hashlib
+import importlib
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+T = TypeVar('T')
+
+# How long, in seconds, a lock is kept if the process holding it dies.
+CACHE_LOCK_TIMEOUT = 30
+
+# How long, in seconds, other processes wait for a value computed under a
+# lock, before computing it themselves.
+CACHE_LOCK_WAIT = 5
+CACHE_LOCK_POLL = 0.05
+
+_missing = object()
+
+NAMESPACES: Dict[str, 'CacheNamespace'] = {}
+
+# Modules, that define cache namespaces, see load_namespaces.
+NAMESPACE_MODULES = [
+    'vitrina.api.dcat',
+    'vitrina.api.services',
+    'vitrina.helpers',
+    'vitrina.hierarchy',
+    'vitrina.landing',
+    'vitrina.orgs.services',
+    'vitrina.resources.services',
+    'vitrina.structure.services',
+    'vitrina.structure.views',
+]
+
+
+def _make_key(prefix: str, key: Any) -> str:
+    return f'{prefix}:{hashlib.md5(str(key).encode()).hexdigest()}'
+
+
+class CacheNamespace(Generic[T]):
+    # Values of one kind, stored in the shared cache (settings.CACHES), so
+    # that all worker processes see the same values.
+    #
+    # Keys are hashed, because they can contain user input, that is not a
+    # valid memcached key, and are prefixed with the namespace name. Versioned namespaces also
+    # include a version in keys, so that all their values are dropped at once
+    # by invalidate(). Scopes (see scope()) have their own versions, for
+    # example a namespace of per dataset values can be invalidated for one
+    # dataset.
+    #
+    # Values are stored together with the time they should be refreshed at,
+    # which is a bit earlier than they expire. get_or_set() computes missing
+    # values under a lock and refreshes values in one process, while other
+    # processes are still served the old value.
+    #
+    # Locks rely on cache.add() being atomic, which it is on memcached and
+    # redis. On file based cache two processes can sometimes hold the same
+    # lock, then a value is just computed twice.
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[int] = 300,
+        *,
+        versioned: bool = False,
+        early_refresh: float = 0.1,  # part of timeout
+        alias: str = 'default',
+        _root: Optional['CacheNamespace'] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.versioned = versioned
+        self.early_refresh = early_refresh
+        self.alias = alias
+        self.root = _root or self
+        if _root is None:
+            NAMESPACES[name] = self
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name}>'
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def scope(self, *parts: Any) -> 'CacheNamespace[T]':
+        return CacheNamespace(
+            ':'.join([self.name, *map(str, parts)]),
+            self.timeout,
+            versioned=self.versioned,
+            early_refresh=self.early_refresh,
+            alias=self.alias,
+            _root=self.root,
+        )
+
+    @property
+    def version(self) -> int:
+        if not self.versioned:
+            return 0
+        return self.cache.get_or_set(f'{self.name}:version', time.time_ns, None)
+
+    def invalidate(self) -> None:
+        assert self.versioned, f"{self} is not versioned."
+
+        def invalidate():
+            self.cache.delete(f'{self.name}:version')
+
+        # Other processes could store values again before the change is
+        # committed, so values are dropped once more after commit.
+        invalidate()
+        transaction.on_commit(invalidate)
+
+    def key(self, key: Any) -> str:
+        return _make_key(self._prefix(), key)
+
+    def _prefix(self) -> str:
+        if self.versioned:
+            return f'{self.name}:{self.version}'
+        return self.name
+
+    def get(self, key: Any, default: Any = None) -> T:
+        entry = self.cache.get(self.key(key), _missing)
+        if entry is _missing:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return entry[0]
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[Any, T]:
+        prefix = self._prefix()
+        keys = {_make_key(prefix, key): key for key in keys}
+        found = self.cache.get_many(keys)
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return {keys[key]: entry[0] for key, entry in found.items()}
+
+    def set(self, key: Any, value: T, timeout: Optional[int] = _missing) -> None:
+        timeout = self.timeout if timeout is _missing else timeout
+        self.cache.set(self.key(key), self._entry(value, timeout), timeout)
+
+    def set_many(self, values: Dict[Any, T], timeout: Optional[int] = _missing) -> None:
+        timeout = self.timeout if timeout is _missing else timeout
+        prefix = self._prefix()
+        self.cache.set_many({
+            _make_key(prefix, key): self._entry(value, timeout)
+            for key, value in values.items()
+        }, timeout)
+
+    def delete(self, key: Any) -> None:
+        self.cache.delete(self.key(key))
+
+    def delete_many(self, keys: Iterable[Any]) -> None:
+        prefix = self._prefix()
+        self.cache.delete_many([_make_key(prefix, key) for key in keys])
+
+    def get_or_set(
+        self,
+        key: Any,
+        build: Callable[[], T],
+        timeout: Optional[int] = _missing,
+    ) -> T:
+        timeout = self.timeout if timeout is _missing else timeout
+        full_key = self.key(key)
+        entry = self.cache.get(full_key)
+        if entry is not None:
+            value, refresh_at = entry
+            if refresh_at is None or time.time() < refresh_at:
+                self._count('hits')
+                return value
+            # Value is refreshed by one process, others use the old one.
+            with self._lock(full_key, wait=False) as locked:
+                if not locked:
+                    self._count('hits')
+                    return value
+                self._count('refreshes')
+                value = build()
+                self.cache.set(full_key, self._entry(value, timeout), timeout)
+                return value
+
+        self._count('misses')
+        with self._lock(full_key) as locked:
+            if not locked:
+                # Value was being computed by another process, that did not
+                # finish in time.
+                entry = self.cache.get(full_key)
+                if entry is not None:
+                    return entry[0]
+            value = build()
+            self.cache.set(full_key, self._entry(value, timeout), timeout)
+        return value
+
+    def lock(self, key: Any, *, wait: bool = True):
+        # Yields True if lock was acquired. Waiting stops early, when another
+        # process stores a value under the key.
+        return self._lock(self.key(key), wait=wait)
+
+    @contextmanager
+    def _lock(self, key: str, *, wait: bool = True) -> Iterator[bool]:
+        lock_key = f'{key}:lock'
+        locked = self.cache.add(lock_key, 1, CACHE_LOCK_TIMEOUT)
+        if not locked and wait:
+            deadline = time.monotonic() + CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(CACHE_LOCK_POLL)
+                if self.cache.get(key) is not None:
+                    break
+                if locked := self.cache.add(lock_key, 1, CACHE_LOCK_TIMEOUT):
+                    break
+        try:
+            yield locked
+        finally:
+            if locked:
+                self.cache.delete(lock_key)
+
+    def _entry(self, value: T, timeout: Optional[int]) -> Tuple[T, Optional[float]]:
+        if timeout is None:
+            return value, None
+        return value, time.time() + timeout * (1 - self.early_refresh)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        if not settings.CACHE_STATS or n == 0:
+            return
+        key = f'cache-stats:{self.root.name}:{name}'
+        try:
+            self.cache.incr(key, n)
+        except ValueError:
+            if not self.cache.add(key, n, None):
+                self.cache.incr(key, n)
+
+    def get_stats(self) -> Dict[str, int]:
+        names = ['hits', 'misses', 'refreshes']
+        stats = self.cache.get_many([f'cache-stats:{self.name}:{name}' for name in names])
+        return {
+            name: stats.get(f'cache-stats:{self.name}:{name}', 0)
+            for name in names
+        }
+
+    def reset_stats(self) -> None:
+        self.cache.delete_many([
+            f'cache-stats:{self.name}:{name}'
+            for name in ('hits', 'misses', 'refreshes')
+        ])
+
+
+def load_namespaces() -> Dict[str, 'CacheNamespace']:
+    # Namespaces are registered when their modules are imported.
+    for module in NAMESPACE_MODULES:
+        importlib.import_module(module)
+    return NAMESPACES
+
+
+def get_cache_stats() -> List[Tuple[str, Dict[str, int]]]:
+    return [(name, ns.get_stats()) for name, ns in sorted(load_namespaces().items())]
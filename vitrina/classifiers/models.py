@@ -1,6 +1,8 @@
 from django.db import models
 from treebeard.mp_tree import MP_Node, MP_NodeManager
 
+from vitrina.hierarchy import invalidate_hierarchy
+
 from django.utils.translation import gettext_lazy as _, get_language
 
 
@@ -42,6 +44,11 @@ class Category(MP_Node):
             return self.title_en
         return self.title
 
+    def move(self, target, pos=None):
+        # Nodes are moved with queryset updates, that do not send signals.
+        super().move(target, pos)
+        invalidate_hierarchy(Category)
+
     def get_family_objects(self):
         yield from self.get_ancestors()
         yield from self.get_descendants()
@@ -1,10 +1,12 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from vitrina.comments.models import Comment
 from vitrina.datasets.models import Dataset
 from vitrina.messages.models import Subscription
+from vitrina.messages.services import get_subscriptions, queue_email
 from vitrina.tasks.models import Task
-from vitrina.helpers import email
+from vitrina.tasks.services import create_tasks
 
 
 NEW_COMMENT = 'New'
@@ -22,12 +24,18 @@ def get_title_description_by_comment_type(comment_type, content_type, object_id)
 
 
 def create_task(comment_type, content_type, object_id, user, obj=None, comment_object=None, comment_ct=None):
+    task = build_task(comment_type, content_type, object_id, user, obj, comment_object, comment_ct)
+    task.save()
+    return task
+
+
+def build_task(comment_type, content_type, object_id, user, obj=None, comment_object=None, comment_ct=None):
     organization = obj.organization if hasattr(obj, 'organization') else None
 
     title, description = get_title_description_by_comment_type(comment_type,
                                                                comment_ct if comment_ct else content_type,
                                                                object_id)
-    Task.objects.create(
+    return Task(
         title=title,
         organization=organization,
         description=description,
@@ -64,70 +72,59 @@ def send_mail_and_create_tasks_for_subs(
     if excluded_emails is None:
         excluded_emails = []
 
-    object_subs = Subscription.objects.exclude(user=user).filter(
+    filters = [Q(
         sub_type=content_type.model.upper(),
         content_type=content_type,
         object_id=object_id,
-    )
-    org_subs = []
-    email_list = []
-    org_email_list = []
+    )]
+    organization = None
     if obj and isinstance(obj, Dataset) and obj.organization:
-        org_subs = Subscription.objects.exclude(user=user).filter(
+        organization = obj.organization
+        filters.append(Q(
             sub_type=Subscription.ORGANIZATION,
-            content_type=ContentType.objects.get_for_model(obj.organization),
-            object_id=obj.organization.pk,
-        )
+            content_type=ContentType.objects.get_for_model(organization),
+            object_id=organization.pk,
+        ))
+    subs = get_subscriptions(*filters, exclude_user=user)
 
-    for sub in object_subs:
-        if sub.dataset_comments_sub or sub.request_comments_sub or sub.project_comments_sub:
-            create_task(
+    email_list = []
+    org_email_list = []
+    tasks = []
+    for sub in subs:
+        has_comments_sub = sub.dataset_comments_sub or sub.request_comments_sub or sub.project_comments_sub
+        if has_comments_sub:
+            tasks.append(build_task(
                 comment_type=comment_type,
                 content_type=content_type,
                 object_id=object_id,
                 user=sub.user,
                 obj=obj,
                 comment_object=comment_object
-            )
-        if (
-            sub.user.email and
-            sub.user.email not in email_list and
-            sub.user.email not in excluded_emails
-        ):
+            ))
+        if not sub.user.email or sub.user.email in excluded_emails:
+            continue
+        if sub.priority == 0:
             email_list.append(sub.user.email)
-    for sub in org_subs:
-        if sub.dataset_comments_sub or sub.request_comments_sub or sub.project_comments_sub:
-            create_task(
-                comment_type=comment_type,
-                content_type=content_type,
-                object_id=object_id,
-                user=sub.user,
-                obj=obj,
-                comment_object=comment_object
-            )
-            if (
-                sub.user.email and
-                sub.user.email not in email_list and
-                sub.user.email not in org_email_list and
-                sub.user.email not in excluded_emails
-            ):
-                org_email_list.append(sub.user.email)
-
-    send_mail_to_object_subscribers(
-        email_list,
-        content_type,
-        object_id,
-        link,
-        comment_type
-    )
-    if len(org_subs) > 0:
+        elif has_comments_sub:
+            org_email_list.append(sub.user.email)
+    create_tasks(tasks)
+
+    if email_list:
+        send_mail_to_object_subscribers(
+            email_list,
+            content_type,
+            object_id,
+            link,
+            comment_type
+        )
+    if org_email_list:
         send_mail_to_object_subscribers(
             org_email_list,
             content_type,
             object_id,
             link,
             comment_type,
-            org=obj.organization
+            org=organization
         )
 
 
@@ -152,7 +149,7 @@ def send_mail_to_object_subscribers(
         file = 'vitrina/comments/emails/sub/replay.md'
 
     if sub_object is not None:
-        email(email_list, email_identifier, file, {
+        queue_email(email_list, email_identifier, file, {
             'object': sub_object,
             'link': link
         })
@@ -1,9 +1,13 @@
-from typing import Type
+from typing import List, Optional, Tuple, Type
 
+from django.core.paginator import Page, Paginator
 from django.db import models
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
 
 from vitrina.comments.forms import DatasetCommentForm, RequestCommentForm, CommentForm, ProjectCommentForm, \
     RegisterRequestForm
+from vitrina.comments.models import Comment
 from vitrina.datasets.models import Dataset, DatasetStructure
 from vitrina.orgs.services import has_perm, Action
 from vitrina.projects.models import Project
@@ -46,3 +50,60 @@ def has_comment_permission(obj: models.Model = None, user: User = None) -> bool:
     elif isinstance(obj, (Request, Project)):
         return True
     return False
+
+
+COMMENT_THREADS_PER_PAGE = 20
+
+
+def get_comment_threads(
+    threads: QuerySet,
+    include_private: bool = False,
+    page: Optional[int] = None,
+    per_page: int = COMMENT_THREADS_PER_PAGE,
+) -> Tuple[List[Comment], Optional[Page]]:
+    # `threads` selects top-level comments. Whole threads are loaded with a
+    # single recursive query and returned in the same order as
+    # `Comment.descendants(include_self=True)` would return them.
+    threads = threads.order_by('created', 'pk')
+    page_obj = None
+    if page is not None:
+        page_obj = Paginator(threads, per_page).get_page(page)
+        threads = page_obj.object_list
+
+    top_sql, params = threads.values('pk').query.sql_with_params()
+    private_sql = '' if include_private else 'AND c.is_public'
+    sql = f"""
+        WITH RECURSIVE thread(id) AS (
+            SELECT top.id FROM ({top_sql}) AS top(id)
+            UNION
+            SELECT c.id FROM {Comment._meta.db_table} c
+            JOIN thread ON c.parent_id = thread.id {private_sql}
+        )
+        SELECT id FROM thread
+    """
+    comments = list(
+        Comment.objects.
+        filter(pk__in=RawSQL(sql, params)).
+        select_related('user').
+        prefetch_related('rel_content_object').
+        order_by('created', 'pk')
+    )
+
+    by_id = {comment.pk: comment for comment in comments}
+    children = {}
+    for comment in comments:
+        if comment.parent_id in by_id:
+            comment.parent = by_id[comment.parent_id]
+            children.setdefault(comment.parent_id, []).append(comment)
+
+    result = []
+
+    def walk(comment):
+        result.append(comment)
+        for child in children.get(comment.pk, []):
+            walk(child)
+
+    for comment in comments:
+        if comment.parent_id not in by_id:
+            walk(comment)
+    return result, page_obj
@@ -21,6 +21,7 @@ from vitrina.datasets.models import Dataset, DatasetGroup, Attribution, DataServ
     Relation, DatasetReport
 from vitrina.filters import FormatFilter
 from vitrina.helpers import get_current_domain
+from vitrina.hierarchy import get_root
 from vitrina.resources.models import FormatName
 from vitrina.structure.services import get_data_from_spinta, to_row
 
@@ -119,7 +120,7 @@ class DatasetReportAdmin(admin.ModelAdmin):
     organization_display.allow_tags = True
 
     def root_organization_display(self, obj):
-        root_organization = obj.organization.get_root()
+        root_organization = get_root(obj.organization)
         if root_organization:
             if len(root_organization.title) >= 40:
                 title = root_organization.title[:40] + "..."
@@ -275,7 +276,7 @@ class DatasetReportAdmin(admin.ModelAdmin):
         for item in queryset:
             yield to_row(cols.keys(), {
                 'organization': item.organization.title,
-                'root_organization': item.organization.get_root().title if item.organization.get_root() else '-',
+                'root_organization': get_root(item.organization).title,
                 'dataset_title': item.title,
                 'dataset_url': "%s%s" % (get_current_domain(request), item.get_absolute_url()),
                 'created': self.distribution_published_display(item),
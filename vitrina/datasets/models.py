@@ -25,6 +25,7 @@ from vitrina.users.models import User
 from vitrina.orgs.models import Organization, Representative
 from vitrina.catalogs.models import Catalog, HarvestingJob
 from vitrina.classifiers.models import Category, Licence, Frequency
+from vitrina.hierarchy import get_ancestors_with_datasets, get_root, get_root_with_children
 from vitrina.datasets.managers import PublicDatasetManager
 
 from vitrina.settings import TRANSLATION_CLIENT_ID
@@ -242,10 +243,10 @@ class Dataset(TranslatableModel):
         return reverse('dataset-detail', kwargs={'pk': self.pk})
 
     def get_tag_object_list(self):
-        return list(self.tags.all().values('name', 'pk'))
+        return [{'name': tag.name, 'pk': tag.pk} for tag in self.tags.all()]
 
     def get_tag_list(self):
-        return list(self.tags.all().values_list('pk', flat=True))
+        return [tag.pk for tag in self.tags.all()]
 
     def get_tag_title(self, tag_id):
         if tag := self.tags.tag_model.objects.filter(pk=tag_id).first():
@@ -253,7 +254,7 @@ class Dataset(TranslatableModel):
         return ''
 
     def get_resource_titles(self):
-        return list(self.datasetdistribution_set.all().values_list('title', flat=True))
+        return [dist.title for dist in self.datasetdistribution_set.all()]
 
     def get_model_title_list(self):
         return list(model.title for model in self.model_set.all())
@@ -261,48 +262,55 @@ class Dataset(TranslatableModel):
     def get_model_name_list(self):
         return list(model.full_name for model in self.model_set.all() if model.name)
 
+    def get_properties(self):
+        return [prop for model in self.model_set.all() for prop in model.model_properties.all()]
+
     def get_property_title_list(self):
-        return list(item.title for item in Property.objects.filter(model__in=self.model_set.all()))
+        return list(item.title for item in self.get_properties())
 
     def get_request_title_list(self):
-        return list(self.dataset_request.all().values_list('title', flat=True))
+        return [request.title for request in self.dataset_request.all()]
 
     def get_project_title_list(self):
-        return list(self.project_set.all().values_list('title', flat=True))
+        return [project.title for project in self.project_set.all()]
 
     def get_resource_description(self):
-        return list(self.datasetdistribution_set.all().values_list('description', flat=True))
+        return [dist.description for dist in self.datasetdistribution_set.all()]
 
     def get_model_title_description(self):
         return list(model.description for model in self.model_set.all())
 
     def get_property_title_description(self):
-        return list(item.description for item in Property.objects.filter(model__in=self.model_set.all()))
+        return list(item.description for item in self.get_properties())
 
     def get_request_title_description(self):
-        return list(self.dataset_request.all().values_list('description', flat=True))
+        return [request.description for request in self.dataset_request.all()]
 
     def get_project_title_description(self):
-        return list(self.project_set.all().values_list('description', flat=True))
+        return [project.description for project in self.project_set.all()]
 
     def get_all_groups(self):
         ids = self.category.filter(groups__isnull=False).values_list('groups__pk', flat=True).distinct()
         return DatasetGroup.objects.filter(pk__in=ids)
 
     def get_group_list(self):
-        return list(self.category.filter(groups__isnull=False).values_list('groups__pk', flat=True).distinct())
+        return list(dict.fromkeys(
+            group.pk
+            for category in self.category.all()
+            for group in category.groups.all()
+        ))
 
     def get_parent_organization_title(self):
         if self.organization.is_root():
             return self.organization.title
         else:
-            return self.organization.get_root().title
+            return get_root(self.organization).title
 
     def parent_category(self):
         parents = []
         for category in self.category.all():
             if not category.is_root():
-                parents.append(category.get_root().pk)
+                parents.append(get_root(category).pk)
             else:
                 parents.append(category.pk)
         return parents
@@ -311,7 +319,7 @@ class Dataset(TranslatableModel):
         parents = []
         for category in self.category.all():
             if not category.is_root():
-                parents.append(category.get_root().title)
+                parents.append(get_root(category).title)
             else:
                 parents.append(category.title)
         return parents
@@ -319,16 +327,14 @@ class Dataset(TranslatableModel):
     def get_category_object_list_lt(self):
         categories = []
         for category in self.category.all():
-            categories = [{'title': cat.title, 'pk': cat.pk} for cat in category.get_ancestors()
-                          if cat.dataset_set.exists()]
+            categories = [{'title': cat.title, 'pk': cat.pk} for cat in get_ancestors_with_datasets(category)]
             categories.append({'title': category.title, 'pk': category.pk})
         return categories
 
     def get_category_object_list_en(self):
         categories = []
         for category in self.category.all():
-            categories = [{'title_en': cat.title_en, 'pk': cat.pk} for cat in category.get_ancestors()
-                          if cat.dataset_set.exists()]
+            categories = [{'title_en': cat.title_en, 'pk': cat.pk} for cat in get_ancestors_with_datasets(category)]
             categories.append({'title_en': category.title_en, 'pk': category.pk})
         return categories
 
@@ -364,6 +370,8 @@ class Dataset(TranslatableModel):
         return reverse('dataset-members', kwargs={'pk': self.pk})
 
     def get_managers(self):
+        if hasattr(self, '_managers'):
+            return self._managers
         ct = ContentType.objects.get_for_model(Dataset)
         return list(Representative.objects.filter(
             content_type=ct, object_id=self.id
@@ -377,16 +385,16 @@ class Dataset(TranslatableModel):
 
     @property
     def tag_name_array(self):
-        return [tag.name.strip() for tag in self.tags.tags]
+        return [tag.name.strip() for tag in self.tags.all()]
 
     @property
     def category_titles(self):
-        return self.category.values_list('title', flat=True)
+        return [category.title for category in self.category.all()]
 
     def jurisdiction(self) -> int | None:
         if self.organization:
-            root_org = self.organization.get_root()
-            if root_org.get_children_count() > 0:
+            root_org = get_root_with_children(self.organization)
+            if root_org:
                 return root_org.pk
         return None
 
@@ -417,7 +425,7 @@ class Dataset(TranslatableModel):
     def get_icon(self):
         root_category_ids = []
         for cat in self.category.all():
-            root_category_ids.append(cat.get_root().pk)
+            root_category_ids.append(get_root(cat).pk)
 
         if root_category_ids:
             category = Category.objects.filter(
@@ -435,7 +443,7 @@ class Dataset(TranslatableModel):
         return ""
 
     def public_types(self):
-        return list(self.type.filter(show_filter=True).values_list('pk', flat=True))
+        return [type.pk for type in self.type.all() if type.show_filter]
 
     def type_order(self):
         order = 0
@@ -1203,3 +1211,13 @@ class DatasetStructureMapping(models.Model):
 
     class Meta:
         db_table = 'dataset_structure_mapping'
+
+
+class SearchIndexUpdate(models.Model):
+    created = models.DateTimeField(_("Sukurta"), auto_now_add=True)
+    content_type = models.ForeignKey(ContentType, models.CASCADE)
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'search_index_update'
+        verbose_name = _('Paieškos indekso atnaujinimas')
@@ -65,6 +65,14 @@ class ElasticsearchBackend(Elasticsearch7SearchBackend):
         "integer": {"type": "long"},
     }
 
+    def update(self, index, iterable, commit=True):
+        # update_index passes objects in batches, so related data of the whole
+        # batch can be loaded at once before each object is prepared.
+        if hasattr(index, 'prepare_batch'):
+            iterable = list(iterable)
+            index.prepare_batch(iterable)
+        super().update(index, iterable, commit=commit)
+
 
 class ElasticSearchEngine(Elasticsearch7SearchEngine):
     backend = ElasticsearchBackend
@@ -1,13 +1,21 @@
+import functools
+import threading
+
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from haystack.fields import CharField, IntegerField, MultiValueField, DateTimeField, EdgeNgramField, BooleanField
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 
 from haystack import signals
 from haystack.exceptions import NotHandled
 from haystack.indexes import SearchIndex, Indexable
 
 from vitrina.datasets.models import Dataset
-from vitrina.requests.models import RequestObject, Request
+from vitrina.datasets.services import queue_search_index_updates, update_search_index
+from vitrina.hierarchy import get_ancestors_with_datasets
+from vitrina.orgs.models import Representative
+from vitrina.structure.models import Metadata, Model, Property
 
 
 class DatasetIndex(SearchIndex, Indexable):
@@ -60,12 +68,50 @@ class DatasetIndex(SearchIndex, Indexable):
         return self.get_model().objects.all().filter(deleted__isnull=True,
                                                      deleted_on__isnull=True,
                                                      organization_id__isnull=False,
-                                                     translations__title__isnull=False).distinct()
+                                                     translations__title__isnull=False).distinct().\
+            select_related('organization', 'frequency')
+
+    def prepare_batch(self, datasets):
+        # Loads everything, that is needed to prepare given datasets, with a
+        # fixed number of queries, instead of querying for each dataset.
+        metadata = Metadata.objects.order_by('pk')
+        prefetch_related_objects(
+            datasets,
+            'organization',
+            'frequency',
+            'translations',
+            'tags',
+            'datasetdistribution_set__format',
+            'category__groups',
+            'type',
+            'related_datasets',
+            'part_of',
+            'dataset_request',
+            'project_set',
+            Prefetch('metadata', metadata),
+            Prefetch('model_set', Model.objects.prefetch_related(
+                Prefetch('metadata', metadata),
+                Prefetch('model_properties', Property.objects.prefetch_related(
+                    Prefetch('metadata', metadata),
+                )),
+            )),
+        )
+
+        managers = {}
+        ct = ContentType.objects.get_for_model(Dataset)
+        representatives = Representative.objects.filter(
+            content_type=ct,
+            object_id__in=[dataset.pk for dataset in datasets],
+        ).values_list('object_id', 'user_id')
+        for object_id, user_id in representatives:
+            managers.setdefault(object_id, []).append(user_id)
+        for dataset in datasets:
+            dataset._managers = managers.get(dataset.pk, [])
 
     def prepare_category(self, obj):
         categories = []
         for category in obj.category.all():
-            categories.extend([cat.pk for cat in category.get_ancestors() if cat.dataset_set.exists()])
+            categories.extend([cat.pk for cat in get_ancestors_with_datasets(category)])
             categories.append(category.pk)
         return categories
 
@@ -76,6 +122,11 @@ class DatasetIndex(SearchIndex, Indexable):
 
 
 class CustomSignalProcessor(signals.BaseSignalProcessor):
+    # Changed objects are collected until the transaction is committed, so
+    # that an object saved many times is indexed once and saving does not
+    # wait for the search engine.
+    _local = threading.local()
+
     def setup(self):
         models.signals.post_save.connect(self.handle_save)
         models.signals.post_delete.connect(self.handle_delete)
@@ -85,22 +136,34 @@ class CustomSignalProcessor(signals.BaseSignalProcessor):
         models.signals.post_delete.disconnect(self.handle_delete)
 
     def handle_save(self, sender, instance, **kwargs):
-        using_backends = self.connection_router.for_write(instance=instance)
+        if not self.is_indexed(sender):
+            return
+        # Objects are collected for the current transaction only. If the
+        # transaction is rolled back, its callback is dropped and objects of
+        # the next transaction are collected into a new set.
+        flush = getattr(self._local, 'flush', None)
+        connection = transaction.get_connection()
+        if flush is not None and any(entry[1] is flush for entry in connection.run_on_commit):
+            flush.args[0].add((sender, instance.pk))
+        else:
+            flush = functools.partial(self.flush, {(sender, instance.pk)})
+            self._local.flush = flush
+            transaction.on_commit(flush)
 
-        for using in using_backends:
-            try:
-                index = self.connections[using].get_unified_index().get_index(sender)
-
-                if index.index_queryset().filter(pk=instance.pk):
-                    index.update_object(instance, using=using)
-                    if isinstance(instance, Dataset):
-                        req_index = self.connections[using].get_unified_index().get_index(Request)
-                        reqs = RequestObject.objects.filter(content_type=ContentType.objects.get_for_model(instance),
-                                                            object_id=instance.pk)
-                        for req in reqs:
-                            req_index.update_object(req.request, using=using)
-                else:
-                    index.remove_object(instance, using=using)
+    def handle_delete(self, sender, instance, **kwargs):
+        self.handle_save(sender, instance, **kwargs)
 
+    def is_indexed(self, model):
+        for using in self.connection_router.for_write():
+            try:
+                self.connections[using].get_unified_index().get_index(model)
+                return True
             except NotHandled:
                 pass
+        return False
+
+    def flush(self, pending):
+        if settings.SEARCH_INDEX_QUEUE:
+            queue_search_index_updates(pending)
+        else:
+            update_search_index(pending)
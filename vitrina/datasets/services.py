@@ -1,17 +1,19 @@
 from collections import OrderedDict
-from typing import List, Any, Dict, Type
+from typing import List, Any, Dict, Iterable, Tuple, Type
 
 import numpy as np
 from django.contrib.admin.options import get_content_type_for_model
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import HttpRequest
 
+from django.db import models, transaction
 from django.db.models import Q
+from haystack import connection_router, connections
 from haystack.backends import SQ
+from haystack.exceptions import NotHandled
 
-from vitrina.datasets.models import Dataset
-from vitrina.helpers import get_filter_url
+from vitrina.datasets.models import Dataset, SearchIndexUpdate
+from vitrina.helpers import get_facet_labels, get_filter_url
 from vitrina.helpers import email
 from vitrina.messages.models import Subscription
 from vitrina.orgs.helpers import is_org_dataset_list
@@ -31,17 +33,15 @@ def update_facet_data(
 ) -> List[Any]:
     updated_facet_data = []
     if facet_fields and field_name in facet_fields:
+        labels = {}
+        if model_class:
+            labels = get_facet_labels(model_class, [facet[0] for facet in facet_fields[field_name]], use_str)
         for facet in facet_fields[field_name]:
             display_value = facet[0]
             if model_class:
-                try:
-                    obj = model_class.objects.get(pk=facet[0])
-                    if use_str:
-                        display_value = str(obj)
-                    else:
-                        display_value = obj.title
-                except ObjectDoesNotExist:
+                if str(facet[0]) not in labels:
                     continue
+                display_value = labels[str(facet[0])]
             elif choices:
                 display_value = choices.get(facet[0])
             data = {
@@ -322,3 +322,60 @@ def manage_subscriptions_for_representative(subscribe, user, dataset, link):
     else:
         if subscription:
             subscription.delete()
+
+
+def queue_search_index_updates(objects: Iterable[Tuple[Type[models.Model], int]]) -> None:
+    SearchIndexUpdate.objects.bulk_create([
+        SearchIndexUpdate(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=pk,
+        )
+        for model, pk in objects
+    ])
+
+
+def process_search_index_updates(batch_size: int = 500) -> int:
+    # Rows are deleted only after the search index is updated, so updates are
+    # retried if indexing fails. Rows queued while indexing are left for the
+    # next batch.
+    with transaction.atomic():
+        updates = list(
+            SearchIndexUpdate.objects.
+            select_for_update(skip_locked=True).
+            order_by('pk')[:batch_size]
+        )
+        if not updates:
+            return 0
+        update_search_index(
+            (ContentType.objects.get_for_id(update.content_type_id).model_class(), update.object_id)
+            for update in updates
+        )
+        SearchIndexUpdate.objects.filter(pk__in=[update.pk for update in updates]).delete()
+    return len(updates)
+
+
+def update_search_index(objects: Iterable[Tuple[Type[models.Model], int]]) -> None:
+    pending = {}
+    for model, pk in objects:
+        pending.setdefault(model, set()).add(pk)
+
+    if Dataset in pending:
+        # Requests are indexed with titles of their datasets.
+        pending.setdefault(Request, set()).update(RequestObject.objects.filter(
+            content_type=ContentType.objects.get_for_model(Dataset),
+            object_id__in=pending[Dataset],
+        ).values_list('request_id', flat=True))
+
+    for using in connection_router.for_write():
+        backend = connections[using].get_backend()
+        unified_index = connections[using].get_unified_index()
+        for model, ids in pending.items():
+            try:
+                index = unified_index.get_index(model)
+            except NotHandled:
+                continue
+            objs = list(index.index_queryset(using=using).filter(pk__in=ids))
+            if objs:
+                backend.update(index, objs)
+            for pk in ids - {obj.pk for obj in objs}:
+                backend.remove(f'{model._meta.app_label}.{model._meta.model_name}.{pk}')
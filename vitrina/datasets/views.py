@@ -20,10 +20,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib.contenttypes.models import ContentType
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import QuerySet, Count, Max, Q, Avg, Sum
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse
+from django.db.models import QuerySet, Count, Max, Q, Sum, F, OuterRef, Subquery, ExpressionWrapper, FloatField
+from django.db.models.functions import NullIf
+from django.http import JsonResponse, HttpResponseRedirect, HttpResponse, Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy, resolve
+from django.utils.html import format_html
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -49,6 +51,7 @@ from parler.views import TranslatableUpdateView, TranslatableCreateView, Languag
 from vitrina.api.models import ApiKey
 from vitrina.helpers import email
 from vitrina.messages.models import Subscription, SentMail
+from vitrina.messages.services import get_subscriptions, queue_email
 from vitrina.orgs.views import ORGANIZATION_REPRESENTATIVE_CREATE_EMAIL_IDENTIFIER, \
     DATASET_REPRESENTATIVE_CREATE_EMAIL_IDENTIFIER
 from vitrina.plans.models import Plan, PlanDataset
@@ -56,29 +59,32 @@ from vitrina.projects.models import Project
 from vitrina.comments.models import Comment
 from vitrina.requests.models import RequestObject, RequestAssignment
 from vitrina.settings import ELASTIC_FACET_SIZE
-from vitrina.statistics.models import DatasetStats, ModelDownloadStats
+from vitrina.statistics.models import DatasetStats, DatasetStatsRollup, ModelDownloadStatsRollup, \
+    StatsRollup
+from vitrina.statistics.services import get_row_period_key, get_rollup_period
 from vitrina.statistics.views import StatsMixin
 from vitrina.structure.models import Model, Metadata, Property
-from vitrina.structure.services import create_structure_objects, get_model_name
+from vitrina.structure.services import create_structure_objects, get_model_name, queue_structure_import
 from vitrina.structure.views import DatasetStructureMixin
 from vitrina.tasks.models import Task
-from vitrina.views import HistoryView, HistoryMixin, PlanMixin
+from vitrina.tasks.services import create_tasks
+from vitrina.views import HistoryView, HistoryMixin, PlanMixin, get_versions_for
 from vitrina.datasets.forms import DatasetStructureImportForm, DatasetForm, DatasetSearchForm, AddProjectForm, \
     DatasetAttributionForm, DatasetCategoryForm, DatasetRelationForm, DatasetPlanForm, PlanForm, AddRequestForm
 from vitrina.datasets.forms import DatasetMemberUpdateForm, DatasetMemberCreateForm
 from vitrina.datasets.services import update_facet_data, get_projects, get_frequency_and_format, \
     get_requests, get_datasets_for_user, sort_publication_stats, sort_publication_stats_reversed, \
-    get_total_by_indicator_from_stats, has_remove_from_request_perm, get_values_for_frequency, get_query_for_frequency, \
+    get_total_by_indicator_from_stats, has_remove_from_request_perm, \
     manage_subscriptions_for_representative
 from vitrina.datasets.models import Dataset, DatasetStructure, DatasetGroup, DatasetAttribution, Type, DatasetRelation, \
     Relation, DatasetFile
 from vitrina.classifiers.models import Category, Frequency
-from vitrina.helpers import get_selected_value, Filter, DateFilter, send_email_with_logging, \
-    get_stats_filter_options_based_on_model
+from vitrina.helpers import get_selected_value, Filter, DateFilter, send_email_with_logging
 from vitrina.orgs.helpers import is_org_dataset_list
 from vitrina.orgs.models import Organization, Representative
 from vitrina.orgs.services import has_perm, Action, hash_api_key
 from vitrina.resources.models import DatasetDistribution, Format
+from vitrina.resources.services import get_distribution_preview
 from vitrina.users.models import User
 from vitrina.helpers import get_current_domain
 
@@ -227,10 +233,10 @@ class DatasetListView(PermissionRequiredMixin, PlanMixin, FacetedSearchView):
                     *filter_args,
                     'tags',
                     _("Žymė"),
-                    Dataset,
+                    Dataset.tags.tag_model,
                     multiple=True,
                     is_int=False,
-                    display_method="get_tag_title"
+                    use_str=True,
                 ),
                 Filter(
                     *filter_args,
@@ -448,39 +454,7 @@ class DatasetDistributionPreviewView(ListView):
         )
         data = []
         if distribution.is_previewable():
-            if 'xlsx' in distribution.file.path:
-                read_data = pd.ExcelFile(distribution.file.path)
-                read_data = {
-                    sheet_name: read_data.parse(sheet_name) for sheet_name in read_data.sheet_names
-                }
-                if len(read_data.keys()) > 1:
-                    data = [['Only one sheet is allowed in file']]
-                else:
-                    read_data = read_data[next(iter(read_data))]
-                    headers = read_data.columns.values
-                    first_5_values = read_data.values.tolist()
-                    data.append(list(headers))
-                    data.extend(first_5_values[:5])
-
-            elif 'csv' in distribution.file.path:
-                read_data = None
-
-                try:
-                    read_data = pd.read_csv(distribution.file.path, delimiter=";")
-                except ValueError:
-                    try:
-                        read_data = pd.read_csv(distribution.file.path, encoding="cp1257", delimiter=";")
-                    except ValueError:
-                        pass
-                if read_data is not None:
-                    headers = read_data.columns.values
-                    first_5_values = read_data.values.tolist()
-                    data.append(list(headers))
-                    data.extend(first_5_values[:5])
-                else:
-                    data = [[_("Nepavyko nuskaityti failo")]]
-            else:
-                data = [['Only xlsx or csv files are available']]
+            data = get_distribution_preview(distribution.file.path)
         return JsonResponse({'data': data})
 
 
@@ -749,40 +723,23 @@ class DatasetUpdateView(
                     model_meta.name = get_model_name(self.object, model.name)
                     model_meta.save()
 
-        queries = []
-
-        org_subs = Subscription.objects.none()
+        filters = [Q(
+            sub_type=Subscription.DATASET,
+            content_type=get_content_type_for_model(Dataset),
+            object_id=self.object.id,
+            dataset_update_sub=True,
+        )]
         if self.object.organization:
-            org_subs = Subscription.objects.filter(Q(object_id=self.object.organization.pk) | Q(object_id=None),
-                                                   sub_type=Subscription.ORGANIZATION,
-                                                   content_type=get_content_type_for_model(Organization),
-                                                   dataset_update_sub=True)
-
-        subs = Subscription.objects.filter(sub_type=Subscription.DATASET,
-                                           content_type=get_content_type_for_model(Dataset),
-                                           object_id=self.object.id,
-                                           dataset_update_sub=True)
-
-        if org_subs:
-            subs = org_subs | subs
-
-        sub_email_list = []
-        email_data_sub = None
-        for sub in subs:
-            queries.append(Subscription.objects.filter(Q(object_id=self.object.organization.pk) | Q(object_id=None),
-                                                       sub_type=Subscription.ORGANIZATION,
-                                                       content_type=get_content_type_for_model(Organization),
-                                                       dataset_update_sub=True))
-        queries.append(Subscription.objects.filter(sub_type=Subscription.DATASET,
-                                                   content_type=get_content_type_for_model(Dataset),
-                                                   object_id=self.object.id,
-                                                   dataset_update_sub=True))
-        sub_list = [item for query in queries for item in query]
-        sorted_list = sorted(sub_list, key=lambda x: x.sub_type != Subscription.ORGANIZATION)
-
-        sub_email_list = []
-        for sub in sorted_list:
-            Task.objects.create(
+            filters.insert(0, Q(
+                Q(object_id=self.object.organization.pk) | Q(object_id=None),
+                sub_type=Subscription.ORGANIZATION,
+                content_type=get_content_type_for_model(Organization),
+                dataset_update_sub=True,
+            ))
+        subs = get_subscriptions(*filters)
+
+        create_tasks([
+            Task(
                 title=f"Duomenų rinkinys: {self.object}",
                 description=f"Atnaujintas duomenų rinkinys: {self.object}",
                 content_type=get_content_type_for_model(Dataset),
@@ -792,19 +749,17 @@ class DatasetUpdateView(
                 type=Task.DATASET,
                 user=sub.user
             )
-            if sub.user.email and sub.email_subscribed:
-                if sub.user.email not in sub_email_list:
-                    sub_email_list.append(sub.user.email)
-        if sub_email_list:
-            email(
-                sub_email_list,
-                'dataset-updated',
-                "vitrina/datasets/emails/sub/updated.md",
-                {
-                    'title': self.object,
-                    'link': "%s%s" % (get_current_domain(self.request), self.object.get_absolute_url())
-                }
-            )
+            for sub in subs
+        ])
+        queue_email(
+            [sub.user.email for sub in subs if sub.user.email and sub.email_subscribed],
+            'dataset-updated',
+            "vitrina/datasets/emails/sub/updated.md",
+            {
+                'title': self.object,
+                'link': "%s%s" % (get_current_domain(self.request), self.object.get_absolute_url())
+            }
+        )
 
         self.object.save()
         return HttpResponseRedirect(self.get_success_url())
@@ -833,25 +788,25 @@ class DatasetHistoryView(DatasetStructureMixin, PlanMixin, HistoryView):
         return context
 
     def get_history_objects(self):
-        model_ids = self.models.values_list('pk', flat=True)
+        model_ids = self.models.values('pk')
         if self.can_manage_structure:
-            property_ids = Property.objects.filter(
+            properties = Property.objects.filter(
                 model__pk__in=model_ids,
                 given=True
-            ).values_list('pk', flat=True)
+            )
         else:
-            property_ids = Property.objects.filter(
+            properties = Property.objects.filter(
                 model__pk__in=model_ids,
                 given=True,
                 metadata__access__gte=Metadata.PUBLIC,
-            ).values_list('pk', flat=True)
+            )
 
-        property_history_objects = Version.objects.get_for_model(Property).filter(object_id__in=list(property_ids))
-        model_history_objects = Version.objects.get_for_model(Model).filter(object_id__in=list(model_ids))
+        property_history_objects = get_versions_for(Property, properties)
+        model_history_objects = get_versions_for(Model, self.models)
         dataset_history_objects = Version.objects.get_for_object(self.object)
 
-        dataset_plan_ids = PlanDataset.objects.filter(dataset=self.object).values_list('plan_id', flat=True)
-        plan_history_objects = Version.objects.get_for_model(Plan).filter(object_id__in=list(dataset_plan_ids))
+        plans = Plan.objects.filter(plandataset__dataset=self.object)
+        plan_history_objects = get_versions_for(Plan, plans)
 
         history_objects = (
             property_history_objects |
@@ -914,8 +869,20 @@ class DatasetStructureImportView(
         self.object.dataset.current_structure = self.object
         self.object.dataset.save()
         set_comment(_(f'Added Structure file "{self.object.file}".'))
-        create_structure_objects(self.object)
-        self.object.dataset.save()
+        if settings.STRUCTURE_IMPORT_QUEUE:
+            job = queue_structure_import(self.object, self.request.user)
+            messages.info(self.request, format_html(
+                '{} <a href="{}">{}</a>',
+                _(
+                    "Struktūros failas įtrauktas į importo eilę. "
+                    "Struktūra bus atnaujinta, kai failas bus importuotas."
+                ),
+                reverse('structure-import-job', args=[self.dataset.pk, job.pk]),
+                _("Importo eiga"),
+            ))
+        else:
+            create_structure_objects(self.object)
+            self.object.dataset.save()
         return HttpResponseRedirect(self.get_success_url())
 
     def get_plan_object(self):
@@ -1602,6 +1569,14 @@ MODEL_INDICATOR_FIELDS = {
 }
 
 
+def get_model_download_total(indicator: str, dataset_ids: List[int]) -> int:
+    # Downloads of all models of given datasets are summed in one query.
+    return ModelDownloadStatsRollup.objects.filter(
+        period=StatsRollup.YEAR,
+        model__in=Model.objects.filter(dataset_id__in=dataset_ids).values('meta_name'),
+    ).aggregate(total=Sum(MODEL_INDICATOR_FIELDS[indicator]))['total'] or 0
+
+
 class DatasetStatsMixin(StatsMixin):
     model = Dataset
     filters_template_name = 'vitrina/datasets/filters.html'
@@ -1609,34 +1584,39 @@ class DatasetStatsMixin(StatsMixin):
     default_indicator = 'dataset-count'
     list_url = reverse_lazy('dataset-list')
 
-    def get_data_for_indicator(self, indicator, values, filter_queryset):
+    def get_data_for_indicator(self, indicator, frequency, values, ids):
+        period = get_rollup_period(frequency)
         if field := DATASET_INDICATOR_FIELDS.get(indicator):
-            data = DatasetStats.objects.filter(
-                dataset_id__in=filter_queryset.values_list('pk', flat=True)
-            ).values(*values)
+            data = DatasetStatsRollup.objects.filter(
+                period=period,
+                dataset_id__in=ids
+            ).values(*values, pk=F('dataset_id')).order_by()
             if indicator == 'level-average':
-                data = data.annotate(count=Avg(field))
+                data = data.annotate(count=Sum(field), n=Sum('maturity_level_count'))
             else:
                 data = data.annotate(count=Sum(field))
         elif field := MODEL_INDICATOR_FIELDS.get(indicator):
-            model_names = Metadata.objects.filter(
+            model_datasets = {}
+            for name, dataset_id in Metadata.objects.filter(
                 content_type=ContentType.objects.get_for_model(Model),
-                dataset__pk__in=filter_queryset.values_list('pk', flat=True)
-            ).values_list('name', flat=True)
-            data = ModelDownloadStats.objects.filter(
-                model__in=model_names
-            ).values(*values).annotate(count=Sum(field))
+                dataset__pk__in=ids
+            ).values_list('name', 'dataset_id').distinct():
+                model_datasets.setdefault(name, []).append(dataset_id)
+            data = ModelDownloadStatsRollup.objects.filter(
+                period=period,
+                model__in=model_datasets
+            ).values('model', *values).annotate(count=Sum(field)).order_by()
+            data = [
+                {**row, 'pk': dataset_id}
+                for row in data
+                for dataset_id in model_datasets[row['model']]
+            ]
         else:
-            data = filter_queryset.values(*values).annotate(count=Count('pk'))
+            data = Dataset.objects.filter(pk__in=ids).values('pk', *values).annotate(count=Count('pk')).order_by()
         return data
 
-    def get_count(self, label, indicator, frequency, data, count):
-        if data:
-            if indicator == 'object-count' or indicator == 'level-average':
-                count = data[0].get('count') or 0
-            else:
-                count += data[0].get('count') or 0
-        return count
+    def is_cumulative(self, indicator):
+        return indicator not in ('object-count', 'level-average')
 
     def get_item_count(self, data, indicator):
         count = super().get_item_count(data, indicator)
@@ -1678,123 +1658,51 @@ class DatasetStatsView(DatasetStatsMixin, DatasetListView):
         else:
             return _(f'{self.get_title_for_indicator(indicator)} pagal rinkinio būseną laike')
 
-    def update_context_data(self, context):
-        facet_fields = context.get('facets').get('fields')
-        statuses = self.get_filter_data(facet_fields)
-        datasets = context['object_list']
+    def get_display_value(self, item):
+        return str(item['display_value'])
 
-        indicator = self.request.GET.get('indicator', None) or 'dataset-count'
-        sorting = self.request.GET.get('sort', None) or 'sort-desc'
-        duration = self.request.GET.get('duration', None) or 'duration-yearly'
-        start_date = self.get_start_date()
+    def get_time_series_data(self, indicator, frequency, values, groups):
+        if indicator != 'dataset-count':
+            return super().get_time_series_data(indicator, frequency, values, groups)
+
+        # Datasets that have a status are counted by the date of their latest
+        # status change, unassigned ones by their creation date.
+        data = super().get_time_series_data(indicator, frequency, values, {
+            status: ids for status, ids in groups.items()
+            if status == Dataset.UNASSIGNED
+        })
 
-        time_chart_data = []
-        bar_chart_data = []
+        comment_statuses = {}
+        dataset_ids = []
+        for status, ids in groups.items():
+            if status != Dataset.UNASSIGNED:
+                comment_status = 'OPENED' if status == 'HAS_DATA' else status
+                comment_statuses[comment_status] = status
+                dataset_ids.extend(ids)
 
+        content_type = ContentType.objects.get_for_model(Dataset)
         most_recent_comments = Comment.objects.filter(
-            content_type=ContentType.objects.get_for_model(Dataset),
-            object_id__in=datasets.exclude(status=Dataset.UNASSIGNED).values_list('pk', flat=True),
+            content_type=content_type,
+            object_id__in=dataset_ids,
             status__isnull=False).values('object_id') \
             .annotate(latest_status_change=Max('created')).values('object_id', 'latest_status_change') \
             .order_by('latest_status_change')
 
         dataset_status = Comment.objects.filter(
-            content_type=ContentType.objects.get_for_model(Dataset),
+            content_type=content_type,
             object_id__in=most_recent_comments.values('object_id'),
-            created__in=most_recent_comments.values('latest_status_change')
-        ).values(
-            'object_id',
-            'status',
-            'created',
-            'created__year',
-            'created__quarter',
-            'created__month',
-            'created__week',
-            'created__day'
-        )
-
-        frequency, ff = get_frequency_and_format(duration)
-        labels = self.get_time_labels(start_date, frequency)
-        date_field = self.get_date_field()
-        values = get_values_for_frequency(frequency, date_field)
-
-        for status in statuses:
-            count = 0
-            data = []
-            status_dataset_ids = datasets.filter(status=status['filter_value']).values_list('pk', flat=True)
-            status_datasets = Dataset.objects.filter(pk__in=status_dataset_ids)
-
-            count_data = self.get_data_for_indicator(indicator, values, status_datasets)
-
-            for label in labels:
-                label_query = get_query_for_frequency(frequency, date_field, label)
-                if (
-                    status['filter_value'] == Dataset.UNASSIGNED or
-                    indicator != 'dataset-count'
-                ):
-                    label_count_data = count_data.filter(**label_query)
-                    count = self.get_count(label, indicator, frequency, label_count_data, count)
-                else:
-                    if status['filter_value'] == 'HAS_DATA':
-                        comm_val = 'OPENED'
-                    elif status['filter_value'] == 'INVENTORED':
-                        comm_val = 'INVENTORED'
-                    else:
-                        comm_val = status['filter_value']
-
-                    count += dataset_status.filter(
-                        status=comm_val,
-                        **label_query
-                    ).count()
-
-                if frequency == 'W':
-                    data.append({'x': _date(label.start_time, ff), 'y': count})
-                else:
-                    data.append({'x': _date(label, ff), 'y': count})
-
-            dt = {
-                'label': str(status['display_value']),
-                'data': data,
-                'borderWidth': 1,
-                'fill': True,
-            }
-            time_chart_data.append(dt)
-
-            status['count'] = self.get_item_count(data, indicator)
-            bar_chart_data.append(status)
-
-        if sorting == 'sort-desc':
-            time_chart_data = sorted(time_chart_data, key=lambda x: x['data'][-1]['y'], reverse=True)
-            bar_chart_data = sorted(bar_chart_data, key=lambda x: x['count'], reverse=True)
-        else:
-            time_chart_data = sorted(time_chart_data, key=lambda x: x['data'][-1]['y'])
-            bar_chart_data = sorted(bar_chart_data, key=lambda x: x['count'])
-
-        max_count = max([x['count'] for x in bar_chart_data]) if bar_chart_data else 0
-
-        context['title'] = self.title
-        context['current_title'] = self.current_title
-        context['tabs_template_name'] = self.tabs_template_name
-        context['filters_template_name'] = self.filters_template_name
-        context['parameter_select_template_name'] = self.parameter_select_template_name
-        context['list_url'] = self.list_url
-        context['has_time_graph'] = self.has_time_graph
-
-        context['active_filter'] = self.filter
-        context['active_indicator'] = indicator
-        context['sort'] = sorting
-        context['duration'] = duration
-
-        context['graph_title'] = self.get_graph_title(indicator)
-        context['xAxis_title'] = self.get_time_axis_title(indicator)
-        context['yAxis_title'] = self.get_title_for_indicator(indicator)
-        context['time_chart_data'] = json.dumps(time_chart_data)
-
-        context['bar_chart_data'] = bar_chart_data
-        context['max_count'] = max_count
-
-        context['options'] = get_stats_filter_options_based_on_model(Dataset, duration, sorting, indicator, filter=self.filter)
-        return context
+            created__in=most_recent_comments.values('latest_status_change'),
+            status__in=comment_statuses,
+        ).values('status', *values).annotate(count=Count('pk')).order_by()
+
+        for row in dataset_status:
+            data.append({
+                'group': comment_statuses[row['status']],
+                'period': get_row_period_key(row, values),
+                'count': row['count'],
+                'n': None,
+            })
+        return data
 
 
 class DatasetManagementsView(DatasetStatsMixin, DatasetListView):
@@ -1846,10 +1754,14 @@ class DatasetsTagsView(DatasetStatsMixin, DatasetListView):
     current_title = _("Duomenų rinkinių žymės")
     filter = 'tags'
 
+    def get_filter_data(self, facet_fields):
+        filter_data = super().get_filter_data(facet_fields)
+        tags = Dataset.tags.tag_model.objects.filter(pk__in=[item['filter_value'] for item in filter_data])
+        self.tag_names = {str(tag.pk): tag.name for tag in tags}
+        return filter_data
+
     def get_display_value(self, item):
-        if tag := Dataset.tags.tag_model.objects.filter(pk=item['filter_value']).first():
-            return tag.name
-        return item['display_value']
+        return self.tag_names.get(str(item['filter_value']), item['display_value'])
 
     def get_graph_title(self, indicator):
         if indicator == 'level-average' or indicator == 'object-count':
@@ -1913,10 +1825,17 @@ class DatasetsCategoriesView(DatasetStatsMixin, DatasetListView):
         else:
             return _(f'{self.get_title_for_indicator(indicator)} pagal rinkinio kategoriją laike')
 
+    def get_filter_data(self, facet_fields):
+        filter_data = super().get_filter_data(facet_fields)
+        categories = Category.objects.filter(pk__in=[item['filter_value'] for item in filter_data])
+        self.categories = {str(category.pk): category for category in categories}
+        return filter_data
+
     def update_item_data(self, item):
-        obj = get_object_or_404(Category, pk=item['filter_value'])
-        children = obj.get_children()
-        if len(children) > 0:
+        obj = self.categories.get(str(item['filter_value']))
+        if obj is None:
+            raise Http404
+        if not obj.is_leaf():
             item.update({
                 'full_url': reverse('dataset-stats-category-children', args=[obj.pk])
             })
@@ -1990,19 +1909,7 @@ class JurisdictionStatsView(DatasetListView):
                     single_dict = sorted(single_dict, key=lambda dd: dd['count'], reverse=False)
                 elif indicator != 'dataset-count':
                     if indicator == 'download-request-count' or indicator == 'download-object-count':
-                        models = Model.objects.filter(dataset_id__in=v).values_list('metadata__name', flat=True)
-                        total = 0
-                        if len(models) > 0:
-                            for m in models:
-                                model_stats = ModelDownloadStats.objects.filter(model=m)
-                                if len(model_stats) > 0:
-                                    for m_st in model_stats:
-                                        if indicator == 'download-request-count':
-                                            if m_st is not None:
-                                                total += m_st.model_requests
-                                        elif indicator == 'download-object-count':
-                                            if m_st is not None:
-                                                total += m_st.model_objects
+                        total = get_model_download_total(indicator, v)
                         single_dict['count'] = total
                     else:
                         stats = DatasetStats.objects.filter(dataset_id__in=v)
@@ -2079,19 +1986,7 @@ class CategoryStatsView(DatasetListView):
                     for dd in cat_datasets:
                         id_list.append(dd.pk)
                     if indicator == 'download-request-count' or indicator == 'download-object-count':
-                        models = Model.objects.filter(dataset_id__in=id_list).values_list('metadata__name', flat=True)
-                        total = 0
-                        if len(models) > 0:
-                            for m in models:
-                                model_stats = ModelDownloadStats.objects.filter(model=m)
-                                if len(model_stats) > 0:
-                                    for m_st in model_stats:
-                                        if indicator == 'download-request-count':
-                                            if m_st is not None:
-                                                total += m_st.model_requests
-                                        elif indicator == 'download-object-count':
-                                            if m_st is not None:
-                                                total += m_st.model_objects
+                        total = get_model_download_total(indicator, id_list)
                         k['stats'] = total
                     else:
                         stats = DatasetStats.objects.filter(dataset_id__in=id_list)
@@ -2159,6 +2054,40 @@ class PublicationStatsView(DatasetStatsMixin, DatasetListView):
     def get_graph_title(self, indicator):
         return _(f'{self.get_title_for_indicator(indicator)} pagal rinkinio įkėlimo datą laike')
 
+    def get_dataset_totals(self, indicator, dataset_ids):
+        if field := MODEL_INDICATOR_FIELDS.get(indicator):
+            model_datasets = {}
+            for dataset_id, name in Model.objects.filter(
+                dataset_id__in=dataset_ids
+            ).values_list('dataset_id', 'metadata__name'):
+                model_datasets.setdefault(name, []).append(dataset_id)
+            model_totals = ModelDownloadStatsRollup.objects.filter(
+                period=StatsRollup.YEAR,
+                model__in=model_datasets
+            ).values('model').annotate(total=Sum(field)).values_list('model', 'total').order_by()
+            return [
+                (dataset_id, total or 0)
+                for model, total in model_totals
+                for dataset_id in model_datasets[model]
+            ]
+        elif field := DATASET_INDICATOR_FIELDS.get(indicator):
+            stats = DatasetStatsRollup.objects.filter(
+                period=StatsRollup.YEAR,
+                dataset_id__in=dataset_ids
+            ).values('dataset_id')
+            if indicator == 'level-average':
+                stats = stats.annotate(total=ExpressionWrapper(
+                    Sum(field) / NullIf(Sum('maturity_level_count'), 0),
+                    output_field=FloatField(),
+                ))
+            else:
+                stats = stats.annotate(total=Sum(field))
+            return [
+                (dataset_id, int(total or 0))
+                for dataset_id, total in stats.values_list('dataset_id', 'total').order_by()
+            ]
+        return []
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         datasets = self.get_queryset()
@@ -2181,6 +2110,7 @@ class PublicationStatsView(DatasetStatsMixin, DatasetListView):
                 freq=frequency
             ).tolist()
 
+        published_datasets = {}
         for dataset in datasets:
             published = dataset.published
             if published is not None:
@@ -2188,40 +2118,24 @@ class PublicationStatsView(DatasetStatsMixin, DatasetListView):
                 year_stats[str(year_published)] = year_stats.get(str(year_published), 0) + 1
                 period = str(pd.to_datetime(published).to_period(frequency))
                 stats_for_period[period] = stats_for_period.get(period, 0) + 1
+                published_datasets.setdefault(str(year_published), []).append(int(dataset.pk))
 
         if indicator != 'dataset-count':
-            for yr in year_stats.keys():
-                start_date = datetime.strptime(str(yr) + "-1-1", '%Y-%m-%d')
-                end_date = datetime.strptime(str(yr) + "-12-31", '%Y-%m-%d')
-                tz = pytz.timezone('Europe/Vilnius')
-                filtered_datasets = datasets.filter(published__range=[tz.localize(start_date), tz.localize(end_date)])
-                dataset_ids = []
-                for fd in filtered_datasets:
-                    dataset_ids.append(fd.pk)
-                if indicator == 'download-request-count' or indicator == 'download-object-count':
-                    models = Model.objects.filter(dataset_id__in=dataset_ids).values_list('metadata__name', flat=True)
-                    total = 0
-                    if len(models) > 0:
-                        for m in models:
-                            model_stats = ModelDownloadStats.objects.filter(model=m)
-                            if len(model_stats) > 0:
-                                for m_st in model_stats:
-                                    if indicator == 'download-request-count':
-                                        if m_st is not None:
-                                            total += m_st.model_requests
-                                    elif indicator == 'download-object-count':
-                                        if m_st is not None:
-                                            total += m_st.model_objects
-                    year_stats[yr] = total
-                else:
-                    stats = DatasetStats.objects.filter(dataset_id__in=dataset_ids)
-                    if len(stats) > 0:
-                        total = 0
-                        for st in stats:
-                            total = get_total_by_indicator_from_stats(st, indicator, total)
-                        year_stats[yr] = total
-                    else:
-                        year_stats[yr] = 0
+            dataset_years = {
+                pk: year
+                for year, dataset_ids in published_datasets.items()
+                for pk in dataset_ids
+            }
+            year_stats = dict.fromkeys(year_stats, 0)
+            year_counts = dict.fromkeys(year_stats, 0)
+            for dataset_id, total in self.get_dataset_totals(indicator, dataset_years):
+                year_stats[dataset_years[dataset_id]] += total
+                year_counts[dataset_years[dataset_id]] += 1
+            if indicator == 'level-average':
+                year_stats = {
+                    year: int(total / year_counts[year]) if year_counts[year] else 0
+                    for year, total in year_stats.items()
+                }
         if year_stats:
             keys = list(year_stats.keys())
             values = list(year_stats.values())
@@ -2229,6 +2143,23 @@ class PublicationStatsView(DatasetStatsMixin, DatasetListView):
             year_stats = sort_publication_stats(sorting, values, keys, year_stats, sorted_value_index)
             max_count = year_stats[max(year_stats, key=lambda key: year_stats[key], default=0)]
 
+        created_year_totals = {}
+        if field := DATASET_INDICATOR_FIELDS.get(indicator):
+            if indicator == 'level-average':
+                aggregate = ExpressionWrapper(
+                    Sum(field) / NullIf(Sum('maturity_level_count'), 0),
+                    output_field=FloatField(),
+                )
+            else:
+                aggregate = Sum(field)
+            created_year_totals = dict(
+                DatasetStatsRollup.objects.filter(period=StatsRollup.YEAR).annotate(
+                    created_year=Subquery(
+                        Dataset.objects.filter(pk=OuterRef('dataset_id')).values('created__year')
+                    )
+                ).values('created_year').annotate(total=aggregate).values_list('created_year', 'total').order_by()
+            )
+
         data = []
         total = 0
         for label in labels:
@@ -2236,13 +2167,7 @@ class PublicationStatsView(DatasetStatsMixin, DatasetListView):
             if indicator == 'dataset-count':
                 total += dataset_count
             else:
-                dataset_ids = Dataset.objects.filter(created__year=label.year).values_list('pk', flat=True)
-                stat = DatasetStats.objects.filter(dataset_id__in=dataset_ids)
-                per_datasets = 0
-                if len(stat) > 0:
-                    for st in stat:
-                        per_datasets = get_total_by_indicator_from_stats(st, indicator, per_datasets)
-                total += per_datasets
+                total += int(created_year_totals.get(label.year) or 0)
 
             if frequency == 'W':
                 data.append({'x': _date(label.start_time, ff), 'y': total})
@@ -2319,20 +2244,7 @@ class YearStatsView(DatasetListView):
                     for fd in filtered_datasets:
                         dataset_ids.append(fd.pk)
                     if indicator == 'download-request-count' or indicator == 'download-object-count':
-                        models = Model.objects.filter(dataset_id__in=dataset_ids).values_list('metadata__name',
-                                                                                              flat=True)
-                        total = 0
-                        if len(models) > 0:
-                            for m in models:
-                                model_stats = ModelDownloadStats.objects.filter(model=m)
-                                if len(model_stats) > 0:
-                                    for m_st in model_stats:
-                                        if indicator == 'download-request-count':
-                                            if m_st is not None:
-                                                total += m_st.model_requests
-                                        elif indicator == 'download-object-count':
-                                            if m_st is not None:
-                                                total += m_st.model_objects
+                        total = get_model_download_total(indicator, dataset_ids)
                         quarter_stats[k] = total
                     else:
                         stats = DatasetStats.objects.filter(dataset_id__in=dataset_ids)
@@ -2394,19 +2306,7 @@ class QuarterStatsView(DatasetListView):
                 for fd in filtered_datasets:
                     dataset_ids.append(fd.pk)
                 if indicator == 'download-request-count' or indicator == 'download-object-count':
-                    models = Model.objects.filter(dataset_id__in=dataset_ids).values_list('metadata__name', flat=True)
-                    total = 0
-                    if len(models) > 0:
-                        for m in models:
-                            model_stats = ModelDownloadStats.objects.filter(model=m)
-                            if len(model_stats) > 0:
-                                for m_st in model_stats:
-                                    if indicator == 'download-request-count':
-                                        if m_st is not None:
-                                            total += m_st.model_requests
-                                    elif indicator == 'download-object-count':
-                                        if m_st is not None:
-                                            total += m_st.model_objects
+                    total = get_model_download_total(indicator, dataset_ids)
                     monthly_stats[k] = total
                 else:
                     stats = DatasetStats.objects.filter(dataset_id__in=dataset_ids)
@@ -2873,10 +2773,8 @@ class DatasetPlansHistoryView(DatasetStructureMixin, PlanMixin, HistoryView):
         return context
 
     def get_history_objects(self):
-        dataset_plan_ids = PlanDataset.objects.filter(dataset=self.object).values_list('plan_id', flat=True)
-        return Version.objects.get_for_model(Plan).filter(
-            object_id__in=list(dataset_plan_ids)
-        ).order_by('-revision__date_created')
+        plans = Plan.objects.filter(plandataset__dataset=self.object)
+        return get_versions_for(Plan, plans).order_by('-revision__date_created')
 
 
 class UpdateDatasetOrgFilters(FacetedSearchView):
@@ -2975,10 +2873,10 @@ class UpdateDatasetTagFilters(FacetedSearchView):
                 *filter_args,
                 'tags',
                 _("Žymė"),
-                Dataset,
+                Dataset.tags.tag_model,
                 multiple=True,
                 is_int=False,
-                display_method="get_tag_title",
+                use_str=True,
                 remove_search_query=True
             ),
             items = []
@@ -3,29 +3,34 @@ import math
 import datetime
 import calendar
 import mimetypes
+import threading
 from typing import Optional, List, Any
 from typing import Type
 from typing import Tuple
 from typing import Union
 from typing import Dict
+from typing import NamedTuple
 from urllib.parse import urlencode
 from itertools import groupby
 from operator import itemgetter
 
 import markdown
+import time
 from django.contrib.sites.models import Site
 from django.core.handlers.wsgi import WSGIRequest
 from django.core.handlers.wsgi import HttpRequest
 from django.core.mail import send_mail
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language
 from django.db.models import Model
 from django.urls import reverse
-from django.core.exceptions import ObjectDoesNotExist
 from django.template.loader import render_to_string, get_template
 from django.template import engines, Template, Context
 from filer.validation import validate_upload
+from parler.models import TranslatableModel
 
 from vitrina import settings
+from vitrina.cache import CacheNamespace
 from vitrina.datasets.models import Dataset
 from vitrina.orgs.helpers import is_org_dataset_list
 from haystack.forms import FacetedSearchForm
@@ -130,6 +135,10 @@ class Filter:
         if self.order:
             facet = self.order(facet)
 
+        labels = {}
+        if self.model and not self.display_method:
+            labels = get_facet_labels(self.model, [value for value, count in facet], self.use_str)
+
         show_count = 0
         for value, count in facet:
 
@@ -138,17 +147,12 @@ class Filter:
                 method = getattr(self.model, self.display_method)
                 title = method(self.model, value)
             elif self.model:
-                try:
-                    obj = self.model.objects.get(pk=value)
-                    if self.use_str:
-                        title = str(obj)
-                    else:
-                        title = obj.title
-                except ObjectDoesNotExist:
-                    if value == "-1":
-                        title = "Nepriskirta"
-                    else:
-                        continue
+                if str(value) in labels:
+                    title = labels[str(value)]
+                elif value == "-1":
+                    title = "Nepriskirta"
+                else:
+                    continue
             elif self.choices:
                 title = self.choices.get(value)
 
@@ -168,6 +172,46 @@ class Filter:
             show_count += 1
 
 
+FACET_LABELS_CACHE_TIMEOUT = 86400
+
+facet_labels_cache = CacheNamespace('facet-label', FACET_LABELS_CACHE_TIMEOUT, versioned=True)
+
+
+def get_facet_labels(
+    model: Type[Model],
+    values: List[Union[str, int]],
+    use_str: bool = False,
+) -> Dict[str, str]:
+    # Labels of all facet values are loaded with a single query and cached,
+    # cache is cleared when objects of the model are changed (see
+    # vitrina.signals).
+    ids = {str(value) for value in values if str(value).isdigit()}
+    if not ids:
+        return {}
+
+    labels_cache = facet_labels_cache.scope(model._meta.label_lower)
+    prefix = f'{get_language()}:{int(use_str)}'
+    cached = labels_cache.get_many([f'{prefix}:{pk}' for pk in ids])
+    labels = {key.rsplit(':', 1)[1]: label for key, label in cached.items()}
+
+    missing = ids - set(labels)
+    if missing:
+        objects = model.objects.all()
+        if issubclass(model, TranslatableModel):
+            objects = objects.prefetch_related('translations')
+        resolved = {
+            str(pk): str(obj) if use_str else obj.title
+            for pk, obj in objects.in_bulk([int(pk) for pk in missing]).items()
+        }
+        labels_cache.set_many({f'{prefix}:{pk}': label for pk, label in resolved.items()})
+        labels.update(resolved)
+    return labels
+
+
+def invalidate_facet_labels(sender: Type[Model], **kwargs) -> None:
+    facet_labels_cache.scope(sender._meta.label_lower).invalidate()
+
+
 DateFacetItem = Tuple[
     datetime.datetime,  # value
     int,                # count
@@ -501,6 +545,24 @@ def prepare_email_by_identifier(email_identifier, base_template_content, email_t
     return {'email_content': email_content, 'email_subject': email_subject}
 
 
+EMAIL_TEMPLATES_CHECK_INTERVAL = 1
+
+# Only versions are stored in the shared cache, compiled templates are kept in
+# memory.
+email_templates_cache = CacheNamespace('email-templates', versioned=True)
+
+
+class CompiledEmailTemplate(NamedTuple):
+    subject: Template
+    body: Template
+    version: int
+
+
+_email_templates: Dict[Tuple[str, str, bool], CompiledEmailTemplate] = {}
+_email_templates_checked = {'version': None, 'time': 0.0}
+_markdown = threading.local()
+
+
 def _get_email_tempate_from_db(name: str) -> EmailTemplate | None:
     try:
         return EmailTemplate.objects.get(identifier=name)
@@ -508,53 +570,112 @@ def _get_email_tempate_from_db(name: str) -> EmailTemplate | None:
         return None
 
 
-def email(
-    recipients: list[str],
+def _get_email_templates_version() -> int:
+    # Templates edited in other processes are noticed after
+    # EMAIL_TEMPLATES_CHECK_INTERVAL seconds.
+    checked = _email_templates_checked
+    if time.monotonic() - checked['time'] >= EMAIL_TEMPLATES_CHECK_INTERVAL:
+        checked['version'] = email_templates_cache.version
+        checked['time'] = time.monotonic()
+    return checked['version']
+
+
+def invalidate_email_templates(*args, **kwargs) -> None:
+    _email_templates.clear()
+    _email_templates_checked['time'] = 0.0
+    email_templates_cache.invalidate()
+
+
+def get_email_template(
     email_identifier: str,
     name: str,  # template name
-    context: dict[str, Any] | None = None,
     *,
-    # Allow user to override email templates via Admin.
     override: bool = True,
-) -> dict[str, str]:
-    context = context or {}
+) -> CompiledEmailTemplate:
+    # Templates are compiled once per process and recompiled only when
+    # EmailTemplate objects change (see vitrina.signals).
+    version = _get_email_templates_version()
+    key = (email_identifier, name, override)
+    compiled = _email_templates.get(key)
+    if compiled is None or compiled.version != version:
+        compiled = _compile_email_template(email_identifier, name, override, version)
+        _email_templates[key] = compiled
+    return compiled
+
+
+def _compile_email_template(
+    email_identifier: str,
+    name: str,
+    override: bool,
+    version: int,
+) -> CompiledEmailTemplate:
     email_template = None
     if override:
         email_template = _get_email_tempate_from_db(email_identifier)
     if email_template:
-        subject_template = email_template.subject
-        subject_template = Template(subject_template)
-        subject_context = Context(context)
-        subject = subject_template.render(subject_context)
-
-        template_db = email_template.template
-        template = Template(template_db)
-        context = Context(context)
-        content = template.render(context)
-        html_message = markdown.markdown(content)
-    else:
-        template_path = get_template(name)
-        with open(template_path.origin.name, encoding="utf-8") as file:
-            read_data = file.readlines()
-
-        subject_template_text = read_data[0].splitlines()[0]
-        subject_template = Template(subject_template_text)
-        subject_context = Context(context)
-        subject = subject_template.render(subject_context)
-
-        content_to_save = markdown.markdown(''.join(read_data[2:]))
-        template = Template(content_to_save)
-        context = Context(context)
-        content = template.render(context)
-        html_message = markdown.markdown(content)
-
-        EmailTemplate.objects.create(
-            version=0,
-            identifier=email_identifier,
-            template=content_to_save,
-            subject=subject_template_text,
-            title=subject_template_text
+        return CompiledEmailTemplate(
+            Template(email_template.subject),
+            Template(email_template.template),
+            version,
         )
+
+    template_path = get_template(name)
+    with open(template_path.origin.name, encoding="utf-8") as file:
+        read_data = file.readlines()
+
+    subject_template_text = read_data[0].splitlines()[0]
+    content_to_save = markdown.markdown(''.join(read_data[2:]))
+
+    # Template from the file is saved, so that it could be edited via Admin.
+    EmailTemplate.objects.get_or_create(identifier=email_identifier, defaults={
+        'version': 0,
+        'template': content_to_save,
+        'subject': subject_template_text,
+        'title': subject_template_text,
+    })
+    return CompiledEmailTemplate(
+        Template(subject_template_text),
+        Template(content_to_save),
+        version,
+    )
+
+
+def _render_markdown(text: str) -> str:
+    if not hasattr(_markdown, 'md'):
+        _markdown.md = markdown.Markdown()
+    return _markdown.md.reset().convert(text)
+
+
+def render_email(
+    email_identifier: str,
+    name: str,  # template name
+    context: dict[str, Any] | None = None,
+    *,
+    # Allow user to override email templates via Admin.
+    override: bool = True,
+) -> Tuple[str, str, str]:
+    compiled = get_email_template(email_identifier, name, override=override)
+    context = Context(context or {})
+    subject = compiled.subject.render(context)
+    content = compiled.body.render(context)
+    return subject, content, _render_markdown(content)
+
+
+def email(
+    recipients: list[str],
+    email_identifier: str,
+    name: str,  # template name
+    context: dict[str, Any] | None = None,
+    *,
+    # Allow user to override email templates via Admin.
+    override: bool = True,
+) -> dict[str, str]:
+    subject, content, html_message = render_email(
+        email_identifier,
+        name,
+        context,
+        override=override,
+    )
     try:
         send_mail(
             subject=subject,
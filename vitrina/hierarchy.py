@@ -0,0 +1,135 @@
+import bisect
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Type
+
+from django.apps import apps
+from treebeard.mp_tree import MP_Node
+
+from vitrina.cache import CacheNamespace
+
+# How often, in seconds, the shared cache is checked for trees changed by
+# other processes.
+HIERARCHY_CHECK_INTERVAL = 1
+
+
+class Hierarchy:
+    # Whole tree of an MP_Node model, loaded with one query. Nodes are shared
+    # between requests, so they must not be changed.
+
+    def __init__(self, nodes: List[MP_Node], steplen: int, with_datasets: Set[int], version: int):
+        self.nodes = sorted(nodes, key=lambda node: node.path)
+        self.paths = [node.path for node in self.nodes]
+        self.by_path = {node.path: node for node in self.nodes}
+        self.steplen = steplen
+        self.with_datasets = with_datasets
+        self.version = version
+        self.checked = time.monotonic()
+        self.children = Counter(node.path[:-steplen] for node in self.nodes if node.depth > 1)
+
+    def __contains__(self, node: MP_Node) -> bool:
+        return node.path in self.by_path
+
+    def get_root(self, node: MP_Node) -> MP_Node:
+        return self.by_path.get(node.path[:self.steplen], node)
+
+    def get_ancestors(self, node: MP_Node) -> List[MP_Node]:
+        return [
+            self.by_path[node.path[:i]]
+            for i in range(self.steplen, len(node.path), self.steplen)
+            if node.path[:i] in self.by_path
+        ]
+
+    def get_descendants(self, node: MP_Node) -> List[MP_Node]:
+        start = bisect.bisect_right(self.paths, node.path)
+        end = start
+        while end < len(self.paths) and self.paths[end].startswith(node.path):
+            end += 1
+        return self.nodes[start:end]
+
+    def get_children_count(self, node: MP_Node) -> int:
+        return self.children.get(node.path, 0)
+
+    def has_datasets(self, node: MP_Node) -> bool:
+        return node.pk in self.with_datasets
+
+
+_hierarchies: Dict[str, Hierarchy] = {}
+
+# Only versions are stored in the shared cache, trees are kept in memory.
+hierarchy_cache = CacheNamespace('hierarchy', versioned=True)
+
+
+def get_hierarchy(model: Type[MP_Node]) -> Hierarchy:
+    label = model._meta.concrete_model._meta.label_lower
+    hierarchy = _hierarchies.get(label)
+    if hierarchy is not None and time.monotonic() - hierarchy.checked < HIERARCHY_CHECK_INTERVAL:
+        return hierarchy
+
+    version = hierarchy_cache.scope(label).version
+    if hierarchy is None or hierarchy.version != version:
+        hierarchy = _build_hierarchy(model._meta.concrete_model, version)
+        _hierarchies[label] = hierarchy
+    hierarchy.checked = time.monotonic()
+    return hierarchy
+
+
+def invalidate_hierarchy(model: Type[MP_Node]) -> None:
+    label = model._meta.concrete_model._meta.label_lower
+    _hierarchies.pop(label, None)
+    hierarchy_cache.scope(label).invalidate()
+
+
+def _build_hierarchy(model: Type[MP_Node], version: int) -> Hierarchy:
+    with_datasets = set()
+    if model is apps.get_model('vitrina_classifiers', 'Category'):
+        Dataset = apps.get_model('vitrina_datasets', 'Dataset')
+        with_datasets = set(
+            Dataset.category.through.objects.
+            values_list('category_id', flat=True).
+            distinct()
+        )
+    return Hierarchy(list(model.objects.order_by('path')), model.steplen, with_datasets, version)
+
+
+def get_root(node: MP_Node) -> MP_Node:
+    hierarchy = get_hierarchy(type(node))
+    if node in hierarchy:
+        return hierarchy.get_root(node)
+    return node.get_root()
+
+
+def get_ancestors(node: MP_Node) -> List[MP_Node]:
+    hierarchy = get_hierarchy(type(node))
+    if node in hierarchy:
+        return hierarchy.get_ancestors(node)
+    return list(node.get_ancestors())
+
+
+def get_descendants(node: MP_Node) -> List[MP_Node]:
+    hierarchy = get_hierarchy(type(node))
+    if node in hierarchy:
+        return hierarchy.get_descendants(node)
+    return list(node.get_descendants())
+
+
+def get_children_count(node: MP_Node) -> int:
+    hierarchy = get_hierarchy(type(node))
+    if node in hierarchy:
+        return hierarchy.get_children_count(node)
+    return node.get_children_count()
+
+
+def get_ancestors_with_datasets(category: MP_Node) -> List[MP_Node]:
+    hierarchy = get_hierarchy(type(category))
+    if category in hierarchy:
+        return [cat for cat in hierarchy.get_ancestors(category) if hierarchy.has_datasets(cat)]
+    return [cat for cat in category.get_ancestors() if cat.dataset_set.exists()]
+
+
+def get_root_with_children(node: MP_Node) -> Optional[MP_Node]:
+    # Root organization is used as a jurisdiction only if it has children.
+    root = get_root(node)
+    if get_children_count(root) > 0:
+        return root
+    return None
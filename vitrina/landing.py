@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from cms.models import Page
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils.translation import get_language, override
+
+from vitrina.cache import CacheNamespace
+from vitrina.classifiers.models import Category
+from vitrina.cms.models import Deployment
+from vitrina.datasets.models import Dataset
+from vitrina.orgs.models import Organization
+from vitrina.projects.models import Project
+from vitrina.users.models import User
+
+# Aggregates are refreshed by scripts/refresh_landing_cache.py and dropped when
+# related objects change. Timeout only limits how stale they can get if the
+# script is not run.
+LANDING_CACHE_TIMEOUT = 60 * 60
+
+landing_cache = CacheNamespace('landing', LANDING_CACHE_TIMEOUT)
+
+
+def get_counts() -> Dict[str, int]:
+    coordinator_count = User.objects.select_related('representative').filter(
+        representative__role='coordinator'
+    ).distinct('representative__user').count()
+    manager_count = User.objects.select_related('representative').filter(
+        representative__role='manager'
+    ).exclude(representative__role='coordinator').distinct('representative__user').count()
+    user_count = User.objects.exclude(representative__role='manager').exclude(representative__role='coordinator').count()
+    return {
+        'dataset': Dataset.public.count(),
+        'organization': Organization.public.count(),
+        'project': Project.objects.filter(status='APPROVED').count(),
+        'coordinators': coordinator_count,
+        'managers': manager_count,
+        'users': user_count
+    }
+
+
+def get_top_orgs() -> List[Organization]:
+    orgs = list(
+        Organization.public.
+        filter(
+            numchild=0,
+            image__isnull=False,
+        ).
+        select_related('image').
+        annotate(datasets=Count('dataset')).
+        order_by('-datasets')[:3]
+    )
+    for org in orgs:
+        # Parent is cached on the node, so it is stored together with it.
+        org.get_parent()
+    return orgs
+
+
+def get_featured_categories() -> List[Category]:
+    return list(
+        Category.objects.
+        filter(featured=True).
+        order_by('title')
+    )
+
+
+def get_deployment() -> Optional[Deployment]:
+    return Deployment.objects.first()
+
+
+def get_menu() -> List[Dict[str, Any]]:
+    published_pages = Page.objects.public().filter(in_navigation=True).values_list('pk', flat=True)
+    pages = Page.objects.public().filter(
+        in_navigation=True,
+        node__parent__isnull=True
+    ).order_by('node__path')
+    return [
+        {
+            'title': page.get_menu_title(),
+            'url': page.get_redirect() or page.get_absolute_url(),
+            'children': [
+                {
+                    'title': child.item.get_menu_title(),
+                    'url': child.item.get_redirect() or child.item.get_absolute_url(),
+                }
+                for child in page.node.children.filter(cms_pages__pk__in=published_pages)
+            ],
+        }
+        for page in pages
+    ]
+
+
+AGGREGATES: Dict[str, Callable[[], Any]] = {
+    'counts': get_counts,
+    'orgs': get_top_orgs,
+    'categories': get_featured_categories,
+    'deployment': get_deployment,
+}
+
+# These are computed for each language.
+LOCALIZED_AGGREGATES: Dict[str, Callable[[], Any]] = {
+    'menu': get_menu,
+}
+
+
+def _get_key(name: str, language: str | None = None) -> str:
+    if language:
+        return f'{name}:{language}'
+    return name
+
+
+def _get_keys(name: str) -> List[str]:
+    if name in LOCALIZED_AGGREGATES:
+        return [_get_key(name, language) for language, _ in settings.LANGUAGES]
+    return [_get_key(name)]
+
+
+def get_aggregate(name: str) -> Any:
+    if name in LOCALIZED_AGGREGATES:
+        key = _get_key(name, get_language())
+        build = LOCALIZED_AGGREGATES[name]
+    else:
+        key = _get_key(name)
+        build = AGGREGATES[name]
+    return landing_cache.get_or_set(key, build)
+
+
+def refresh_aggregates() -> List[str]:
+    keys = []
+    for name, build in AGGREGATES.items():
+        landing_cache.set(_get_key(name), build())
+        keys.append(_get_key(name))
+    for name, build in LOCALIZED_AGGREGATES.items():
+        for language, _ in settings.LANGUAGES:
+            with override(language):
+                landing_cache.set(_get_key(name, language), build())
+            keys.append(_get_key(name, language))
+    return keys
+
+
+def invalidate_aggregates(*names: str) -> None:
+    keys = [key for name in names for key in _get_keys(name)]
+
+    def invalidate():
+        landing_cache.delete_many(keys)
+
+    # Other processes could compute aggregates again before the change is
+    # committed, so they are dropped once more after commit.
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vitrina_messages', '0014_auto_20241007_1348'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedMail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('identifier', models.CharField(blank=True, max_length=255, null=True)),
+                ('recipients', models.JSONField(default=list)),
+                ('email_subject', models.TextField(blank=True, null=True)),
+                ('email_content', models.TextField(blank=True, null=True)),
+                ('html_message', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'queued_mail',
+            },
+        ),
+    ]
@@ -71,6 +71,18 @@ class SentMail(models.Model):
         db_table = 'sent_mail'
 
 
+class QueuedMail(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+    identifier = models.CharField(max_length=255, blank=True, null=True)
+    recipients = models.JSONField(default=list)
+    email_subject = models.TextField(blank=True, null=True)
+    email_content = models.TextField(blank=True, null=True)
+    html_message = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'queued_mail'
+
+
 # TODO: Make generic.
 class UserSubscription(models.Model):
     created = models.DateTimeField(blank=True, null=True, auto_now_add=True)
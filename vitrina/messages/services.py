@@ -0,0 +1,163 @@
+import logging
+from typing import Any, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+
+from vitrina.helpers import render_email
+from vitrina.messages.models import QueuedMail, SentMail, Subscription
+
+logger = logging.getLogger(__name__)
+
+
+def get_subscriptions(*filters: Q, exclude_user=None) -> List[Subscription]:
+    # Subscriptions matching any of the filters are loaded with one query. A
+    # user gets only one subscription, the one matching the first filter, which
+    # is available as `subscription.priority`. Flags of other subscriptions of
+    # the same user are merged into it, so that, for example, comment flag of
+    # an organization subscription is not lost, when the user is also
+    # subscribed to the dataset.
+    subscriptions = (
+        Subscription.objects.
+        filter(Q(*filters, _connector=Q.OR)).
+        annotate(priority=Case(
+            *(When(f, then=Value(i)) for i, f in enumerate(filters)),
+            output_field=IntegerField(),
+        )).
+        select_related('user').
+        order_by('priority', 'pk')
+    )
+    if exclude_user is not None:
+        subscriptions = subscriptions.exclude(user=exclude_user)
+
+    flags = [
+        field.attname
+        for field in Subscription._meta.fields
+        if isinstance(field, BooleanField)
+    ]
+    users = {}
+    for subscription in subscriptions:
+        if subscription.user_id not in users:
+            users[subscription.user_id] = subscription
+            continue
+        merged = users[subscription.user_id]
+        for flag in flags:
+            if getattr(subscription, flag):
+                setattr(merged, flag, True)
+    return list(users.values())
+
+
+def queue_email(
+    recipients: Iterable[str],
+    email_identifier: str,
+    name: str,  # template name
+    context: dict[str, Any] | None = None,
+) -> None:
+    # Subscribers can be numerous, so e-mails are rendered here, but sent by
+    # scripts/mail_worker.py.
+    recipients = list(dict.fromkeys(recipients))
+    if not recipients:
+        return
+    subject, content, html_message = render_email(email_identifier, name, context)
+    mail = QueuedMail.objects.create(
+        identifier=email_identifier,
+        recipients=recipients,
+        email_subject=subject,
+        email_content=content,
+        html_message=html_message,
+    )
+    if not settings.MAIL_QUEUE:
+        transaction.on_commit(lambda: send_queued_mail(pks=[mail.pk]))
+
+
+def send_queued_mail(batch_size: int = 100, pks: List[int] = None) -> int:
+    # Every recipient gets a separate message, all of them are sent over one
+    # connection.
+    with transaction.atomic():
+        queued = QueuedMail.objects.select_for_update(skip_locked=True).order_by('pk')
+        if pks is not None:
+            queued = queued.filter(pk__in=pks)
+        queued = list(queued[:batch_size])
+        if not queued:
+            return 0
+
+        connection = get_connection()
+        connection.open()
+        try:
+            sent = _send_queued_mail(connection, queued)
+        finally:
+            connection.close()
+
+        SentMail.objects.bulk_create(sent)
+        QueuedMail.objects.filter(pk__in=[mail.pk for mail in queued]).delete()
+    return len(queued)
+
+
+def email_many(
+    email_identifier: str,
+    name: str,  # template name
+    messages: Iterable[Tuple[str, dict[str, Any]]],  # recipient and its context
+) -> int:
+    # Same as vitrina.helpers.email, but every recipient gets a message
+    # rendered with its own context, all messages are sent over one connection.
+    connection = get_connection()
+    rendered = []
+    for recipient, context in messages:
+        subject, content, html_message = render_email(email_identifier, name, context)
+        rendered.append(_build_message(connection, recipient, subject, str(content), html_message))
+    if not rendered:
+        return 0
+    SentMail.objects.bulk_create(_send_messages(connection, email_identifier, rendered))
+    return len(rendered)
+
+
+def _build_message(connection, recipient, subject, content, html_message):
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient],
+        connection=connection,
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def _send_messages(connection, email_identifier, messages) -> List[SentMail]:
+    try:
+        connection.send_messages(messages)
+        email_sent = True
+    except Exception:
+        logger.warning("Email was not sent: %s", email_identifier, exc_info=True)
+        email_sent = False
+    # Recipient is stored the same way as in vitrina.helpers.email.
+    return [
+        SentMail(
+            version=0,
+            recipient=str(message.to),
+            email_subject=message.subject,
+            email_content=message.body,
+            email_sent=email_sent,
+            identifier=email_identifier,
+        )
+        for message in messages
+    ]
+
+
+def _send_queued_mail(connection, queued):
+    sent = []
+    for mail in queued:
+        messages = [
+            _build_message(
+                connection,
+                recipient,
+                mail.email_subject,
+                mail.email_content,
+                mail.html_message,
+            )
+            for recipient in mail.recipients
+        ]
+        sent.extend(_send_messages(connection, mail.identifier, messages))
+    return sent
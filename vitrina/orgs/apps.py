@@ -6,3 +6,6 @@ class OrgsConfig(AppConfig):
     name = 'vitrina.orgs'
     label = 'vitrina_orgs'
     verbose_name = _("Organizations")
+
+    def ready(self):
+        import vitrina.orgs.signals
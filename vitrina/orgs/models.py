@@ -6,6 +6,7 @@ from django.urls import reverse
 from filer.fields.image import FilerImageField
 from treebeard.mp_tree import MP_Node, MP_NodeManager
 
+from vitrina.hierarchy import get_ancestors, get_descendants, invalidate_hierarchy
 from vitrina.orgs.managers import PublicOrganizationManager
 
 from django.utils.translation import gettext_lazy as _
@@ -108,9 +109,14 @@ class Organization(MP_Node):
     def get_absolute_url(self):
         return reverse('organization-detail', kwargs={'pk': self.pk})
 
+    def move(self, target, pos=None):
+        # Nodes are moved with queryset updates, that do not send signals.
+        super().move(target, pos)
+        invalidate_hierarchy(Organization)
+
     def get_acl_parents(self):
         parents = [self]
-        parents.extend(self.get_ancestors())
+        parents.extend(get_ancestors(self))
         return parents
 
     def dataset_tags(self):
@@ -175,7 +181,7 @@ class Representative(models.Model):
 
     def is_supervisor(self, organization):
         if isinstance(self.content_object, Organization):
-            if organization in self.content_object.get_descendants():
+            if organization in get_descendants(self.content_object):
                 return True
         return False
 
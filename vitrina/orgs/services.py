@@ -1,17 +1,16 @@
-import functools
-import operator
 from enum import Enum
-from typing import Type
+from typing import Dict, Set, Tuple, Type
 
 from django.contrib.admin.options import get_content_type_for_model
 from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Model
-from django.db.models import Q
 
 from vitrina import settings
+from vitrina.cache import CacheNamespace
 from vitrina.datasets.models import Dataset, DatasetStructure
 from vitrina.helpers import email
+from vitrina.hierarchy import get_ancestors
 from vitrina.messages.models import Subscription
 from vitrina.orgs.models import Representative, Organization
 from vitrina.projects.models import Project
@@ -81,9 +80,58 @@ acl = {
 }
 
 
+class UserRoles:
+    # All roles of a user, loaded once and then used to answer all permission
+    # checks of a request.
+
+    def __init__(self, version: int, roles: Set[Tuple[int, int, str]]):
+        self.version = version
+        self.roles = roles
+        self.organizations = {
+            object_id
+            for content_type_id, object_id, role in roles
+            if content_type_id == ContentType.objects.get_for_model(Organization).pk
+        }
+
+    def has_role(self, node: Model, role: str) -> bool:
+        return (ContentType.objects.get_for_model(node).pk, node.pk, role) in self.roles
+
+
+user_roles_cache = CacheNamespace('user-roles', settings.USER_ROLES_CACHE_TIMEOUT, versioned=True)
+
+
+# Roles are kept on the user instance, which lives for one request, so the
+# shared cache is read once per request. Changes made in this process are
+# noticed right away, changes made by other processes on the next request.
+_local_changes: Dict[int, int] = {}
+
+
+def get_user_roles(user: User) -> UserRoles:
+    changes = _local_changes.get(user.pk, 0)
+    roles = getattr(user, '_roles', None)
+    if roles is None or getattr(user, '_roles_changes', None) != changes:
+        roles_cache = user_roles_cache.scope(user.pk)
+        version = roles_cache.version
+        roles = roles_cache.get_or_set('roles', lambda: UserRoles(version, set(
+            Representative.objects.
+            filter(user=user).
+            values_list('content_type_id', 'object_id', 'role')
+        )))
+        user._roles = roles
+        user._roles_changes = changes
+    return roles
+
+
+def invalidate_user_roles(user_id: int | None) -> None:
+    if user_id is None:
+        return
+    _local_changes[user_id] = _local_changes.get(user_id, 0) + 1
+    user_roles_cache.scope(user_id).invalidate()
+
+
 def is_author(user: User, node: Model) -> bool:
     if isinstance(node, (Dataset, Request, Project)):
-        return node.user == user
+        return node.user_id == user.pk
     elif isinstance(node, User):
         return node == user
     elif isinstance(node, Organization):
@@ -92,10 +140,10 @@ def is_author(user: User, node: Model) -> bool:
 
 
 def is_supervisor(user: User, node: Model) -> bool:
+    # User is a supervisor of all organizations below the ones they represent.
     if isinstance(node, Organization):
-        for rep in user.representative_set.all():
-            if rep.is_supervisor(node):
-                return True
+        organizations = get_user_roles(user).organizations
+        return any(org.pk in organizations for org in get_ancestors(node))
     return False
 
 
@@ -137,7 +185,6 @@ def has_perm(
         model = type(obj)
         nodes = get_parents(obj)
 
-    where = []
     if acl.get((model, action)):
         for role in acl[(model, action)]:
             if role == Role.ALL:
@@ -150,16 +197,8 @@ def has_perm(
                     elif role == Role.SUPERVISOR:
                         if is_supervisor(user, node):
                             return True
-                    else:
-                        ct = ContentType.objects.get_for_model(node)
-                        where.append(Q(
-                            content_type=ct,
-                            object_id=node.pk,
-                            role=role.value,
-                        ))
-    if where:
-        where = functools.reduce(operator.or_, where)
-        return Representative.objects.filter(where, user=user).exists()
+                    elif get_user_roles(user).has_role(node, role.value):
+                        return True
     return False
 
 
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from vitrina.orgs.models import Representative
+from vitrina.orgs.services import invalidate_user_roles
+
+
+@receiver(pre_save, sender=Representative)
+def invalidate_old_user_roles(sender, instance, **kwargs):
+    if instance.pk:
+        for user_id in Representative.objects.filter(pk=instance.pk).values_list('user_id', flat=True):
+            invalidate_user_roles(user_id)
+
+
+@receiver(post_save, sender=Representative)
+@receiver(post_delete, sender=Representative)
+def invalidate_representative_user_roles(sender, instance, **kwargs):
+    invalidate_user_roles(instance.user_id)
@@ -23,7 +23,6 @@ from django.utils.text import slugify
 from django.views.generic.edit import FormView
 from itsdangerous import URLSafeSerializer, BadSignature
 from reversion import set_comment
-from reversion.models import Version
 
 from vitrina.messages.models import SentMail
 from vitrina.requests.models import RequestAssignment
@@ -58,7 +57,7 @@ from vitrina.users.forms import RepresentativeRegisterForm
 from vitrina.users.models import User
 from vitrina.users.views import RegisterView
 from vitrina.tasks.models import Task
-from vitrina.views import PlanMixin, HistoryView
+from vitrina.views import PlanMixin, HistoryView, get_versions_for
 from allauth.socialaccount.models import SocialAccount
 from vitrina.helpers import email, get_current_domain
 from django.http import HttpResponse
@@ -2326,10 +2325,8 @@ class OrganizationPlansHistoryView(PlanMixin, HistoryView):
     tabs_template_name = 'vitrina/orgs/tabs.html'
 
     def get_history_objects(self):
-        organization_plan_ids = Plan.objects.filter(receiver=self.object).values_list('pk', flat=True)
-        return Version.objects.get_for_model(Plan).filter(
-            object_id__in=list(organization_plan_ids)
-        ).order_by('-revision__date_created')
+        plans = Plan.objects.filter(receiver=self.object)
+        return get_versions_for(Plan, plans).order_by('-revision__date_created')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 
+from vitrina.hierarchy import get_root_with_children
 from vitrina.orgs.models import Organization
 from vitrina.requests.managers import PublicRequestManager
 from vitrina.users.models import User
@@ -135,8 +136,8 @@ class Request(models.Model):
     def jurisdiction(self):
         jurisdictions = []
         for item in self.requestassignment_set.all():
-            root_org = item.organization.get_root()
-            if root_org.get_children_count() > 0:
+            root_org = get_root_with_children(item.organization)
+            if root_org:
                 jurisdictions.append(root_org.pk)
         return jurisdictions
 
@@ -1,5 +1,6 @@
 from haystack.fields import CharField, MultiValueField, DateTimeField, EdgeNgramField
 from haystack.indexes import SearchIndex, Indexable
+from vitrina.hierarchy import get_ancestors_with_datasets
 from vitrina.requests.models import Request
 
 
@@ -26,6 +27,6 @@ class RequestIndex(SearchIndex, Indexable):
         categories = []
         if obj.dataset and obj.dataset.category:
             for category in obj.dataset.category.all():
-                categories = [cat.pk for cat in category.get_ancestors() if cat.dataset_set.exists()]
+                categories = [cat.pk for cat in get_ancestors_with_datasets(category)]
                 categories.append(category.pk)
         return categories
@@ -1,10 +1,9 @@
 from typing import List, Any, Dict, Type
 
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import HttpRequest
 
-from vitrina.helpers import get_filter_url
+from vitrina.helpers import get_facet_labels, get_filter_url
 from vitrina.orgs.models import Representative, Organization
 from vitrina.orgs.services import has_perm, Action
 
@@ -18,14 +17,13 @@ def update_facet_data(
 ) -> List[Any]:
     updated_facet_data = []
     if facet_fields and field_name in facet_fields:
+        labels = {}
+        if model_class:
+            labels = get_facet_labels(model_class, [facet[0] for facet in facet_fields[field_name]])
         for facet in facet_fields[field_name]:
             display_value = facet[0]
             if model_class:
-                try:
-                    obj = model_class.objects.get(pk=facet[0])
-                    display_value = obj.title
-                except ObjectDoesNotExist:
-                    display_value = "Nepriskirta"
+                display_value = labels.get(str(facet[0]), "Nepriskirta")
             elif choices:
                 display_value = choices.get(facet[0])
             elif facet[0] == "UNASSIGNED":
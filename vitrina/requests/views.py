@@ -16,14 +16,13 @@ from django.views.generic.base import View
 
 from vitrina.settings import ELASTIC_FACET_SIZE
 from vitrina.requests.forms import RequestDatasetsEditForm
-from django.db.models import Count, Q, Case, When
+from django.db.models import Count, Q, Case, When, F
 from django.template.defaultfilters import date as _date
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
 from haystack.generic_views import FacetedSearchView
 from reversion import set_comment
-from reversion.models import Version
 from reversion.views import RevisionMixin
 from typing import List
 from urllib.parse import urlencode
@@ -34,13 +33,12 @@ from vitrina.comments.models import Comment
 from vitrina.datasets.forms import PlanForm
 from vitrina.datasets.models import Dataset, DatasetGroup
 from vitrina.datasets.services import (get_frequency_and_format,
-                                       get_query_for_frequency,
-                                       get_values_for_frequency,
                                        sort_publication_stats,
                                        get_requests)
 from vitrina.helpers import DateFilter, Filter, get_selected_value, \
     get_stats_filter_options_based_on_model, email, get_current_domain
 from vitrina.messages.models import Subscription
+from vitrina.messages.services import get_subscriptions
 from vitrina.orgs.models import Representative
 from vitrina.orgs.services import Action, has_perm
 from vitrina.plans.models import Plan, PlanRequest
@@ -57,8 +55,9 @@ from vitrina.requests.services import update_facet_data
 from vitrina.statistics.views import StatsMixin
 from vitrina.structure.models import Model, Property
 from vitrina.tasks.models import Task
+from vitrina.tasks.services import create_tasks
 from vitrina.users.models import User
-from vitrina.views import HistoryView, HistoryMixin, PlanMixin
+from vitrina.views import HistoryView, HistoryMixin, PlanMixin, get_versions_for
 from django.contrib import messages
 from django.http.response import HttpResponsePermanentRedirect, Http404
 from vitrina.requests.forms import RequestPlanForm
@@ -201,23 +200,20 @@ class RequestStatsMixin(StatsMixin):
     default_indicator = 'request-count'
     list_url = reverse_lazy('request-list')
 
-    def get_data_for_indicator(self, indicator, values, filter_queryset):
+    def get_data_for_indicator(self, indicator, frequency, values, ids):
         if indicator == 'request-count':
-            data = filter_queryset.values(*values).annotate(count=Count('pk'))
+            data = Request.objects.filter(pk__in=ids).values('pk', *values).annotate(count=Count('pk'))
         elif indicator == 'request-count-open':
-            data = filter_queryset.filter(status=Request.CREATED).values(*values).annotate(count=Count('pk'))
+            data = Request.objects.filter(pk__in=ids, status=Request.CREATED).values('pk', *values).annotate(
+                count=Count('pk')
+            )
         else:
-            data = (PlanRequest.objects.filter(request_id__in=filter_queryset, plan__deadline__lt=datetime.now())
-                    .values(*values).annotate(count=Count('request')))
-        return data
-
-    def get_count(self, label, indicator, frequency, data, count):
-        if data:
-            if indicator == 'object-count' or indicator == 'level-average':
-                count = data[0].get('count') or 0
-            else:
-                count += data[0].get('count') or 0
-        return count
+            data = (PlanRequest.objects.filter(request_id__in=ids, plan__deadline__lt=datetime.now())
+                    .values(*values, pk=F('request_id')).annotate(count=Count('request')))
+        return data.order_by()
+
+    def is_cumulative(self, indicator):
+        return indicator not in ('object-count', 'level-average')
 
     def get_item_count(self, data, indicator):
         count = super().get_item_count(data, indicator)
@@ -250,94 +246,8 @@ class RequestStatusStatsView(RequestStatsMixin, RequestListView):
     def get_graph_title(self, indicator):
         return _(f'{self.get_title_for_indicator(indicator)} pagal poreikio būseną laike')
 
-    def update_context_data(self, context):
-        facet_fields = context.get('facets').get('fields')
-        statuses = self.get_filter_data(facet_fields)
-        requests = context['object_list']
-
-        indicator = self.request.GET.get('indicator', None) or 'request-count'
-        sorting = self.request.GET.get('sort', None) or 'sort-desc'
-        duration = self.request.GET.get('duration', None) or 'duration-yearly'
-        start_date = self.get_start_date()
-
-        time_chart_data = []
-        bar_chart_data = []
-
-        frequency, ff = get_frequency_and_format(duration)
-        labels = self.get_time_labels(start_date, frequency)
-        date_field = self.get_date_field()
-        values = get_values_for_frequency(frequency, date_field)
-
-        for status in statuses:
-            count = 0
-            data = []
-            status_request_ids = requests.filter(status=status['filter_value']).values_list('pk', flat=True)
-            status_requests = Request.objects.filter(pk__in=status_request_ids)
-
-            count_data = self.get_data_for_indicator(indicator, values, status_requests)
-
-            for label in labels:
-                label_query = get_query_for_frequency(frequency, date_field, label)
-                if (
-                    indicator == 'request-count'
-                ):
-                    label_count_data = count_data.filter(**label_query)
-                    count = self.get_count(label, indicator, frequency, label_count_data, count)
-                elif (
-                    indicator == 'request-count-open'
-                ):
-                    label_count_data = count_data.filter(**label_query)
-                    count = self.get_count(label, indicator, frequency, label_count_data, count)
-                else:
-                    label_count_data = count_data.filter(**label_query)
-                    count = self.get_count(label, indicator, frequency, label_count_data, count)
-
-                if frequency == 'W':
-                    data.append({'x': _date(label.start_time, ff), 'y': count})
-                else:
-                    data.append({'x': _date(label, ff), 'y': count})
-
-            dt = {
-                'label': str(status['display_value']),
-                'data': data,
-                'borderWidth': 1,
-                'fill': True,
-            }
-            time_chart_data.append(dt)
-
-            status['count'] = self.get_item_count(data, indicator)
-            bar_chart_data.append(status)
-
-        if sorting == 'sort-desc':
-            time_chart_data = sorted(time_chart_data, key=lambda x: x['data'][-1]['y'], reverse=True)
-            bar_chart_data = sorted(bar_chart_data, key=lambda x: x['count'], reverse=True)
-        else:
-            time_chart_data = sorted(time_chart_data, key=lambda x: x['data'][-1]['y'])
-            bar_chart_data = sorted(bar_chart_data, key=lambda x: x['count'])
-
-        max_count = max([x['count'] for x in bar_chart_data]) if bar_chart_data else 0
-
-        context['title'] = self.title
-        context['current_title'] = self.current_title
-        context['tabs_template_name'] = self.tabs_template_name
-        context['filters_template_name'] = self.filters_template_name
-        context['parameter_select_template_name'] = self.parameter_select_template_name
-        context['list_url'] = self.list_url
-        context['has_time_graph'] = self.has_time_graph
-
-        context['active_filter'] = self.filter
-
-        context['graph_title'] = self.get_graph_title(indicator)
-        context['xAxis_title'] = self.get_time_axis_title(indicator)
-        context['yAxis_title'] = self.get_title_for_indicator(indicator)
-        context['time_chart_data'] = json.dumps(time_chart_data)
-
-        context['bar_chart_data'] = bar_chart_data
-        context['max_count'] = max_count
-
-        context['options'] = get_stats_filter_options_based_on_model(Request, duration, sorting, indicator)
-
-        return context
+    def get_display_value(self, item):
+        return str(item['display_value'])
 
 
 class RequestDatasetStatusStatsView(RequestStatsMixin, RequestListView):
@@ -986,41 +896,35 @@ class RequestUpdateView(
         self.object = form.save()
         set_comment(Request.EDITED)
 
-        org_subs = Subscription.objects.none()
-        if self.object.organizations.exists():
-            sub_org_ct = get_content_type_for_model(Organization)
-            org_id_list = self.object.organizations.values_list('id', flat=True)
-            org_subs = Subscription.objects.filter(Q(object_id__in=org_id_list) | Q(object_id=None),
-                                                   sub_type=Subscription.ORGANIZATION,
-                                                   content_type=sub_org_ct,
-                                                   request_update_sub=True)
-
-        sub_request_ct = get_content_type_for_model(Request)
-        subs = Subscription.objects.filter(sub_type=Subscription.REQUEST,
-                                           content_type=sub_request_ct,
-                                           object_id=self.object.id,
-                                           request_update_sub=True)
-
-        if org_subs:
-            subs = org_subs | subs
+        filters = [Q(
+            sub_type=Subscription.REQUEST,
+            content_type=get_content_type_for_model(Request),
+            object_id=self.object.id,
+            request_update_sub=True,
+        )]
+        org_id_list = list(self.object.organizations.values_list('id', flat=True))
+        if org_id_list:
+            filters.insert(0, Q(
+                Q(object_id__in=org_id_list) | Q(object_id=None),
+                sub_type=Subscription.ORGANIZATION,
+                content_type=get_content_type_for_model(Organization),
+                request_update_sub=True,
+            ))
+        subs = get_subscriptions(*filters)
 
-        sub_email_list = []
-        for sub in subs:
-            Task.objects.create(
+        create_tasks([
+            Task(
                 title=f"Redaguotas poreikis: {self.object}.",
                 description=f"Poreikis {self.object} buvo redaguotas.",
                 content_type=ContentType.objects.get_for_model(self.object),
                 object_id=self.object.pk,
-                organization=sub.content_object if isinstance(sub.content_object, Organization) else None,
+                organization_id=sub.object_id if sub.sub_type == Subscription.ORGANIZATION else None,
                 status=Task.CREATED,
                 type=Task.REQUEST,
                 user=sub.user
             )
-            if sub.user.email and sub.email_subscribed:
-                if sub.user.organization:
-                    orgs = [sub.user.organization] + list(sub.user.organization.get_descendants())
-                    sub_email_list = [org.email for org in orgs]
-                sub_email_list.append(sub.user.email)
+            for sub in subs
+        ])
         return HttpResponseRedirect(self.get_success_url())
 
     def has_permission(self):
@@ -1291,10 +1195,8 @@ class RequestPlansHistoryView(PlanMixin, HistoryView):
     tabs_template_name = 'vitrina/requests/tabs.html'
 
     def get_history_objects(self):
-        request_plan_ids = PlanRequest.objects.filter(request=self.object).values_list('plan_id', flat=True)
-        return Version.objects.get_for_model(Plan).filter(
-            object_id__in=list(request_plan_ids)
-        ).order_by('-revision__date_created')
+        plans = Plan.objects.filter(planrequest__request=self.object)
+        return get_versions_for(Plan, plans).order_by('-revision__date_created')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
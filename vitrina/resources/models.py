@@ -197,3 +197,26 @@ class DatasetDistribution(models.Model):
             'resource_id': self.pk
         })
 
+
+class LinkCheck(models.Model):
+    # Last result of checking an external distribution URL, see
+    # vitrina.resources.services.check_links.
+    url = models.TextField(unique=True)
+    checked = models.DateTimeField()
+    status_code = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    etag = models.CharField(max_length=255, blank=True, null=True)
+    last_modified = models.CharField(max_length=255, blank=True, null=True)
+
+    class Meta:
+        db_table = 'link_check'
+
+    def __str__(self):
+        return self.url
+
+    @property
+    def available(self) -> bool | None:
+        # None means, that the URL could not be checked.
+        if self.status_code is None:
+            return None
+        return 200 <= self.status_code < 400
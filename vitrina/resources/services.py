@@ -0,0 +1,190 @@
+import csv
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from vitrina.cache import CacheNamespace
+from vitrina.resources.models import LinkCheck
+
+PREVIEW_ROWS = 5
+PREVIEW_SAMPLE_SIZE = 64 * 1024
+PREVIEW_CACHE_TIMEOUT = 86400
+
+preview_cache = CacheNamespace('distribution-preview', PREVIEW_CACHE_TIMEOUT)
+
+LINK_CHECK_WORKERS = 32
+LINK_CHECK_PER_HOST = 2
+LINK_CHECK_DELAY = 1.0  # seconds between two requests to the same host
+LINK_CHECK_TIMEOUT = 30
+
+
+def get_distribution_preview(path: str, rows: int = PREVIEW_ROWS) -> List[List[Any]]:
+    # A preview depends only on the file content, so it is cached until the
+    # file is replaced.
+    key = hashlib.sha256(f'{path}:{os.path.getmtime(path)}:{rows}'.encode()).hexdigest()
+    data = preview_cache.get(key)
+    if data is None:
+        data = read_distribution_preview(path, rows)
+        if data is None:
+            return [[_("Nepavyko nuskaityti failo")]]
+        preview_cache.set(key, data)
+    return data
+
+
+def read_distribution_preview(path: str, rows: int = PREVIEW_ROWS) -> Optional[List[List[Any]]]:
+    if 'xlsx' in path:
+        return _read_xlsx_preview(path, rows)
+    elif 'csv' in path:
+        return _read_csv_preview(path, rows)
+    else:
+        return [['Only xlsx or csv files are available']]
+
+
+def _read_xlsx_preview(path, rows):
+    # openpyxl opens workbooks in read-only mode here, so only the rows that
+    # are needed are read from the file.
+    with pd.ExcelFile(path, engine='openpyxl') as excel:
+        if len(excel.sheet_names) > 1:
+            return [['Only one sheet is allowed in file']]
+        return _get_preview_rows(excel.parse(excel.sheet_names[0], nrows=rows))
+
+
+def _read_csv_preview(path, rows):
+    with open(path, 'rb') as f:
+        sample = f.read(PREVIEW_SAMPLE_SIZE)
+    encoding, delimiter = detect_csv_format(sample)
+    try:
+        data = pd.read_csv(path, encoding=encoding, delimiter=delimiter, nrows=rows)
+    except ValueError:
+        return None
+    return _get_preview_rows(data)
+
+
+def detect_csv_format(sample: bytes) -> Tuple[str, str]:
+    # Sample can end in the middle of a line or a multibyte character.
+    if len(sample) == PREVIEW_SAMPLE_SIZE and b'\n' in sample:
+        sample = sample[:sample.rindex(b'\n')]
+
+    try:
+        text = sample.decode('utf-8')
+        encoding = 'utf-8'
+    except UnicodeDecodeError:
+        text = sample.decode('cp1257', errors='replace')
+        encoding = 'cp1257'
+
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=';,\t|').delimiter
+    except csv.Error:
+        delimiter = ';'
+    return encoding, delimiter
+
+
+def _get_preview_rows(data):
+    return [list(data.columns.values), *data.values.tolist()]
+
+
+class HostLimiter:
+    # Limits how many requests are made to one host at a time and how often.
+
+    def __init__(self, per_host: int = LINK_CHECK_PER_HOST, delay: float = LINK_CHECK_DELAY):
+        self.per_host = per_host
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.next_time: Dict[str, float] = {}
+
+    def acquire(self, host: str) -> None:
+        with self.lock:
+            semaphore = self.semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        semaphore.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time.get(host, now))
+            self.next_time[host] = start + self.delay
+        time.sleep(start - now)
+
+    def release(self, host: str) -> None:
+        self.semaphores[host].release()
+
+
+def check_links(
+    urls: Iterable[str],
+    *,
+    workers: int = LINK_CHECK_WORKERS,
+    per_host: int = LINK_CHECK_PER_HOST,
+    delay: float = LINK_CHECK_DELAY,
+    timeout: float = LINK_CHECK_TIMEOUT,
+) -> Dict[str, LinkCheck]:
+    # URLs are checked concurrently, but politely for each host. Results are
+    # saved, and ETag/Last-Modified of the previous check are sent, so that
+    # unchanged resources are answered with 304.
+    urls = list(dict.fromkeys(urls))
+    previous = LinkCheck.objects.in_bulk(urls, field_name='url')
+    limiter = HostLimiter(per_host, delay)
+    local = threading.local()
+
+    def check(url: str) -> LinkCheck:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        host = urlsplit(url).netloc
+        limiter.acquire(host)
+        try:
+            return _check_link(local.session, url, previous.get(url), timeout)
+        finally:
+            limiter.release(host)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = {result.url: result for result in executor.map(check, urls)}
+
+    LinkCheck.objects.bulk_update(
+        [result for result in results.values() if result.pk],
+        ['checked', 'status_code', 'error', 'etag', 'last_modified'],
+        batch_size=500,
+    )
+    LinkCheck.objects.bulk_create(
+        [result for result in results.values() if not result.pk],
+        batch_size=500,
+    )
+    return results
+
+
+def _check_link(
+    session: requests.Session,
+    url: str,
+    previous: Optional[LinkCheck],
+    timeout: float,
+) -> LinkCheck:
+    result = previous or LinkCheck(url=url)
+    headers = {}
+    if previous and previous.available:
+        if previous.etag:
+            headers['If-None-Match'] = previous.etag
+        if previous.last_modified:
+            headers['If-Modified-Since'] = previous.last_modified
+    try:
+        resp = session.head(url, headers=headers, allow_redirects=True, timeout=timeout)
+        if resp.status_code in (405, 501):
+            # Some servers do not support HEAD, so only the first byte is
+            # requested instead.
+            headers['Range'] = 'bytes=0-0'
+            resp = session.get(url, headers=headers, allow_redirects=True, timeout=timeout, stream=True)
+            resp.close()
+    except requests.RequestException as e:
+        result.status_code = None
+        result.error = str(e)
+    else:
+        result.status_code = resp.status_code
+        result.error = None
+        result.etag = resp.headers.get('ETag', result.etag)
+        result.last_modified = resp.headers.get('Last-Modified', result.last_modified)
+    result.checked = timezone.now()
+    return result
@@ -383,6 +383,14 @@ PASSWORD_HASHERS = [
 
 HASHER_SALT = "2LxpaW5qOe80xZjTPyzpgi"
 
+# Seconds user roles, used for permission checks, are kept in cache, changed
+# representatives are removed from cache right away.
+USER_ROLES_CACHE_TIMEOUT = env.int('USER_ROLES_CACHE_TIMEOUT', default=300)
+
+# Seconds partner API key lookups are kept in cache, changed keys and
+# representatives are removed from cache right away.
+API_KEY_CACHE_TIMEOUT = env.int('API_KEY_CACHE_TIMEOUT', default=300)
+
 _search_url = env.search_url()
 _search_url['ENGINE'] = 'vitrina.datasets.search_backends.ElasticSearchEngine'
 _search_url_test = env.str(var="SEARCH_URL_TEST", default='')
@@ -399,6 +407,14 @@ ELASTIC_FACET_SIZE = 50
 
 HAYSTACK_SIGNAL_PROCESSOR = 'vitrina.datasets.search_indexes.CustomSignalProcessor'
 
+# Changed objects are indexed by scripts/search_index_worker.py, if set to
+# False, objects are indexed right after the transaction is committed.
+SEARCH_INDEX_QUEUE = env.bool('SEARCH_INDEX_QUEUE', default=True)
+
+# Subscriber e-mails are sent by scripts/mail_worker.py, if set to False,
+# e-mails are sent right after the transaction is committed.
+MAIL_QUEUE = env.bool('MAIL_QUEUE', default=True)
+
 BLOG_USE_PLACEHOLDER = False
 META_USE_SITES = True
 
@@ -409,6 +425,10 @@ CRISPY_TEMPLATE_PACK = 'bulma'
 
 SYSTEM_USER_EMAIL = "system.user@example.com"
 
+# Structure files are imported by scripts/structure_import_worker.py, if set
+# to False, structure files are imported while handling the upload request.
+STRUCTURE_IMPORT_QUEUE = env.bool('STRUCTURE_IMPORT_QUEUE', default=True)
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {},
 }
@@ -445,6 +465,8 @@ TRANSLATION_CLIENT_ID = env('TRANSLATION_CLIENT_ID', default='')
 SPINTA_SERVER_URL = env('SPINTA_SERVER_URL', default='https://get-test.data.gov.lt')
 SPINTA_SERVER_CLIENT_ID = env('SPINTA_SERVER_CLIENT_ID', default='')
 SPINTA_SERVER_CLIENT_SECRET = env('SPINTA_SERVER_CLIENT_SECRET', default='')
+# Responses of Spinta are cached for this many seconds, set to 0 to disable.
+SPINTA_CACHE_TIMEOUT = env.int('SPINTA_CACHE_TIMEOUT', default=30)
 
 SECURE_HSTS_SECONDS = 31536000 # The max-age must be at least 31536000 seconds (1 year)
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
@@ -460,12 +482,21 @@ MESSAGE_TAGS = {
     messages.ERROR: 'is-danger',
 }
 
+# Cache is shared by all worker processes. File based cache works for workers
+# on one host, use memcached (pymemcache://host:11211) for more hosts and for
+# atomic locks, see vitrina/cache.py.
 CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
-    }
+    "default": env.cache('CACHE_URL', default=f'filecache://{BASE_DIR / "var/cache"}'),
 }
+# File based cache deletes a third of all entries, when it has more than
+# MAX_ENTRIES (300 by default), so it must fit at least one entry per dataset.
+CACHES["default"].setdefault("OPTIONS", {}).setdefault(
+    "MAX_ENTRIES", env.int('CACHE_MAX_ENTRIES', default=200_000),
+)
+
+# Count cache hits and misses of vitrina.cache namespaces. Counters are
+# updated on each cache read, so this is meant for a short time only.
+CACHE_STATS = env.bool('CACHE_STATS', default=False)
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = None
 
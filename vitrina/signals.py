@@ -0,0 +1,232 @@
+from cms.models import Page, Title
+from cms.signals import post_publish, post_unpublish
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from parler.models import TranslatableModel
+
+from vitrina.api.dcat import invalidate_dcat, invalidate_dcat_datasets
+from vitrina.classifiers.models import Category, Frequency, Licence
+from vitrina.datasets.models import Dataset, DatasetGroup, Type
+from vitrina.helpers import invalidate_email_templates, invalidate_facet_labels
+from vitrina.cms.models import Deployment
+from vitrina.hierarchy import invalidate_hierarchy
+from vitrina.landing import invalidate_aggregates
+from vitrina.messages.models import EmailTemplate
+from vitrina.orgs.models import Organization, Representative
+from vitrina.projects.models import Project
+from vitrina.resources.models import DatasetDistribution, Format
+from vitrina.structure.models import Metadata, Model, Property, PropertyList
+from vitrina.structure.services import get_referring_datasets, invalidate_structure_export
+from vitrina.users.models import User
+
+FACET_MODELS = [
+    Category,
+    Dataset.tags.tag_model,
+    DatasetGroup,
+    Format,
+    Frequency,
+    Organization,
+    Type,
+]
+
+
+def invalidate_translated_facet_labels(sender, **kwargs):
+    invalidate_facet_labels(sender._meta.get_field('master').related_model)
+
+
+for model in FACET_MODELS:
+    post_save.connect(invalidate_facet_labels, sender=model)
+    post_delete.connect(invalidate_facet_labels, sender=model)
+    if issubclass(model, TranslatableModel):
+        post_save.connect(invalidate_translated_facet_labels, sender=model._parler_meta.root_model)
+        post_delete.connect(invalidate_translated_facet_labels, sender=model._parler_meta.root_model)
+
+
+def invalidate_tree(sender, **kwargs):
+    invalidate_hierarchy(sender)
+
+
+def invalidate_category_tree(sender, **kwargs):
+    # Category tree also knows which categories have datasets.
+    invalidate_hierarchy(Category)
+
+
+for model in [Category, Organization]:
+    post_save.connect(invalidate_tree, sender=model)
+    post_delete.connect(invalidate_tree, sender=model)
+
+m2m_changed.connect(invalidate_category_tree, sender=Dataset.category.through)
+post_delete.connect(invalidate_category_tree, sender=Dataset)
+
+post_save.connect(invalidate_email_templates, sender=EmailTemplate)
+post_delete.connect(invalidate_email_templates, sender=EmailTemplate)
+
+
+LANDING_AGGREGATES = {
+    Dataset: ['counts', 'orgs'],
+    Organization: ['counts', 'orgs'],
+    Project: ['counts'],
+    Representative: ['counts'],
+    User: ['counts'],
+    Category: ['categories'],
+    Deployment: ['deployment'],
+    Page: ['menu'],
+    Title: ['menu'],
+}
+
+
+def invalidate_landing_aggregates(sender, **kwargs):
+    invalidate_aggregates(*LANDING_AGGREGATES[sender])
+
+
+def invalidate_menu(sender, **kwargs):
+    invalidate_aggregates('menu')
+
+
+for model in LANDING_AGGREGATES:
+    post_save.connect(invalidate_landing_aggregates, sender=model)
+    post_delete.connect(invalidate_landing_aggregates, sender=model)
+
+post_publish.connect(invalidate_menu)
+post_unpublish.connect(invalidate_menu)
+
+
+def _get_property_list_dataset_id(obj: PropertyList):
+    owner = obj.object
+    if isinstance(owner, Property):
+        return owner.model.dataset_id
+    return owner.dataset_id if owner else None
+
+
+# Exported structure depends on these, everything else is stored in metadata.
+STRUCTURE_DATASET = {
+    Metadata: lambda obj: obj.dataset_id,
+    Model: lambda obj: obj.dataset_id,
+    Property: lambda obj: obj.model.dataset_id,
+    PropertyList: _get_property_list_dataset_id,
+    DatasetDistribution: lambda obj: obj.dataset_id,
+    Dataset: lambda obj: obj.pk,
+}
+
+
+def invalidate_dataset_structure(sender, instance, **kwargs):
+    try:
+        dataset_id = STRUCTURE_DATASET[sender](instance)
+    except ObjectDoesNotExist:
+        # Related object is already deleted, its own signal takes care of it.
+        return
+    if dataset_id:
+        invalidate_structure_export(dataset_id)
+
+
+for model in STRUCTURE_DATASET:
+    post_save.connect(invalidate_dataset_structure, sender=model)
+    post_delete.connect(invalidate_dataset_structure, sender=model)
+
+
+def invalidate_referring_structures(sender, instance: Metadata, **kwargs):
+    for dataset_id in get_referring_datasets(instance):
+        invalidate_structure_export(dataset_id)
+
+
+post_save.connect(invalidate_referring_structures, sender=Metadata)
+post_delete.connect(invalidate_referring_structures, sender=Metadata)
+
+
+def update_structure_metadata_fields(sender, instance: Metadata, **kwargs):
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model not in (Model, Property):
+        return
+    # Object, that metadata was created with, is updated in place.
+    obj = instance.object
+    if obj is None:
+        return
+    obj.update_metadata_fields()
+
+
+post_save.connect(update_structure_metadata_fields, sender=Metadata)
+post_delete.connect(update_structure_metadata_fields, sender=Metadata)
+
+
+# Exported DCAT datasets depend on these.
+DCAT_DATASET = {
+    Dataset: lambda obj: obj.pk,
+    Dataset._parler_meta.root_model: lambda obj: obj.master_id,
+    DatasetDistribution: lambda obj: obj.dataset_id,
+}
+
+# These are shared by many datasets, so all of them are exported again.
+DCAT_SHARED = [
+    Category,
+    Format,
+    Frequency,
+    Licence,
+    Organization,
+]
+
+
+def invalidate_dcat_dataset(sender, instance, **kwargs):
+    if dataset_id := DCAT_DATASET[sender](instance):
+        invalidate_dcat_datasets(dataset_id)
+
+
+def invalidate_dcat_dataset_relations(sender, instance, pk_set, **kwargs):
+    if isinstance(instance, Dataset):
+        invalidate_dcat_datasets(instance.pk)
+    elif pk_set:
+        invalidate_dcat_datasets(*pk_set)
+    else:
+        invalidate_dcat()
+
+
+def invalidate_dcat_shared(sender, **kwargs):
+    invalidate_dcat()
+
+
+for model in DCAT_DATASET:
+    post_save.connect(invalidate_dcat_dataset, sender=model)
+    post_delete.connect(invalidate_dcat_dataset, sender=model)
+
+for model in DCAT_SHARED:
+    post_save.connect(invalidate_dcat_shared, sender=model)
+    post_delete.connect(invalidate_dcat_shared, sender=model)
+
+m2m_changed.connect(invalidate_dcat_dataset_relations, sender=Dataset.category.through)
+m2m_changed.connect(invalidate_dcat_dataset_relations, sender=Dataset.tags.through)
+
+
+# Tags, categories and translations are not stored in the dataset table, so
+# dataset modification time, used by partner API ETags and ?modified_since, is
+# updated here.
+DATASET_RELATIONS = {
+    Dataset.category.through: 'category',
+    Dataset.tags.through: 'tags',
+}
+
+
+def touch_datasets(**filters):
+    Dataset.objects.filter(**filters).update(modified=timezone.now())
+
+
+def touch_dataset_translation(sender, instance, **kwargs):
+    touch_datasets(pk=instance.master_id)
+
+
+def touch_dataset_relations(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, Dataset):
+        touch_datasets(pk=instance.pk)
+    elif pk_set:
+        touch_datasets(pk__in=pk_set)
+    elif action == 'pre_clear':
+        touch_datasets(**{DATASET_RELATIONS[sender]: instance})
+
+
+post_save.connect(touch_dataset_translation, sender=Dataset._parler_meta.root_model)
+post_delete.connect(touch_dataset_translation, sender=Dataset._parler_meta.root_model)
+
+for model in DATASET_RELATIONS:
+    m2m_changed.connect(touch_dataset_relations, sender=model)
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0010_alter_modeldownloadstats_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsRollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True)),
+                ('modified', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'statistic_rollup_watermark',
+            },
+        ),
+        migrations.AddField(
+            model_name='datasetstats',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modeldownloadstats',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ModelDownloadStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Diena'), ('month', 'Mėnuo'), ('year', 'Metai')], max_length=5)),
+                ('created', models.DateField()),
+                ('model', models.CharField(max_length=255)),
+                ('model_requests', models.BigIntegerField(blank=True, null=True)),
+                ('model_objects', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'model_download_statistic_rollup',
+                'unique_together': {('period', 'model', 'created')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DatasetStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Diena'), ('month', 'Mėnuo'), ('year', 'Metai')], max_length=5)),
+                ('created', models.DateField()),
+                ('dataset_id', models.IntegerField()),
+                ('object_count', models.BigIntegerField(blank=True, null=True)),
+                ('field_count', models.BigIntegerField(blank=True, null=True)),
+                ('model_count', models.BigIntegerField(blank=True, null=True)),
+                ('distribution_count', models.BigIntegerField(blank=True, null=True)),
+                ('request_count', models.BigIntegerField(blank=True, null=True)),
+                ('project_count', models.BigIntegerField(blank=True, null=True)),
+                ('maturity_level', models.BigIntegerField(blank=True, null=True)),
+                ('maturity_level_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'dataset_statistic_rollup',
+                'unique_together': {('period', 'dataset_id', 'created')},
+            },
+        ),
+    ]
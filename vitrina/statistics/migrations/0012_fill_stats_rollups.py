@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:10
+
+from django.db import migrations
+
+
+def fill_stats_rollups(apps, schema_editor):
+    # Statistics pages read rollups only, so existing statistics are rolled
+    # up once here, later changes are picked up by
+    # scripts/refresh_stats_rollups.py.
+    from vitrina.statistics.services import refresh_stats_rollups
+    refresh_stats_rollups(full=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0011_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_stats_rollups, migrations.RunPython.noop),
+    ]
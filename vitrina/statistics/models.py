@@ -13,6 +13,7 @@ class ModelDownloadStats(models.Model):
     model_format = models.CharField(max_length=255, blank=True, null=True)
     model_requests = models.BigIntegerField(blank=True, null=True)
     model_objects = models.BigIntegerField(blank=True, null=True)
+    modified = models.DateTimeField(auto_now=True, blank=True, null=True, db_index=True)
 
     class Meta:
         managed = True
@@ -30,12 +31,64 @@ class DatasetStats(models.Model):
     request_count = models.IntegerField(blank=True, null=True)
     project_count = models.IntegerField(blank=True, null=True)
     maturity_level = models.IntegerField(blank=True, null=True)
+    modified = models.DateTimeField(auto_now=True, blank=True, null=True, db_index=True)
 
     class Meta:
         managed = True
         db_table = 'dataset_statistic'
 
 
+class StatsRollup(models.Model):
+    DAY = 'day'
+    MONTH = 'month'
+    YEAR = 'year'
+    PERIODS = (
+        (DAY, _("Diena")),
+        (MONTH, _("Mėnuo")),
+        (YEAR, _("Metai")),
+    )
+
+    period = models.CharField(max_length=5, choices=PERIODS)
+    created = models.DateField()
+
+    class Meta:
+        abstract = True
+
+
+class DatasetStatsRollup(StatsRollup):
+    dataset_id = models.IntegerField()
+    object_count = models.BigIntegerField(blank=True, null=True)
+    field_count = models.BigIntegerField(blank=True, null=True)
+    model_count = models.BigIntegerField(blank=True, null=True)
+    distribution_count = models.BigIntegerField(blank=True, null=True)
+    request_count = models.BigIntegerField(blank=True, null=True)
+    project_count = models.BigIntegerField(blank=True, null=True)
+    maturity_level = models.BigIntegerField(blank=True, null=True)
+    maturity_level_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'dataset_statistic_rollup'
+        unique_together = (('period', 'dataset_id', 'created'),)
+
+
+class ModelDownloadStatsRollup(StatsRollup):
+    model = models.CharField(max_length=255)
+    model_requests = models.BigIntegerField(blank=True, null=True)
+    model_objects = models.BigIntegerField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'model_download_statistic_rollup'
+        unique_together = (('period', 'model', 'created'),)
+
+
+class StatsRollupWatermark(models.Model):
+    source = models.CharField(max_length=255, unique=True)
+    modified = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'statistic_rollup_watermark'
+
+
 class StatRoute(TranslatableModel):
     translations = TranslatedFields(
         title=models.CharField(_("Pavadinimas"), max_length=255),
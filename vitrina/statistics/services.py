@@ -0,0 +1,263 @@
+from typing import Any, Dict, Iterable, List
+
+import pandas as pd
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncYear
+from django.utils import timezone
+
+from vitrina.datasets.services import get_query_for_frequency
+from vitrina.statistics.models import DatasetStats, DatasetStatsRollup, ModelDownloadStats, \
+    ModelDownloadStatsRollup, StatsRollup, StatsRollupWatermark
+
+
+def get_period_key(frequency: str, date_field: str, label: pd.Period) -> str:
+    query = get_query_for_frequency(frequency, date_field, label)
+    return '-'.join(str(value) for value in query.values())
+
+
+def get_row_period_key(row: Dict[str, Any], values: List[str]) -> str:
+    return '-'.join(str(row[value]) for value in values)
+
+
+def group_time_series_data(
+    data: Iterable[Dict[str, Any]],
+    groups: Dict[Any, List[Any]],
+    values: List[str],
+    key: str = 'pk',
+) -> List[Dict[str, Any]]:
+    # Each object can belong to several groups (e.g. tags), so rows fetched
+    # once for all objects are repeated for every group they belong to.
+    object_groups = {}
+    for group, ids in groups.items():
+        for pk in ids:
+            object_groups.setdefault(pk, []).append(group)
+
+    result = []
+    for row in data:
+        period = get_row_period_key(row, values)
+        for group in object_groups.get(row[key], []):
+            result.append({
+                'group': group,
+                'period': period,
+                'count': row.get('count'),
+                'n': row.get('n'),
+            })
+    return result
+
+
+def get_time_series(
+    data: List[Dict[str, Any]],
+    groups: List[Any],
+    periods: List[str],
+    cumulative: bool = True,
+) -> Dict[Any, List[Any]]:
+    if not groups:
+        return {}
+
+    frame = pd.DataFrame.from_records(data, columns=['group', 'period', 'count', 'n'])
+    frame = frame[frame['period'].isin(periods)]
+    if frame.empty:
+        return {group: [0] * len(periods) for group in groups}
+
+    averaged = frame['n'].notna().any()
+    frame = frame.assign(
+        count=pd.to_numeric(frame['count']).fillna(0),
+        n=pd.to_numeric(frame['n']).fillna(0),
+    )
+    totals = frame.groupby(['period', 'group'])[['count', 'n']].sum()
+    if averaged:
+        # Periods that have rows, but no values to average, are shown as 0.
+        value = (totals['count'] / totals['n'].where(totals['n'] > 0)).fillna(0)
+    else:
+        value = totals['count']
+
+    table = value.unstack('group').reindex(index=periods, columns=groups)
+    if cumulative:
+        table = table.fillna(0).cumsum()
+    else:
+        # Periods without data keep the last known value.
+        table = table.ffill().fillna(0)
+    if not averaged:
+        table = table.astype(int)
+
+    return {group: table[group].tolist() for group in groups}
+
+
+def get_rollup_period(frequency: str) -> str:
+    if frequency == 'Y':
+        return StatsRollup.YEAR
+    elif frequency in ('Q', 'M'):
+        return StatsRollup.MONTH
+    else:
+        return StatsRollup.DAY
+
+
+ROLLUPS = [
+    (
+        DatasetStats,
+        DatasetStatsRollup,
+        'dataset_id',
+        [
+            'object_count',
+            'field_count',
+            'model_count',
+            'distribution_count',
+            'request_count',
+            'project_count',
+            'maturity_level',
+        ],
+        {'maturity_level_count': 'maturity_level'},
+    ),
+    (
+        ModelDownloadStats,
+        ModelDownloadStatsRollup,
+        'model',
+        ['model_requests', 'model_objects'],
+        {},
+    ),
+]
+
+ROLLUP_PERIODS = [
+    (StatsRollup.MONTH, StatsRollup.DAY, TruncMonth),
+    (StatsRollup.YEAR, StatsRollup.MONTH, TruncYear),
+]
+
+
+def refresh_stats_rollups(full: bool = False) -> Dict[str, int]:
+    now = timezone.now()
+    result = {}
+    for source, rollup, key, fields, counts in ROLLUPS:
+        result[source._meta.db_table] = _refresh_rollup(source, rollup, key, fields, counts, now, full)
+    return result
+
+
+def _refresh_rollup(source, rollup, key, fields, counts, now, full):
+    watermark, _ = StatsRollupWatermark.objects.get_or_create(source=source._meta.db_table)
+    full = full or watermark.modified is None
+
+    if isinstance(source._meta.get_field('created'), models.DateTimeField):
+        day = TruncDate('created')
+    else:
+        day = F('created')
+    rows = source.objects.filter(
+        **{f'{key}__isnull': False},
+        created__isnull=False,
+    ).annotate(period_start=day)
+
+    keys = days = None
+    if not full:
+        changed = rows.filter(modified__gt=watermark.modified, modified__lte=now)
+        changed = changed.values_list(key, 'period_start').distinct().order_by()
+        keys = {row[0] for row in changed}
+        days = {row[1] for row in changed}
+
+    updated = 0
+    with transaction.atomic():
+        if full or keys:
+            if not full:
+                rows = rows.filter(**{f'{key}__in': keys, 'period_start__in': days})
+            data = _aggregate_rollup(rows, key, {
+                **{field: Sum(field) for field in fields},
+                **{name: Count(field) for name, field in counts.items()},
+            })
+            _replace_rollup(rollup, StatsRollup.DAY, key, keys, days, data)
+            updated = len(data)
+
+            for period, child_period, trunc in ROLLUP_PERIODS:
+                rows = rollup.objects.filter(period=child_period).annotate(period_start=trunc('created'))
+                if not full:
+                    days = {_get_period_start(period, day) for day in days}
+                    rows = rows.filter(**{f'{key}__in': keys, 'period_start__in': days})
+                data = _aggregate_rollup(rows, key, {
+                    field: Sum(field) for field in [*fields, *counts]
+                })
+                _replace_rollup(rollup, period, key, keys, days, data)
+
+        watermark.modified = now
+        watermark.save()
+
+    return updated
+
+
+def _get_period_start(period, day):
+    if period == StatsRollup.YEAR:
+        return day.replace(month=1, day=1)
+    elif period == StatsRollup.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def _aggregate_rollup(rows, key, aggregates):
+    # Annotation names can not clash with model field names.
+    data = rows.values(key, 'period_start').annotate(**{
+        f'{name}_total': aggregate
+        for name, aggregate in aggregates.items()
+    }).order_by()
+    return [
+        {
+            key: row[key],
+            'created': row['period_start'],
+            **{name: row[f'{name}_total'] for name in aggregates},
+        }
+        for row in data
+    ]
+
+
+def _replace_rollup(rollup, period, key, keys, days, data):
+    rows = rollup.objects.filter(period=period)
+    if keys is not None:
+        rows = rows.filter(**{f'{key}__in': keys, 'created__in': days})
+    rows.delete()
+    rollup.objects.bulk_create(
+        [rollup(period=period, **row) for row in data],
+        batch_size=1000,
+    )
+
+
+def upsert_model_download_stats(rows: Iterable[Dict[str, Any]]) -> int:
+    # Rows with the same key in one upload would make ON CONFLICT update the
+    # same row twice, so only the last one is kept.
+    rows = {
+        (row['source'], row['model'], row['model_format'], row['created']): row
+        for row in rows
+        if row['model_requests'] != 0
+    }
+    if not rows:
+        return 0
+
+    now = timezone.now()
+    table = ModelDownloadStats._meta.db_table
+    with connection.cursor() as cursor:
+        for chunk in _chunks(list(rows.values()), 1000):
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(chunk))
+            params = [
+                value
+                for row in chunk
+                for value in (
+                    row['source'],
+                    row['model'],
+                    row['model_format'],
+                    row['created'],
+                    row['model_requests'],
+                    row['model_objects'],
+                    now,
+                )
+            ]
+            cursor.execute(f"""
+                INSERT INTO {table} (
+                    source, model, model_format, created,
+                    model_requests, model_objects, modified
+                )
+                VALUES {values}
+                ON CONFLICT (source, model, model_format, created) DO UPDATE SET
+                    model_requests = EXCLUDED.model_requests,
+                    model_objects = EXCLUDED.model_objects,
+                    modified = EXCLUDED.modified
+            """, params)
+    return len(rows)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -6,10 +6,10 @@ from django.views.generic import ListView
 from django.template.defaultfilters import date as _date
 from django.utils.translation import gettext_lazy as _
 
-from vitrina.datasets.services import get_frequency_and_format, update_facet_data, get_query_for_frequency, \
-    get_values_for_frequency
+from vitrina.datasets.services import get_frequency_and_format, update_facet_data, get_values_for_frequency
 from vitrina.helpers import get_stats_filter_options_based_on_model
 from vitrina.statistics.models import StatRoute
+from vitrina.statistics.services import get_period_key, get_time_series, group_time_series_data
 
 
 class StatRouteListView(ListView):
@@ -72,21 +72,20 @@ class StatsMixin:
         bar_chart_data = []
         time_chart_data = []
 
+        groups = self.get_filter_groups(queryset, filter_data)
+        count_data = self.get_time_series_data(indicator, frequency, values, groups)
+        periods = [get_period_key(frequency, date_field, label) for label in labels]
+        series = get_time_series(
+            count_data,
+            list(groups),
+            periods,
+            cumulative=self.is_cumulative(indicator),
+        )
+
         for item in filter_data:
-            count = 0
             data = []
-
-            query = {self.filter: item['filter_value']}
-            filter_queryset_ids = queryset.filter(**query).values_list('pk', flat=True)
-            filter_queryset = self.get_index_queryset().filter(pk__in=filter_queryset_ids)
-
-            count_data = self.get_data_for_indicator(indicator, values, filter_queryset)
-
-            for label in labels:
-                label_query = get_query_for_frequency(frequency, date_field, label)
-                label_count_data = count_data.filter(**label_query)
-                count = self.get_count(label, indicator, frequency, label_count_data, count)
-
+            counts = series.get(item['filter_value'], [])
+            for label, count in zip(labels, counts):
                 if frequency == 'W':
                     data.append({'x': _date(label.start_time, ff), 'y': count})
                 else:
@@ -166,11 +165,26 @@ class StatsMixin:
     def get_index_queryset(self):
         return self.model.objects.all()
 
-    def get_data_for_indicator(self, indicator, values, filter_queryset):
+    def get_filter_groups(self, queryset, filter_data):
+        # Search results return primary keys as strings.
+        to_python = self.model._meta.pk.to_python
+        groups = {}
+        for item in filter_data:
+            query = {self.filter: item['filter_value']}
+            ids = queryset.filter(**query).values_list('pk', flat=True)
+            groups[item['filter_value']] = [to_python(pk) for pk in ids]
+        return groups
+
+    def get_time_series_data(self, indicator, frequency, values, groups):
+        ids = {pk for group_ids in groups.values() for pk in group_ids}
+        data = self.get_data_for_indicator(indicator, frequency, values, ids)
+        return group_time_series_data(data, groups, values)
+
+    def get_data_for_indicator(self, indicator, frequency, values, ids):
         return []
 
-    def get_count(self, label, indicator, frequency, data, count):
-        return 0
+    def is_cumulative(self, indicator):
+        return True
 
     def get_title_for_indicator(self, indicator):
         return indicator
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from vitrina.structure.models import Prefix
+from vitrina.structure.models import Prefix, StructureImportJob
 
 
 class PrefixAdmin(admin.ModelAdmin):
@@ -8,3 +8,12 @@ class PrefixAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Prefix, PrefixAdmin)
+
+
+class StructureImportJobAdmin(admin.ModelAdmin):
+    list_display = ('structure', 'user', 'status', 'created', 'started', 'finished')
+    list_filter = ('status',)
+    readonly_fields = ('structure', 'user', 'progress', 'error', 'created', 'started', 'finished')
+
+
+admin.site.register(StructureImportJob, StructureImportJobAdmin)
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vitrina_datasets', '0026_auto_20240822_0849'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vitrina_structure', '0014_alter_metadata_prepare_ast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StructureImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Sukurta')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Pradėta')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Baigta')),
+                ('status', models.CharField(choices=[('queued', 'Laukia eilėje'), ('running', 'Vykdomas'), ('done', 'Baigtas'), ('failed', 'Nepavyko')], db_index=True, default='queued', max_length=20, verbose_name='Būsena')),
+                ('progress', models.JSONField(blank=True, default=dict, verbose_name='Eiga')),
+                ('error', models.TextField(blank=True, verbose_name='Klaida')),
+                ('structure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vitrina_datasets.datasetstructure', verbose_name='Struktūra')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Naudotojas')),
+            ],
+            options={
+                'verbose_name': 'Struktūros importo užduotis',
+                'db_table': 'structure_import_job',
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def copy_metadata_fields(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for model, fields in [
+        ('model', {
+            'meta_name': 'm.name',
+            'meta_short_name': "split_part(m.name, '/', -1)",
+            'meta_title': 'm.title',
+            'meta_access': 'm.access',
+            'meta_order': 'm."order"',
+        }),
+        ('property', {
+            'meta_name': 'm.name',
+            'meta_title': 'm.title',
+            'meta_access': 'm.access',
+            'meta_order': 'm."order"',
+        }),
+    ]:
+        ct = ContentType.objects.filter(app_label='vitrina_structure', model=model).first()
+        if ct is None:
+            continue
+        columns = ', '.join(f'"{field}" = {value}' for field, value in fields.items())
+        # First metadata of each object is used, same as `obj.metadata.first()`.
+        schema_editor.execute(
+            f'UPDATE "{model}" SET {columns} '
+            f'FROM ('
+            f'  SELECT DISTINCT ON (object_id) * FROM metadata '
+            f'  WHERE content_type_id = %s ORDER BY object_id, id'
+            f') AS m '
+            f'WHERE "{model}".id = m.object_id',
+            [ct.pk],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('vitrina_structure', '0015_structure_import_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model',
+            name='meta_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Pilnas vardas'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='meta_short_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Vardas'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='meta_title',
+            field=models.TextField(blank=True, null=True, verbose_name='Pavadinimas'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='meta_access',
+            field=models.IntegerField(blank=True, choices=[(None, 'nepasirinkta'), (0, 'private'), (1, 'protected'), (2, 'public'), (3, 'open')], null=True, verbose_name='Prieiga'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='meta_order',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Rikiavimo tvarka'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='meta_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Vardas'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='meta_title',
+            field=models.TextField(blank=True, null=True, verbose_name='Pavadinimas'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='meta_access',
+            field=models.IntegerField(blank=True, choices=[(None, 'nepasirinkta'), (0, 'private'), (1, 'protected'), (2, 'public'), (3, 'open')], null=True, verbose_name='Prieiga'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='meta_order',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Rikiavimo tvarka'),
+        ),
+        migrations.AddIndex(
+            model_name='model',
+            index=models.Index(fields=['dataset', 'meta_short_name'], name='model_dataset_short_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['model', 'meta_name'], name='property_model_name_idx'),
+        ),
+        migrations.RunPython(copy_metadata_fields, migrations.RunPython.noop),
+    ]
@@ -115,6 +115,27 @@ class Metadata(models.Model):
         return ""
 
 
+def _get_metadata(obj: models.Model) -> Metadata | None:
+    # Same as `obj.metadata.first()`, but uses prefetched metadata.
+    if 'metadata' in getattr(obj, '_prefetched_objects_cache', {}):
+        return min(obj.metadata.all(), key=lambda meta: meta.pk, default=None)
+    return obj.metadata.first()
+
+
+MODEL_METADATA_FIELDS = ['meta_name', 'meta_short_name', 'meta_title', 'meta_access', 'meta_order']
+PROPERTY_METADATA_FIELDS = ['meta_name', 'meta_title', 'meta_access', 'meta_order']
+
+
+def _get_update_fields(obj: models.Model, metadata_fields: list[str]) -> list[str]:
+    # Metadata fields are kept up to date by update_metadata_fields, so an
+    # instance loaded before metadata has changed must not overwrite them.
+    return [
+        field.name
+        for field in obj._meta.concrete_fields
+        if not field.primary_key and field.name not in metadata_fields
+    ]
+
+
 class Base(models.Model):
     model = models.ForeignKey(
         'Model',
@@ -160,6 +181,13 @@ class Model(models.Model):
     )
     is_parameterized = models.BooleanField(default=False, verbose_name=_("Parametrizuotas"))
 
+    # Copy of primary metadata fields, see update_metadata_fields.
+    meta_name = models.CharField(_("Pilnas vardas"), max_length=255, blank=True, default='')
+    meta_short_name = models.CharField(_("Vardas"), max_length=255, blank=True, default='')
+    meta_title = models.TextField(_("Pavadinimas"), blank=True, null=True)
+    meta_access = models.IntegerField(_("Prieiga"), choices=Metadata.ACCESS_TYPES, blank=True, null=True)
+    meta_order = models.IntegerField(_("Rikiavimo tvarka"), blank=True, null=True)
+
     objects = models.Manager()
     metadata = GenericRelation('Metadata')
     property_list = GenericRelation('PropertyList')
@@ -169,30 +197,58 @@ class Model(models.Model):
     class Meta:
         db_table = 'model'
         verbose_name = _('Modelis')
+        indexes = [
+            models.Index(fields=['dataset', 'meta_short_name'], name='model_dataset_short_name_idx'),
+        ]
 
     def __str__(self):
-        if metadata := self.metadata.first():
-            return metadata.name
-        return ""
+        return self.full_name
 
     @property
     def name(self):
+        if self.meta_name:
+            return self.meta_short_name
         if metadata := self.metadata.first():
             return metadata.name.split('/')[-1]
         return ''
 
     @property
     def full_name(self):
+        if self.meta_name:
+            return self.meta_name
         if metadata := self.metadata.first():
             return metadata.name
         return ''
 
     @property
     def title(self):
+        if self.meta_name:
+            return self.meta_title
         if metadata := self.metadata.first():
             return metadata.title
         return ''
 
+    def get_metadata(self) -> Metadata | None:
+        return _get_metadata(self)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and not kwargs:
+            kwargs['update_fields'] = _get_update_fields(self, MODEL_METADATA_FIELDS)
+        super().save(*args, **kwargs)
+
+    def set_metadata_fields(self, metadata: Metadata | None):
+        self.meta_name = metadata.name if metadata else ''
+        self.meta_short_name = self.meta_name.split('/')[-1]
+        self.meta_title = metadata.title if metadata else None
+        self.meta_access = metadata.access if metadata else None
+        self.meta_order = metadata.order if metadata else None
+
+    def update_metadata_fields(self):
+        self.set_metadata_fields(self.metadata.order_by('pk').first())
+        Model.objects.filter(pk=self.pk).update(**{
+            field: getattr(self, field) for field in MODEL_METADATA_FIELDS
+        })
+
     @property
     def description(self):
         if metadata := self.metadata.first():
@@ -219,7 +275,7 @@ class Model(models.Model):
     def get_absolute_url(self):
         if self.name:
             return reverse('model-structure', kwargs={
-                'pk': self.dataset.pk,
+                'pk': self.dataset_id,
                 'model': self.name,
             })
         return None
@@ -227,7 +283,7 @@ class Model(models.Model):
     def get_data_url(self):
         if self.name:
             return reverse('model-data', kwargs={
-                'pk': self.dataset.pk,
+                'pk': self.dataset_id,
                 'model': self.name,
             })
         return None
@@ -235,20 +291,20 @@ class Model(models.Model):
     def get_api_url(self):
         if self.name:
             return reverse('getall-api', kwargs={
-                'pk': self.dataset.pk,
+                'pk': self.dataset_id,
                 'model': self.name
             })
         return None
 
     def get_given_props(self):
-        return self.model_properties.filter(given=True).order_by('metadata__order')
+        return self.model_properties.filter(given=True).order_by('meta_order')
 
     def get_props_excluding_base(self):
         base_props = []
         for props in self.get_base_props().values():
-            base_props.extend(props.values_list('metadata__name', flat=True))
+            base_props.extend(props.values_list('meta_name', flat=True))
 
-        return self.get_given_props().exclude(metadata__name__in=base_props)
+        return self.get_given_props().exclude(meta_name__in=base_props)
 
     def get_acl_parents(self):
         return [self.dataset]
@@ -263,9 +319,12 @@ class Model(models.Model):
 
     @property
     def access_display_value(self):
-        access = Model.objects.annotate(
-            access=Max('model_properties__metadata__access')
-        ).get(pk=self.pk).access
+        if hasattr(self, 'access'):
+            access = self.access
+        else:
+            access = Model.objects.annotate(
+                access=Max('model_properties__meta_access')
+            ).get(pk=self.pk).access
         if access is not None:
             for type in Metadata.ACCESS_TYPES:
                 if type[0] == access:
@@ -303,6 +362,12 @@ class Property(models.Model):
     )
     given = models.BooleanField(_('Duota savybė'), default=True)
 
+    # Copy of primary metadata fields, see update_metadata_fields.
+    meta_name = models.CharField(_("Vardas"), max_length=255, blank=True, default='')
+    meta_title = models.TextField(_("Pavadinimas"), blank=True, null=True)
+    meta_access = models.IntegerField(_("Prieiga"), choices=Metadata.ACCESS_TYPES, blank=True, null=True)
+    meta_order = models.IntegerField(_("Rikiavimo tvarka"), blank=True, null=True)
+
     objects = models.Manager()
     metadata = GenericRelation('Metadata')
     property_list = GenericRelation('PropertyList')
@@ -312,16 +377,17 @@ class Property(models.Model):
     class Meta:
         db_table = 'property'
         verbose_name = _('Savybė')
+        indexes = [
+            models.Index(fields=['model', 'meta_name'], name='property_model_name_idx'),
+        ]
 
     def __str__(self):
-        if metadata := self.metadata.first():
-            return metadata.name
-        return ""
+        return self.name
 
     def get_absolute_url(self):
         if self.model.name and self.name:
             return reverse('property-structure', kwargs={
-                'pk': self.model.dataset.pk,
+                'pk': self.model.dataset_id,
                 'model': self.model.name,
                 'prop': self.name,
             })
@@ -329,16 +395,40 @@ class Property(models.Model):
 
     @builtins.property
     def name(self):
+        if self.meta_name:
+            return self.meta_name
         if metadata := self.metadata.first():
             return metadata.name
         return ''
 
     @builtins.property
     def title(self):
+        if self.meta_name:
+            return self.meta_title
         if metadata := self.metadata.first():
             return metadata.title
         return ''
 
+    def get_metadata(self) -> Metadata | None:
+        return _get_metadata(self)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and not kwargs:
+            kwargs['update_fields'] = _get_update_fields(self, PROPERTY_METADATA_FIELDS)
+        super().save(*args, **kwargs)
+
+    def set_metadata_fields(self, metadata: Metadata | None):
+        self.meta_name = metadata.name if metadata else ''
+        self.meta_title = metadata.title if metadata else None
+        self.meta_access = metadata.access if metadata else None
+        self.meta_order = metadata.order if metadata else None
+
+    def update_metadata_fields(self):
+        self.set_metadata_fields(self.metadata.order_by('pk').first())
+        Property.objects.filter(pk=self.pk).update(**{
+            field: getattr(self, field) for field in PROPERTY_METADATA_FIELDS
+        })
+
     @builtins.property
     def description(self):
         if metadata := self.metadata.first():
@@ -509,3 +599,42 @@ class MetadataVersion(models.Model):
         if self.type:
             return get_type_repr(self)
         return ""
+
+
+class StructureImportJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, _("Laukia eilėje")),
+        (RUNNING, _("Vykdomas")),
+        (DONE, _("Baigtas")),
+        (FAILED, _("Nepavyko")),
+    )
+
+    created = models.DateTimeField(_("Sukurta"), auto_now_add=True)
+    started = models.DateTimeField(_("Pradėta"), null=True, blank=True)
+    finished = models.DateTimeField(_("Baigta"), null=True, blank=True)
+    structure = models.ForeignKey(
+        'vitrina_datasets.DatasetStructure',
+        models.CASCADE,
+        verbose_name=_("Struktūra"),
+    )
+    user = models.ForeignKey(
+        'vitrina_users.User',
+        models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Naudotojas"),
+    )
+    status = models.CharField(_("Būsena"), max_length=20, choices=STATUSES, default=QUEUED, db_index=True)
+    progress = models.JSONField(_("Eiga"), default=dict, blank=True)
+    error = models.TextField(_("Klaida"), blank=True)
+
+    class Meta:
+        db_table = 'structure_import_job'
+        verbose_name = _('Struktūros importo užduotis')
+
+    def __str__(self):
+        return f"{self.structure} ({self.get_status_display()})"
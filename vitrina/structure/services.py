@@ -1,37 +1,206 @@
+import asyncio
 import csv
+import hashlib
 import json
+import logging
 import uuid
-from io import StringIO
+from io import BytesIO
 from json import JSONDecodeError
-from typing import Union, Tuple, List, Dict
+from typing import Union, Tuple, List, Dict, Iterable, Iterator, Callable, Optional, Any, Set, Type
 
+import openpyxl
 import requests
-from django.db.models import Q
+from requests.adapters import HTTPAdapter
+from django.db.models import Prefetch, Q
 from lark import ParseError
 from pyproj import Transformer
 
 import vitrina.datasets.structure as struct
 
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from vitrina import settings
+from vitrina.cache import CacheNamespace
 from vitrina.comments.models import Comment
 from vitrina.datasets.models import DatasetStructure, Dataset
 from vitrina.datasets.structure import detect_read_errors, read
 from vitrina.helpers import none_to_string, get_encoding
 from vitrina.resources.models import DatasetDistribution, Format
-from vitrina.settings import SPINTA_SERVER_URL
+from vitrina.settings import SPINTA_CACHE_TIMEOUT, SPINTA_SERVER_URL
 from vitrina.structure import spyna
 from vitrina.structure.helpers import get_type_repr
 from vitrina.structure.models import Metadata, Model, Property, Prefix, Enum, EnumItem, PropertyList, Param, \
-    ParamItem, Base
+    ParamItem, Base, MetadataVersion, StructureImportJob, PROPERTY_METADATA_FIELDS
 from vitrina.tasks.models import Task
 from vitrina.users.models import User
 
+logger = logging.getLogger(__name__)
 
-def create_structure_objects(structure: DatasetStructure) -> None:
+
+METADATA_FIELDS = [
+    'draft',
+    'uuid',
+    'name',
+    'type',
+    'ref',
+    'source',
+    'prepare',
+    'prepare_ast',
+    'level',
+    'level_given',
+    'access',
+    'uri',
+    'version',
+    'title',
+    'description',
+    'order',
+    'required',
+    'unique',
+    'type_args',
+]
+
+
+class MetadataIndex:
+    # All model and property metadata of a dataset, loaded with one query,
+    # so that manifest objects are matched in memory.
+
+    def __init__(self, dataset: Dataset):
+        self.by_uuid = {}
+        self.by_object = {}
+        metadata = (
+            Metadata.objects.
+            filter(
+                dataset=dataset,
+                content_type__in=ContentType.objects.get_for_models(Model, Property).values(),
+            ).
+            prefetch_related(
+                'object',
+                Prefetch(
+                    'metadataversion_set',
+                    queryset=MetadataVersion.objects.
+                    select_related('base__model').
+                    order_by('-version__created'),
+                    to_attr='versions',
+                ),
+            ).
+            order_by('pk')
+        )
+        for md in metadata:
+            self.add(md)
+
+    def add(self, metadata: Metadata):
+        self.by_uuid.setdefault((metadata.content_type_id, str(metadata.uuid)), metadata)
+        self.by_object.setdefault((metadata.content_type_id, metadata.object_id), metadata)
+
+    def remove(self, metadata: Metadata):
+        for index, key in (
+            (self.by_uuid, (metadata.content_type_id, str(metadata.uuid))),
+            (self.by_object, (metadata.content_type_id, metadata.object_id)),
+        ):
+            if index.get(key) is metadata:
+                del index[key]
+
+    def get(self, ct: ContentType, uuid: str):
+        return self.by_uuid.get((ct.pk, str(uuid)))
+
+    def get_for_object(self, ct: ContentType, object_id: int):
+        return self.by_object.get((ct.pk, object_id))
+
+
+class ImportProgress:
+    SECTIONS = ('datasets', 'models', 'properties')
+
+    def __init__(self, callback: Callable[[Dict[str, Dict[str, int]]], None] = None):
+        self.callback = callback
+        self.sections = {
+            section: {'done': 0, 'total': 0}
+            for section in self.SECTIONS
+        }
+
+    def start(self, manifest: struct.Manifest):
+        datasets = list(manifest.datasets.values())
+        models_ = [model for dataset in datasets for model in dataset.models.values()]
+        self.sections['datasets']['total'] = len(datasets)
+        self.sections['models']['total'] = len(models_)
+        self.sections['properties']['total'] = sum(len(model.properties) for model in models_)
+        self.report()
+
+    def advance(self, section: str, n: int = 1):
+        self.sections[section]['done'] += n
+        self.report()
+
+    def skip(self, dataset: struct.Dataset):
+        self.advance('models', len(dataset.models))
+        self.advance('properties', sum(len(model.properties) for model in dataset.models.values()))
+
+    def report(self):
+        if self.callback:
+            self.callback(self.sections)
+
+
+def queue_structure_import(structure: DatasetStructure, user: User = None) -> StructureImportJob:
+    return StructureImportJob.objects.create(structure=structure, user=user)
+
+
+def run_structure_import_job() -> Optional[StructureImportJob]:
+    with transaction.atomic():
+        job = (
+            StructureImportJob.objects.
+            select_for_update(skip_locked=True).
+            filter(status=StructureImportJob.QUEUED).
+            order_by('created', 'pk').
+            first()
+        )
+        if job is None:
+            return None
+        job.status = StructureImportJob.RUNNING
+        job.started = timezone.now()
+        job.save(update_fields=['status', 'started'])
+
+    # Import is done in a single transaction, so progress is written using a
+    # separate connection to be visible while the import is still running.
+    connection = connections.create_connection(DEFAULT_DB_ALIAS)
+
+    def save_progress(sections):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {StructureImportJob._meta.db_table} SET progress = %s WHERE id = %s',
+                [json.dumps(sections), job.pk],
+            )
+
+    progress = ImportProgress(save_progress)
+    try:
+        create_structure_objects(job.structure, progress)
+    except Exception:
+        # Traceback is only logged, error is shown to users.
+        logger.exception("Structure import job %s failed", job.pk)
+        job.status = StructureImportJob.FAILED
+        job.error = str(_(
+            "Struktūros importuoti nepavyko. "
+            "Patikrinkite struktūros failą arba kreipkitės į administratorių."
+        ))
+    else:
+        job.status = StructureImportJob.DONE
+        if job.structure.dataset:
+            job.structure.dataset.save()
+    finally:
+        connection.close()
+
+    job.progress = progress.sections
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'progress', 'finished'])
+    return job
+
+
+def create_structure_objects(structure: DatasetStructure, progress: ImportProgress = None) -> None:
+    with transaction.atomic():
+        _create_structure_objects(structure, progress or ImportProgress())
+
+
+def _create_structure_objects(structure: DatasetStructure, progress: ImportProgress) -> None:
     sys_user, _ = User.objects.get_or_create(email=settings.SYSTEM_USER_EMAIL)
     ct = ContentType.objects.get_for_model(DatasetStructure)
 
@@ -56,9 +225,10 @@ def create_structure_objects(structure: DatasetStructure) -> None:
                 if state.errors:
                     errors = state.errors
                 else:
+                    progress.start(state.manifest)
                     _load_comments(structure.dataset, state.manifest.comments, structure)
                     _load_prefixes(structure.dataset, state.manifest.prefixes, structure)
-                    _load_datasets(state, structure.dataset)
+                    _load_datasets(state, structure.dataset, progress)
                     structure.dataset.update_level()
 
         for error in errors:
@@ -91,7 +261,8 @@ def create_or_get_uapi_format():
 
 def _load_datasets(
     state: struct.State,
-    dataset: Dataset
+    dataset: Dataset,
+    progress: ImportProgress,
 ):
     ct = ContentType.objects.get_for_model(dataset)
     existing_metadata = Metadata.objects.filter(
@@ -109,12 +280,15 @@ def _load_datasets(
         ).exclude(dataset=dataset).first():
             meta.errors.append(_(f'Duomenų rinkinys "{meta.name}" jau egzistuoja.'))
             loaded_metadata.append(metadata)
+            progress.skip(meta)
         elif not meta.name.isascii():
             meta.errors.append(_(f'"{meta.name}" kodiniame pavadinime gali būti naudojamos tik lotyniškos raidės.'))
             loaded_metadata.append(metadata)
+            progress.skip(meta)
         elif any([ch.isupper() for ch in meta.name]):
             meta.errors.append(_(f'"{meta.name}" kodiniame pavadinime gali būti naudojamos tik mažosios raidės.'))
             loaded_metadata.append(metadata)
+            progress.skip(meta)
         else:
             if md := dataset.metadata.filter(name=meta.name).first():
                 if not meta.id:
@@ -124,12 +298,13 @@ def _load_datasets(
             _load_enums(dataset, meta.enums, dataset)
             _load_params(dataset, meta.params, dataset)
             _load_comments(dataset, meta.comments, dataset)
-            _load_models(meta, dataset)
+            _load_models(meta, dataset, progress)
             _link_distributions(meta, dataset)
             _link_models(dataset, meta)
             loaded_metadata.append(metadata)
 
         _create_errors(meta.errors, dataset.current_structure)
+        progress.advance('datasets')
 
     removed_metadata = list(set(existing_metadata) - set(loaded_metadata))
     for meta in removed_metadata:
@@ -290,72 +465,138 @@ def _load_params(
 
 def _load_models(
     meta_dataset: struct.Dataset,
-    dataset: Dataset
+    dataset: Dataset,
+    progress: ImportProgress,
 ):
     ct = ContentType.objects.get_for_model(Model)
-    existing_models = Model.objects.filter(dataset=dataset)
+    index = MetadataIndex(dataset)
+    existing_models = Model.objects.filter(dataset=dataset).order_by('pk')
+    existing_ids = _get_existing_ids(index, ct, existing_models)
     loaded_models = []
 
     for i, meta in enumerate(meta_dataset.models.values(), 1):
         if meta.errors:
             _create_errors(meta.errors, dataset.current_structure)
         else:
-            if md := existing_models.filter(
-                metadata__content_type=ct,
-                metadata__name=meta.name,
-                metadata__dataset=dataset,
-            ).first():
-                if not meta.id:
-                    meta.id = md.metadata.first().uuid
+            if not meta.id and meta.name in existing_ids:
+                meta.id = existing_ids[meta.name]
 
             model = Model(dataset=dataset)
-            model, metadata = _create_or_update_metadata(dataset, meta, model, i)
+            model, metadata = _create_or_update_metadata(dataset, meta, model, i, index=index)
             _check_uri(dataset, meta, meta.uri)
             _clean_errors(model)
             _load_comments(dataset, meta.comments, model)
             _load_params(dataset, meta.params, model)
-            _load_properties(dataset, meta, model)
+            _load_properties(dataset, meta, model, index)
             loaded_models.append(model)
             _create_errors(meta.errors, model)
+        progress.advance('models')
+        progress.advance('properties', len(meta.properties))
 
     removed_models = list(set(existing_models) - set(loaded_models))
     for model in removed_models:
-        model.delete()
+        if metadata := index.get_for_object(ct, model.pk):
+            index.remove(metadata)
+    Model.objects.filter(pk__in=[model.pk for model in removed_models]).delete()
+
+
+def _get_existing_ids(
+    index: MetadataIndex,
+    ct: ContentType,
+    objects: Iterable[models.Model],
+) -> Dict[str, str]:
+    # Manifest objects without ids are matched to existing objects by name.
+    existing_ids = {}
+    for obj in objects:
+        if metadata := index.get_for_object(ct, obj.pk):
+            existing_ids.setdefault(metadata.name, metadata.uuid)
+    return existing_ids
 
 
 def _load_properties(
     dataset: Dataset,
     model_meta: struct.Model,
     model: Model,
+    index: MetadataIndex,
 ):
     ct = ContentType.objects.get_for_model(Property)
-    existing_props = Property.objects.filter(model=model, given=True)
-    loaded_props = []
+    existing_props = list(Property.objects.filter(model=model, given=True).order_by('pk'))
+    existing_ids = _get_existing_ids(index, ct, existing_props)
+    loaded = []
+    created = {}
+    updated = {}
 
     for i, meta in enumerate(model_meta.properties.values(), 1):
         if meta.errors:
             _create_errors(meta.errors, model)
+            continue
+
+        if not meta.id and meta.name in existing_ids:
+            meta.id = existing_ids[meta.name]
+
+        if meta.id and str(meta.id) in created:
+            metadata, prop = created[str(meta.id)]
+            _update_metadata(metadata, meta, i)
+        elif meta.id and (metadata := index.get(ct, meta.id)):
+            _update_metadata(metadata, meta, i)
+            updated[metadata.pk] = metadata
+            prop = metadata.object
         else:
-            if pr := existing_props.filter(
-                metadata__content_type=ct,
-                metadata__name=meta.name,
-                metadata__dataset=dataset
-            ).first():
-                if not meta.id:
-                    meta.id = pr.metadata.first().uuid
-
+            if not meta.id:
+                meta.id = uuid.uuid4()
             prop = Property(model=model)
-            prop, metadata = _create_or_update_metadata(dataset, meta, prop, i)
-            _check_uri(dataset, meta, metadata.uri)
-            _clean_errors(prop)
+            metadata = _build_metadata(dataset, meta, prop, i)
+            created[str(meta.id)] = (metadata, prop)
+        loaded.append((meta, prop, metadata))
+
+    # Signals are not sent for bulk operations, so metadata fields of
+    # properties are copied here.
+    for meta, prop, metadata in loaded:
+        prop.set_metadata_fields(metadata)
+    Property.objects.bulk_create([prop for metadata, prop in created.values()])
+    for metadata, prop in created.values():
+        metadata.object_id = prop.pk
+    Metadata.objects.bulk_create([metadata for metadata, prop in created.values()])
+    Metadata.objects.bulk_update(updated.values(), METADATA_FIELDS, batch_size=1000)
+    Property.objects.bulk_update(
+        [metadata.object for metadata in updated.values()],
+        PROPERTY_METADATA_FIELDS,
+        batch_size=1000,
+    )
+    for metadata, prop in created.values():
+        index.add(metadata)
+
+    prop_ids = {prop.pk for meta, prop, metadata in loaded}
+    Comment.objects.filter(
+        content_type=ct,
+        object_id__in=prop_ids,
+        type=Comment.STRUCTURE_ERROR,
+    ).delete()
+    # Comments and enums are only reloaded for properties, that have them,
+    # to avoid several queries for each property.
+    with_comments = set(Comment.objects.filter(
+        content_type=ct,
+        object_id__in=prop_ids,
+        type=Comment.STRUCTURE,
+    ).values_list('object_id', flat=True))
+    with_enums = set(Enum.objects.filter(
+        content_type=ct,
+        object_id__in=prop_ids,
+    ).values_list('object_id', flat=True))
+
+    for meta, prop, metadata in loaded:
+        _check_uri(dataset, meta, metadata.uri)
+        if meta.comments or prop.pk in with_comments:
             _load_comments(dataset, meta.comments, prop)
+        if meta.enums or prop.pk in with_enums:
             _load_enums(dataset, meta.enums, prop)
-            loaded_props.append(prop)
-            _create_errors(meta.errors, prop)
+        _create_errors(meta.errors, prop)
 
-    removed_props = list(set(existing_props) - set(loaded_props))
+    removed_props = [prop for prop in existing_props if prop.pk not in prop_ids]
     for prop in removed_props:
-        prop.delete()
+        if metadata := index.get_for_object(ct, prop.pk):
+            index.remove(metadata)
+    Property.objects.filter(pk__in=[prop.pk for prop in removed_props]).delete()
 
 
 def _load_comments(
@@ -364,7 +605,8 @@ def _load_comments(
     obj: models.Model
 ):
     ct = ContentType.objects.get_for_model(obj)
-    sys_user, _ = User.objects.get_or_create(email=settings.SYSTEM_USER_EMAIL)
+    if comments:
+        sys_user, _ = User.objects.get_or_create(email=settings.SYSTEM_USER_EMAIL)
 
     existing_comments = Comment.objects.filter(
         content_type=ct,
@@ -406,6 +648,9 @@ def _create_errors(
     errors: List[str],
     obj: models.Model
 ):
+    if not errors:
+        return
+
     ct = ContentType.objects.get_for_model(obj)
     sys_user, _ = User.objects.get_or_create(email=settings.SYSTEM_USER_EMAIL)
 
@@ -442,129 +687,154 @@ def _create_or_update_metadata(
     obj_meta: struct.Metadata,
     obj: models.Model,
     order: int = None,
-    use_existing_meta: bool = False
+    use_existing_meta: bool = False,
+    index: MetadataIndex = None,
 ) -> Tuple[models.Model, struct.Metadata]:
     ct = ContentType.objects.get_for_model(obj)
 
-    if use_existing_meta and obj.pk and Metadata.objects.filter(
+    if use_existing_meta and obj.pk and (metadata := Metadata.objects.filter(
         object_id=obj.pk,
         content_type=ct,
         dataset=dataset,
-    ).exists():
-        metadata = Metadata.objects.filter(
-            object_id=obj.pk,
-            content_type=ct,
-            dataset=dataset,
-        ).first()
+    ).first()):
         return metadata.object, metadata
 
-    if obj_meta.id and Metadata.objects.filter(
-        uuid=obj_meta.id,
-        content_type=ct,
-        dataset=dataset,
-    ).exists():
-        metadata = Metadata.objects.filter(
-            uuid=obj_meta.id,
-            content_type=ct,
-            dataset=dataset
-        ).first()
-
-        type_args = ", ".join(obj_meta.type_args) \
-            if hasattr(obj_meta, 'type_args') and obj_meta.type_args else None
-        access = _parse_access(obj_meta.access)
+    metadata = None
+    if obj_meta.id:
+        if index is not None:
+            metadata = index.get(ct, obj_meta.id)
+        else:
+            metadata = Metadata.objects.filter(
+                uuid=obj_meta.id,
+                content_type=ct,
+                dataset=dataset
+            ).first()
 
-        if latest_version := metadata.metadataversion_set.order_by('-version__created').first():
-            if (
-                (
-                    isinstance(metadata.object, Dataset) and
-                    latest_version.name != obj_meta.name
-                ) or (
-                    isinstance(metadata.object, Model) and
-                    (
-                        latest_version.name != obj_meta.name or
-                        none_to_string(latest_version.ref) != none_to_string(obj_meta.ref) or
-                        latest_version.level_given != obj_meta.level_given or
-                        (latest_version.base and obj_meta.base and
-                         latest_version.base.model.full_name != obj_meta.base.name) or
-                        (not latest_version.base and obj_meta.base) or
-                        (latest_version.base and not obj_meta.base)
-                    )
-                ) or (
-                    isinstance(metadata.object, Property) and
-                    (
-                        latest_version.name != obj_meta.name or
-                        latest_version.type != obj_meta.type or
-                        latest_version.required != obj_meta.required or
-                        latest_version.unique != obj_meta.unique or
-                        latest_version.type_args != type_args or
-                        none_to_string(latest_version.ref) != none_to_string(obj_meta.ref) or
-                        latest_version.level_given != obj_meta.level_given or
-                        latest_version.access != access
-                    )
-                ) or (
-                    isinstance(metadata.object, EnumItem) and
-                    (
-                        none_to_string(latest_version.prepare) != none_to_string(obj_meta.prepare) or
-                        none_to_string(latest_version.source) != none_to_string(obj_meta.source)
-                    )
-                )
-            ):
-                metadata.draft = True
-            else:
-                metadata.draft = False
-
-        metadata.uuid = obj_meta.id
-        metadata.name = obj_meta.name if hasattr(obj_meta, 'name') else ''
-        metadata.type = obj_meta.type if hasattr(obj_meta, 'type') else ''
-        metadata.ref = obj_meta.ref
-        metadata.source = obj_meta.source
-        metadata.prepare = obj_meta.prepare
-        metadata.prepare_ast = _parse_prepare(obj_meta.prepare, obj_meta)
-        metadata.level = obj_meta.level
-        metadata.level_given = obj_meta.level_given
-        metadata.access = access
-        metadata.uri = obj_meta.uri
-        metadata.version = metadata.version + 1 if metadata.version else 1
-        metadata.title = obj_meta.title
-        metadata.description = obj_meta.description
-        metadata.order = order
-        metadata.required = obj_meta.required if hasattr(obj_meta, 'required') else None
-        metadata.unique = obj_meta.unique if hasattr(obj_meta, 'unique') else None
-        metadata.type_args = type_args
+    if metadata:
+        _update_metadata(metadata, obj_meta, order)
         metadata.save()
-
         obj = metadata.object
     else:
         if not obj.pk:
             obj.save()
         if not obj_meta.id:
             obj_meta.id = uuid.uuid4()
-        metadata = Metadata.objects.create(
-            dataset=dataset,
-            uuid=obj_meta.id,
-            name=obj_meta.name if hasattr(obj_meta, 'name') else '',
-            type=obj_meta.type if hasattr(obj_meta, 'type') else '',
-            ref=obj_meta.ref,
-            source=obj_meta.source,
-            prepare=obj_meta.prepare,
-            prepare_ast=_parse_prepare(obj_meta.prepare, obj_meta),
-            level=obj_meta.level,
-            level_given=obj_meta.level_given,
-            access=_parse_access(obj_meta.access),
-            uri=obj_meta.uri,
-            version=1,
-            title=obj_meta.title,
-            description=obj_meta.description,
-            order=order,
-            content_type=ct,
-            object_id=obj.pk,
-            required=obj_meta.required if hasattr(obj_meta, 'required') else None,
-            unique=obj_meta.unique if hasattr(obj_meta, 'unique') else None,
-            type_args=", ".join(obj_meta.type_args) if hasattr(obj_meta, 'type_args') and obj_meta.type_args else None,
-        )
+        metadata = _build_metadata(dataset, obj_meta, obj, order)
+        metadata.save()
+        if index is not None:
+            index.add(metadata)
     return obj, metadata
 
 
+def _get_latest_version(metadata: Metadata):
+    if hasattr(metadata, 'versions'):
+        return metadata.versions[0] if metadata.versions else None
+    return metadata.metadataversion_set.order_by('-version__created').first()
+
+
+def _update_metadata(
+    metadata: Metadata,
+    obj_meta: struct.Metadata,
+    order: int = None,
+):
+    type_args = ", ".join(obj_meta.type_args) \
+        if hasattr(obj_meta, 'type_args') and obj_meta.type_args else None
+    access = _parse_access(obj_meta.access)
+
+    if latest_version := _get_latest_version(metadata):
+        if (
+            (
+                isinstance(metadata.object, Dataset) and
+                latest_version.name != obj_meta.name
+            ) or (
+                isinstance(metadata.object, Model) and
+                (
+                    latest_version.name != obj_meta.name or
+                    none_to_string(latest_version.ref) != none_to_string(obj_meta.ref) or
+                    latest_version.level_given != obj_meta.level_given or
+                    (latest_version.base and obj_meta.base and
+                     latest_version.base.model.full_name != obj_meta.base.name) or
+                    (not latest_version.base and obj_meta.base) or
+                    (latest_version.base and not obj_meta.base)
+                )
+            ) or (
+                isinstance(metadata.object, Property) and
+                (
+                    latest_version.name != obj_meta.name or
+                    latest_version.type != obj_meta.type or
+                    latest_version.required != obj_meta.required or
+                    latest_version.unique != obj_meta.unique or
+                    latest_version.type_args != type_args or
+                    none_to_string(latest_version.ref) != none_to_string(obj_meta.ref) or
+                    latest_version.level_given != obj_meta.level_given or
+                    latest_version.access != access
+                )
+            ) or (
+                isinstance(metadata.object, EnumItem) and
+                (
+                    none_to_string(latest_version.prepare) != none_to_string(obj_meta.prepare) or
+                    none_to_string(latest_version.source) != none_to_string(obj_meta.source)
+                )
+            )
+        ):
+            metadata.draft = True
+        else:
+            metadata.draft = False
+
+    metadata.uuid = obj_meta.id
+    metadata.name = obj_meta.name if hasattr(obj_meta, 'name') else ''
+    metadata.type = obj_meta.type if hasattr(obj_meta, 'type') else ''
+    metadata.ref = obj_meta.ref
+    metadata.source = obj_meta.source
+    metadata.prepare = obj_meta.prepare
+    metadata.prepare_ast = _parse_prepare(obj_meta.prepare, obj_meta)
+    metadata.level = obj_meta.level
+    metadata.level_given = obj_meta.level_given
+    metadata.access = access
+    metadata.uri = obj_meta.uri
+    metadata.version = metadata.version + 1 if metadata.version else 1
+    metadata.title = obj_meta.title
+    metadata.description = obj_meta.description
+    metadata.order = order
+    metadata.required = obj_meta.required if hasattr(obj_meta, 'required') else None
+    metadata.unique = obj_meta.unique if hasattr(obj_meta, 'unique') else None
+    metadata.type_args = type_args
+
+
+def _build_metadata(
+    dataset: Dataset,
+    obj_meta: struct.Metadata,
+    obj: models.Model,
+    order: int = None,
+) -> Metadata:
+    metadata = Metadata(
+        dataset=dataset,
+        uuid=obj_meta.id,
+        name=obj_meta.name if hasattr(obj_meta, 'name') else '',
+        type=obj_meta.type if hasattr(obj_meta, 'type') else '',
+        ref=obj_meta.ref,
+        source=obj_meta.source,
+        prepare=obj_meta.prepare,
+        prepare_ast=_parse_prepare(obj_meta.prepare, obj_meta),
+        level=obj_meta.level,
+        level_given=obj_meta.level_given,
+        access=_parse_access(obj_meta.access),
+        uri=obj_meta.uri,
+        version=1,
+        title=obj_meta.title,
+        description=obj_meta.description,
+        order=order,
+        # Metadata fields of obj are updated in place by a post_save signal.
+        object=obj,
+        required=obj_meta.required if hasattr(obj_meta, 'required') else None,
+        unique=obj_meta.unique if hasattr(obj_meta, 'unique') else None,
+        type_args=", ".join(obj_meta.type_args) if hasattr(obj_meta, 'type_args') and obj_meta.type_args else None,
+    )
+    # New metadata has no versions yet.
+    metadata.versions = []
+    return metadata
+
+
 def _link_distributions(
     dataset_meta: struct.Dataset,
     dataset: Dataset
@@ -780,12 +1050,16 @@ def _link_properties(
     ct = ContentType.objects.get_for_model(Property)
     model_ct = ContentType.objects.get_for_model(Model)
 
+    prop_ids = {}
+    for object_id, uuid_ in Metadata.objects.filter(
+        content_type=ct,
+        object_id__in=Property.objects.filter(model=model).values('pk'),
+    ).order_by('object_id').values_list('object_id', 'uuid'):
+        prop_ids.setdefault(uuid_, object_id)
+    props = Property.objects.in_bulk(prop_ids.values())
+
     for prop_meta in model_meta.properties.values():
-        if prop := Property.objects.filter(
-            metadata__content_type=ct,
-            metadata__uuid=prop_meta.id,
-            model=model,
-        ).first():
+        if prop := props.get(prop_ids.get(str(prop_meta.id))):
             if '.' in prop_meta.name:
                 _link_denorm_props(dataset, prop_meta, model, prop)
 
@@ -873,32 +1147,33 @@ def _check_uri(dataset: Dataset, meta: struct.Metadata, uri: str):
                 meta.errors.append(_(f'Prefiksas "{prefix}" duomenų rinkinyje neegzistuoja.'))
 
 
-def get_data_from_spinta(model: Union[Model, str], uuid: str = None, query: str = '', timeout: int = 30):
-    if uuid:
-        url = f"{SPINTA_SERVER_URL}/{model}/{uuid}/?{query}"
-    else:
-        url = f"{SPINTA_SERVER_URL}/{model}/?{query}"
-    try:
-        res = requests.get(url, timeout=timeout)
-    except requests.ReadTimeout:
-        return {'errors': [f"Nepavyko gauti duomenų iš Saugyklos, per nustatytą laiką (timeout={timeout})"]}
-    except requests.RequestException as e:
-        return {'errors': [str(e)]}
+SPINTA_POOL_SIZE = 20
 
-    try:
-        data = json.loads(res.content)
-        return data
-    except JSONDecodeError as e:
-        return {'errors': [str(e)]}
+# Connections to Spinta are kept alive and shared by all threads.
+spinta_session = requests.Session()
+spinta_session.mount(SPINTA_SERVER_URL, HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=SPINTA_POOL_SIZE,
+))
 
+spinta_cache = CacheNamespace('spinta', SPINTA_CACHE_TIMEOUT)
 
-async def get_data_from_spinta_async(model: Union[Model, str], uuid: str = None, query: str = '', timeout: int = 30):
+
+def _get_spinta_url(model: Union[Model, str], uuid: str = None, query: str = '') -> str:
     if uuid:
-        url = f"{SPINTA_SERVER_URL}/{model}/{uuid}/?{query}"
+        return f"{SPINTA_SERVER_URL}/{model}/{uuid}/?{query}"
     else:
-        url = f"{SPINTA_SERVER_URL}/{model}/?{query}"
+        return f"{SPINTA_SERVER_URL}/{model}/?{query}"
+
+
+def _get_spinta_data(url: str, timeout: int) -> dict:
+    key = hashlib.sha256(url.encode()).hexdigest()
+    data = spinta_cache.get(key) if SPINTA_CACHE_TIMEOUT else None
+    if data is not None:
+        return data
+
     try:
-        res = requests.get(url, timeout=timeout)
+        res = spinta_session.get(url, timeout=timeout)
     except requests.ReadTimeout:
         return {'errors': [f"Nepavyko gauti duomenų iš Saugyklos, per nustatytą laiką (timeout={timeout})"]}
     except requests.RequestException as e:
@@ -906,10 +1181,24 @@ async def get_data_from_spinta_async(model: Union[Model, str], uuid: str = None,
 
     try:
         data = json.loads(res.content)
-        return data
     except JSONDecodeError as e:
         return {'errors': [str(e)]}
 
+    if SPINTA_CACHE_TIMEOUT and not (isinstance(data, dict) and data.get('errors')):
+        spinta_cache.set(key, data)
+    return data
+
+
+def get_data_from_spinta(model: Union[Model, str], uuid: str = None, query: str = '', timeout: int = 30):
+    return _get_spinta_data(_get_spinta_url(model, uuid, query), timeout)
+
+
+async def get_data_from_spinta_async(model: Union[Model, str], uuid: str = None, query: str = '', timeout: int = 30):
+    # Requests are made in a thread, so that the event loop is not blocked and
+    # several requests can be awaited together with asyncio.gather.
+    url = _get_spinta_url(model, uuid, query)
+    return await asyncio.to_thread(_get_spinta_data, url, timeout)
+
 
 def _parse_access(value: str):
     access = None
@@ -969,22 +1258,203 @@ class IterableFile:
         self.writes.append(data)
 
 
-def export_dataset_structure(dataset: Dataset) -> StringIO:
+# Exported structure is cached until any of its objects, or objects of other
+# datasets it refers to, change, see invalidate_structure_export and
+# get_referring_datasets.
+STRUCTURE_EXPORT_TIMEOUT = 86400
+
+structure_cache = CacheNamespace('structure-export', STRUCTURE_EXPORT_TIMEOUT, versioned=True)
+
+
+def get_structure_version(dataset_id: int) -> int:
+    return structure_cache.scope(dataset_id).version
+
+
+def invalidate_structure_export(dataset_id: int) -> None:
+    structure_cache.scope(dataset_id).invalidate()
+
+
+def get_referring_datasets(metadata: Metadata) -> Set[int]:
+    # Exported structure also has names of referenced properties and bases,
+    # that can belong to other datasets, see StructureIndex.
+    model = ContentType.objects.get_for_id(metadata.content_type_id).model_class()
+    owners = {}
+    if model is Property:
+        for content_type_id, object_id in PropertyList.objects.filter(
+            property_id=metadata.object_id,
+        ).values_list('content_type_id', 'object_id'):
+            owner = ContentType.objects.get_for_id(content_type_id).model_class()
+            owners.setdefault(owner, []).append(object_id)
+    elif model is Base:
+        owners[Base] = [metadata.object_id]
+
+    datasets = set()
+    if Model in owners:
+        datasets.update(Model.objects.filter(pk__in=owners[Model]).values_list('dataset_id', flat=True))
+    if Property in owners:
+        datasets.update(Property.objects.filter(pk__in=owners[Property]).values_list('model__dataset_id', flat=True))
+    if Base in owners:
+        datasets.update(Model.objects.filter(base__in=owners[Base]).values_list('dataset_id', flat=True))
+    datasets.discard(metadata.dataset_id)
+    return datasets
+
+
+def export_dataset_structure(dataset: Dataset) -> Iterator[str]:
+    cache = structure_cache.scope(dataset.pk)
+    content = cache.get('csv')
+    if content is not None:
+        yield content
+        return
+
     cols = DATASET
     rows = datasets_to_tabular(dataset)
     rows = ({c: row[c] for c in cols} for row in rows)
 
+    chunks = []
     stream = IterableFile()
     writer = csv.DictWriter(stream, fieldnames=cols)
     writer.writeheader()
     for row in rows:
         writer.writerow(row)
-        yield from stream
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+    cache.set('csv', ''.join(chunks))
+
+
+def export_dataset_structure_xlsx(dataset: Dataset) -> bytes:
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(DATASET)
+    for row in datasets_to_tabular(dataset):
+        sheet.append([row[c] for c in DATASET])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def export_resource_structure(resource: DatasetDistribution) -> List[Dict]:
+    return structure_cache.scope(resource.dataset_id).get_or_set(
+        f'resource:{resource.pk}',
+        lambda: list(_resource_models_to_tabular(resource)),
+    )
+
+
+class StructureIndex:
+    # All structure objects of a dataset, loaded with a fixed number of
+    # queries, so that export rows are built without querying each object.
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+
+        self.metadata: Dict[Tuple[int, int], Metadata] = {}
+        for meta in Metadata.objects.filter(dataset=dataset).order_by('pk'):
+            meta.dataset = dataset
+            self.metadata.setdefault((meta.content_type_id, meta.object_id), meta)
+
+        self.models = list(
+            Model.objects.
+            filter(dataset=dataset).
+            select_related('distribution', 'base').
+            order_by('pk')
+        )
+        self.properties = self._group(
+            Property.objects.filter(model__dataset=dataset, given=True).order_by('pk'),
+            lambda prop: prop.model_id,
+        )
+        property_ids = Property.objects.filter(model__dataset=dataset).values('pk')
+
+        self.prefixes = self._group_generic(Prefix.objects.filter(
+            Q(content_type=self._ct(Dataset), object_id=dataset.pk) |
+            Q(content_type=self._ct(DatasetStructure), object_id=dataset.current_structure_id)
+        ))
+        self.property_lists = self._group_generic(
+            PropertyList.objects.
+            filter(
+                Q(content_type=self._ct(Model), object_id__in=[model.pk for model in self.models]) |
+                Q(content_type=self._ct(Property), object_id__in=property_ids)
+            ).
+            select_related('property')
+        )
+        self.enums = self._group_generic(Enum.objects.filter(
+            Q(content_type=self._ct(Dataset), object_id=dataset.pk) |
+            Q(content_type=self._ct(Property), object_id__in=property_ids)
+        ))
+        self.enum_items = self._group(
+            EnumItem.objects.filter(enum__in=[e for enums in self.enums.values() for e in enums]).order_by('pk'),
+            lambda item: item.enum_id,
+        )
+        self.params = self._group_generic(Param.objects.filter(
+            Q(content_type=self._ct(Dataset), object_id=dataset.pk) |
+            Q(content_type=self._ct(Model), object_id__in=[model.pk for model in self.models])
+        ))
+        self.param_items = self._group(
+            ParamItem.objects.filter(param__in=[p for params in self.params.values() for p in params]).order_by('pk'),
+            lambda item: item.param_id,
+        )
+        self.comments = self._group_generic(Comment.objects.filter(
+            Q(content_type=self._ct(Model), object_id__in=[model.pk for model in self.models]) |
+            Q(content_type=self._ct(Property), object_id__in=property_ids) |
+            Q(content_type=self._ct(DatasetDistribution), object_id__in=[
+                model.distribution_id for model in self.models if model.distribution_id
+            ]),
+            type=Comment.STRUCTURE,
+        ))
+
+        # Metadata of referenced properties and bases can belong to other
+        # datasets, so whatever is still missing is loaded separately.
+        missing = Q()
+        for objs in (
+            [prop_list.property for prop_lists in self.property_lists.values() for prop_list in prop_lists],
+            [model.base for model in self.models if model.base],
+        ):
+            ids = [obj.pk for obj in objs if self.meta(obj) is None]
+            if ids:
+                missing |= Q(content_type=self._ct(type(objs[0])), object_id__in=ids)
+        if missing:
+            for meta in Metadata.objects.filter(missing).select_related('dataset').order_by('pk'):
+                self.metadata.setdefault((meta.content_type_id, meta.object_id), meta)
+
+    @staticmethod
+    def _ct(model: Type[models.Model]) -> ContentType:
+        return ContentType.objects.get_for_model(model)
+
+    @staticmethod
+    def _group(queryset: Iterable[models.Model], key: Callable) -> Dict[Any, List[models.Model]]:
+        groups = {}
+        for obj in queryset:
+            groups.setdefault(key(obj), []).append(obj)
+        return groups
+
+    def _group_generic(self, queryset) -> Dict[Tuple[int, int], List[models.Model]]:
+        return self._group(queryset.order_by('pk'), lambda obj: (obj.content_type_id, obj.object_id))
+
+    def meta(self, obj: models.Model) -> Optional[Metadata]:
+        return self.metadata.get((self._ct(type(obj)).pk, obj.pk))
+
+    def ordered(self, objs: Iterable[models.Model]) -> List[models.Model]:
+        # Same as order_by('metadata__order'), objects without order are last.
+        def key(obj):
+            meta = self.meta(obj)
+            order = meta.order if meta else None
+            return order is None, order or 0
+
+        return sorted(objs, key=key)
+
+    def children(self, groups: Dict[Tuple[int, int], List], obj: models.Model) -> List:
+        return groups.get((self._ct(type(obj)).pk, obj.pk), [])
+
+    def name(self, obj: models.Model) -> str:
+        meta = self.meta(obj)
+        return meta.name if meta else ''
 
 
 def datasets_to_tabular(dataset: Dataset):
-    yield from _prefixes_to_tabular(dataset.current_structure, separator=True)
-    yield from _dataset_to_tabular(dataset, separator=True)
+    index = StructureIndex(dataset)
+    if dataset.current_structure_id:
+        structure = DatasetStructure(pk=dataset.current_structure_id)
+        yield from _prefixes_to_tabular(index, structure, separator=True)
+    yield from _dataset_to_tabular(index, dataset, separator=True)
 
 
 def to_row(keys, values) -> Dict:
@@ -998,15 +1468,15 @@ def _end_marker(name):
 
 
 def _prefixes_to_tabular(
+    index: StructureIndex,
     obj: models.Model,
     separator: bool = False
 ):
-    ct = ContentType.objects.get_for_model(obj)
-    prefixes = Prefix.objects.filter(content_type=ct, object_id=obj.pk).order_by('metadata__order')
+    prefixes = index.ordered(index.children(index.prefixes, obj))
 
     first = True
     for prefix in prefixes:
-        if meta := prefix.metadata.first():
+        if meta := index.meta(prefix):
             yield to_row(DATASET, {
                 'id': meta.uuid,
                 'type': 'prefix' if first else '',
@@ -1022,10 +1492,11 @@ def _prefixes_to_tabular(
 
 
 def _dataset_to_tabular(
+    index: StructureIndex,
     dataset: Dataset,
     separator: bool = False
 ):
-    if meta := dataset.metadata.first():
+    if meta := index.meta(dataset):
         yield to_row(DATASET, {
             'id': meta.uuid,
             'dataset': meta.name,
@@ -1034,23 +1505,23 @@ def _dataset_to_tabular(
             'title': meta.title,
             'description': meta.description,
         })
-    yield from _prefixes_to_tabular(dataset, separator=separator)
-    yield from _enums_to_tabular(dataset, separator=separator)
-    yield from _params_to_tabular(dataset, separator=separator)
-    yield from _models_to_tabular(dataset, separator=separator)
+    yield from _prefixes_to_tabular(index, dataset, separator=separator)
+    yield from _enums_to_tabular(index, dataset, separator=separator)
+    yield from _params_to_tabular(index, dataset, separator=separator)
+    yield from _models_to_tabular(index, dataset, separator=separator)
 
 
 def _enums_to_tabular(
+    index: StructureIndex,
     obj: models.Model,
     separator: bool = False
 ):
-    ct = ContentType.objects.get_for_model(obj)
-    enums = Enum.objects.filter(content_type=ct, object_id=obj.pk)
+    enums = index.children(index.enums, obj)
 
     for enum in enums:
         first = True
-        for item in enum.enumitem_set.all().order_by('metadata__order'):
-            if meta := item.metadata.first():
+        for item in index.ordered(index.enum_items.get(enum.pk, [])):
+            if meta := index.meta(item):
                 yield to_row(DATASET, {
                     'id': meta.uuid,
                     'type': 'enum' if first else '',
@@ -1068,16 +1539,16 @@ def _enums_to_tabular(
 
 
 def _params_to_tabular(
+    index: StructureIndex,
     obj: models.Model,
     separator: bool = False
 ):
-    ct = ContentType.objects.get_for_model(obj)
-    params = Param.objects.filter(content_type=ct, object_id=obj.pk)
+    params = index.children(index.params, obj)
 
     for param in params:
         first = True
-        for item in param.paramitem_set.all().order_by('metadata__order'):
-            if meta := item.metadata.first():
+        for item in index.ordered(index.param_items.get(param.pk, [])):
+            if meta := index.meta(item):
                 yield to_row(DATASET, {
                     'id': meta.uuid,
                     'type': 'param' if first else '',
@@ -1095,91 +1566,81 @@ def _params_to_tabular(
 
 
 def _models_to_tabular(
+    index: StructureIndex,
     dataset: Dataset,
     separator: bool = False
 ):
-    dataset_models = Model.objects.filter(dataset=dataset).order_by('metadata__order')
-
     resource = None
     base = None
-    for model in dataset_models:
+    for model in index.ordered(index.models):
         if model.distribution and not resource:
-            yield from _resource_to_tabular(model.distribution)
+            yield from _resource_to_tabular(index, model.distribution)
             resource = model.distribution
         elif not model.distribution and resource:
             yield from _end_marker('resource')
             resource = None
 
         if model.base and not base:
-            yield from _base_to_tabular(model.base)
+            yield from _base_to_tabular(index, model.base)
             base = model.base
         elif not model.base and base:
             yield from _end_marker('base')
             base = None
 
-        if meta := model.metadata.first():
-            yield to_row(DATASET, {
-                'id': meta.uuid,
-                'model': _to_relative_model_name(meta.name, dataset),
-                'level': meta.level_given,
-                'access': _get_access(meta.access),
-                'title': meta.title,
-                'description': meta.description,
-                'uri': meta.uri,
-                'source': meta.source,
-                'prepare': meta.prepare,
-                'ref': ', '.join([
-                    prop.property.name
-                    for prop in model.property_list.all()]
-                ) if model.property_list.exists() else ''
-            })
-
-            yield from _comments_to_tabular(model)
-            yield from _params_to_tabular(model)
-            yield from _properties_to_tabular(model)
+        if meta := index.meta(model):
+            yield from _model_to_tabular(index, model, meta, dataset)
+            yield from _comments_to_tabular(index, model)
+            yield from _params_to_tabular(index, model)
+            yield from _properties_to_tabular(index, model)
             if separator:
                 yield to_row(DATASET, {})
 
 
+def _model_to_tabular(index: StructureIndex, model: Model, meta: Metadata, dataset: Dataset):
+    yield to_row(DATASET, {
+        'id': meta.uuid,
+        'model': _to_relative_model_name(meta.name, dataset),
+        'level': meta.level_given,
+        'access': _get_access(meta.access),
+        'title': meta.title,
+        'description': meta.description,
+        'uri': meta.uri,
+        'source': meta.source,
+        'prepare': meta.prepare,
+        'ref': ', '.join([
+            index.name(prop.property)
+            for prop in index.children(index.property_lists, model)
+        ])
+    })
+
+
 def _resource_models_to_tabular(
     resource: DatasetDistribution,
     separator: bool = False
 ):
-    resource_models = Model.objects.filter(distribution=resource, dataset=resource.dataset).order_by('metadata__order')
+    index = StructureIndex(resource.dataset)
+    resource_models = [model for model in index.models if model.distribution_id == resource.pk]
     base = None
-    for model in resource_models:
+    for model in index.ordered(resource_models):
         if model.base and not base:
-            yield from _base_to_tabular(model.base)
+            yield from _base_to_tabular(index, model.base)
             base = model.base
         elif not model.base and base:
             yield from _end_marker('base')
             base = None
-        if meta := model.metadata.first():
-            yield to_row(DATASET, {
-                'id': meta.uuid,
-                'model': _to_relative_model_name(meta.name, resource.dataset),
-                'level': meta.level_given,
-                'access': _get_access(meta.access),
-                'title': meta.title,
-                'description': meta.description,
-                'uri': meta.uri,
-                'source': meta.source,
-                'prepare': meta.prepare,
-                'ref': ', '.join([
-                    prop.property.name
-                    for prop in model.property_list.all()]
-                ) if model.property_list.exists() else ''
-            })
-            yield from _params_to_tabular(model)
-            yield from _properties_to_tabular(model)
+        if meta := index.meta(model):
+            yield from _model_to_tabular(index, model, meta, resource.dataset)
+            yield from _params_to_tabular(index, model)
+            yield from _properties_to_tabular(index, model)
             if separator:
                 yield to_row(DATASET, {})
 
 
 def _resource_to_tabular(
+    index: StructureIndex,
     resource: DatasetDistribution
 ):
-    if meta := resource.metadata.first():
+    if meta := index.meta(resource):
         yield to_row(DATASET, {
             'id': meta.uuid,
             'resource': meta.name,
@@ -1192,20 +1653,15 @@ def _resource_to_tabular(
             'title': meta.title,
             'description': meta.description,
         })
-    yield from _comments_to_tabular(resource)
+    yield from _comments_to_tabular(index, resource)
 
 
-def _comments_to_tabular(obj: models.Model):
-    ct = ContentType.objects.get_for_model(obj)
-    comments = Comment.objects.filter(
-        content_type=ct,
-        object_id=obj.pk,
-        type=Comment.STRUCTURE
-    ).order_by('metadata__order')
+def _comments_to_tabular(index: StructureIndex, obj: models.Model):
+    comments = index.ordered(index.children(index.comments, obj))
 
     first = True
     for comment in comments:
-        if meta := comment.metadata.first():
+        if meta := index.meta(comment):
             yield to_row(DATASET, {
                 'id': meta.uuid,
                 'type': 'comment' if first else '',
@@ -1218,8 +1674,8 @@ def _comments_to_tabular(obj: models.Model):
             first = False
 
 
-def _base_to_tabular(base: Base):
-    if meta := base.metadata.first():
+def _base_to_tabular(index: StructureIndex, base: Base):
+    if meta := index.meta(base):
         yield to_row(DATASET, {
             'id': meta.uuid,
             'base': _to_relative_model_name(meta.name, meta.dataset),
@@ -1227,11 +1683,11 @@ def _base_to_tabular(base: Base):
         })
 
 
-def _properties_to_tabular(model: Model):
-    props = model.get_given_props()
+def _properties_to_tabular(index: StructureIndex, model: Model):
+    props = index.ordered(index.properties.get(model.pk, []))
 
     for prop in props:
-        if meta := prop.metadata.first():
+        if meta := index.meta(prop):
             yield to_row(DATASET, {
                 'id': meta.uuid,
                 'property': meta.name,
@@ -1243,11 +1699,11 @@ def _properties_to_tabular(model: Model):
                 'description': meta.description,
                 'source': meta.source,
                 'prepare': meta.prepare,
-                'ref': _prop_ref_to_tabular(prop, meta)
+                'ref': _prop_ref_to_tabular(index, prop, meta)
             })
 
-            yield from _comments_to_tabular(prop)
-            yield from _enums_to_tabular(prop)
+            yield from _comments_to_tabular(index, prop)
+            yield from _enums_to_tabular(index, prop)
 
 
 def _to_relative_model_name(name: str, dataset: Dataset) -> str:
@@ -1273,11 +1729,14 @@ def _get_access(acess: int) -> str:
     return ''
 
 
-def _prop_ref_to_tabular(prop: Property, meta: Metadata) -> str:
+def _prop_ref_to_tabular(index: StructureIndex, prop: Property, meta: Metadata) -> str:
     ref = meta.ref
     if meta.type == 'ref':
         ref_model = _to_relative_model_name(meta.ref, meta.dataset)
-        ref_props = prop.property_list.values_list('property__metadata__name', flat=True)
+        ref_props = [
+            index.name(prop_list.property)
+            for prop_list in index.children(index.property_lists, prop)
+        ]
         if ref_props:
             ref_props = ', '.join(ref_props)
             ref = f"{ref_model}[{ref_props}]"
@@ -34,6 +34,7 @@ from vitrina.structure.views import ObjectDataTableView
 from vitrina.structure.views import get_object_data
 from vitrina.structure.views import get_property_data
 from vitrina.structure.views import PropertyGraphView
+from vitrina.structure.views import StructureImportJobView
 
 urlpatterns = [
     path('datasets/<int:pk>/models/', DatasetStructureView.as_view(), name='dataset-structure'),
@@ -73,6 +74,8 @@ urlpatterns = [
     path('datasets/<int:pk>/api/getone/<str:model>/<str:uuid>/', GetOneApiView.as_view(), name='getone-api'),
     path('datasets/<int:pk>/api/changes/<str:model>/', ChangesApiView.as_view(), name='changes-api'),
     path('datasets/<int:pk>/structure/export/', DatasetStructureExportView.as_view(), name='dataset-structure-export'),
+    path('datasets/<int:pk>/structure/import/<int:job_id>/', StructureImportJobView.as_view(),
+         name='structure-import-job'),
     path('datasets/<int:pk>/<str:model>/<str:prop>/enum/add/', EnumCreateView.as_view(), name='enum-create'),
     path('datasets/<int:pk>/<str:model>/<str:prop>/enum/<int:enum_id>/change/',
          EnumUpdateView.as_view(), name='enum-update'),
@@ -1,18 +1,20 @@
+import asyncio
 import datetime
 import uuid
 import json
-from typing import List, Union
+from typing import List, Tuple, Union
 from urllib import parse
 from urllib.parse import unquote
 
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
-from django.db.models import Func, F, Value, TextField, Max
-from django.http import Http404, StreamingHttpResponse, JsonResponse
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views import View
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import TemplateView, CreateView, UpdateView, DeleteView
@@ -26,7 +28,8 @@ from reversion.models import Version
 from reversion.views import RevisionMixin
 from shapely.wkt import loads
 
-from vitrina.datasets.models import Dataset
+from vitrina.cache import CacheNamespace
+from vitrina.datasets.models import Dataset, DatasetStructure
 from vitrina.helpers import get_current_domain, email, none_to_string, object_to_none
 from vitrina.orgs.models import Representative
 from vitrina.orgs.services import has_perm, Action
@@ -36,12 +39,13 @@ from vitrina.settings import SPINTA_SERVER_URL
 from vitrina.structure import spyna
 from vitrina.structure.forms import EnumForm, ModelCreateForm, ModelUpdateForm, PropertyForm, ParamForm, VersionForm
 from vitrina.structure.models import Model, Property, Metadata, EnumItem, Enum, PropertyList, Base, ParamItem, Param, \
-    MetadataVersion
+    MetadataVersion, StructureImportJob
 from vitrina.structure.models import Version as _Version
 from vitrina.structure.services import get_data_from_spinta, export_dataset_structure, get_model_name, get_srid, \
+    export_dataset_structure_xlsx, get_structure_version, \
     transform_coordinates, get_data_from_spinta_async
 from vitrina.tasks.models import Task
-from vitrina.views import HistoryMixin, PlanMixin, HistoryView
+from vitrina.views import HistoryMixin, PlanMixin, HistoryView, get_versions_for
 
 EXCLUDED_COLS = ['_type', '_revision', '_base']
 
@@ -89,13 +93,16 @@ class DatasetStructureMixin(StructureMixin):
             Dataset,
             self.dataset
         )
-        if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.dataset).order_by('metadata__name')
-        else:
-            self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
-                filter(dataset=self.dataset, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
+        self.models = (
+            Model.objects.
+            annotate(access=Max('model_properties__meta_access')).
+            filter(dataset=self.dataset).
+            select_related('base__model').
+            prefetch_related('metadata__metadata_version').
+            order_by('meta_name')
+        )
+        if not self.can_manage_structure:
+            self.models = self.models.filter(access__gte=Metadata.PUBLIC)
         return super().dispatch(request, *args, **kwargs)
 
     def get_structure_url(self):
@@ -140,12 +147,12 @@ class DatasetStructureView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
+                order_by('meta_name')
         return super().dispatch(request, *args, **kwargs)
 
     def has_permission(self):
@@ -218,13 +225,7 @@ class ModelStructureView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -235,14 +236,14 @@ class ModelStructureView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -257,11 +258,16 @@ class ModelStructureView(
             prop.name: prop
             for prop in self.props
         }
+        props_without_base = (
+            self.model.get_props_excluding_base().
+            select_related('model', 'ref_model').
+            prefetch_related('metadata', 'property_list__property')
+        )
         if self.can_manage_structure:
-            context['props_without_base'] = self.model.get_props_excluding_base()
+            context['props_without_base'] = props_without_base
         else:
-            context['props_without_base'] = self.model.get_props_excluding_base().filter(
-                metadata__access__gte=Metadata.PUBLIC
+            context['props_without_base'] = props_without_base.filter(
+                meta_access__gte=Metadata.PUBLIC
             )
         context['can_view_members'] = has_perm(
             self.request.user,
@@ -332,17 +338,11 @@ class PropertyGraphView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model, meta_name=prop_name)
 
         self.can_manage_structure = has_perm(
             self.request.user,
@@ -351,14 +351,14 @@ class PropertyGraphView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -448,17 +448,11 @@ class PropertyStructureView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model, meta_name=prop_name)
 
         self.can_manage_structure = has_perm(
             self.request.user,
@@ -467,14 +461,14 @@ class PropertyStructureView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -554,7 +548,15 @@ async def get_model_data(request, *args, **kwargs):
                 query.append(tag)
 
     query = '&'.join(query)
-    data = await get_data_from_spinta_async(model, query=query)
+    # Total count is requested together with the data, so that the page does
+    # not need to wait for another request.
+    data, (total_count, total_count_saved) = await asyncio.gather(
+        get_data_from_spinta_async(model, query=query),
+        _get_model_data_count(model, _get_count_query(request)),
+    )
+    if isinstance(data, dict):
+        data['total_count'] = total_count
+        data['total_count_saved'] = total_count_saved
     return JsonResponse(data)
 
 
@@ -582,13 +584,7 @@ class ModelDataTableView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -599,14 +595,14 @@ class ModelDataTableView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -646,7 +642,7 @@ class ModelDataTableView(
                 prop.name: prop
                 for prop in self.props
             }
-            all_props = self.model.get_given_props().values_list('metadata__name', flat=True)
+            all_props = self.model.get_given_props().values_list('meta_name', flat=True)
             exclude = all_props - context['properties'].keys()
             exclude.update(EXCLUDED_COLS)
 
@@ -679,8 +675,7 @@ class ModelDataTableView(
         })
 
 
-async def get_model_data_count(request, *args, **kwargs):
-    model = kwargs.get('model', '').replace('-', '/')
+def _get_count_query(request) -> str:
     count_query = ['count()']
     for key, val in request.GET.items():
         if not key.startswith('select(') and not key.startswith('sort('):
@@ -689,24 +684,32 @@ async def get_model_data_count(request, *args, **kwargs):
             else:
                 tag = f"{key}={val}"
                 count_query.append(tag)
+    return '&'.join(count_query)
 
-    total_count = 0
-    count_query = '&'.join(count_query)
+
+spinta_count_cache = CacheNamespace('spinta-count', 86400)
+
+
+async def _get_model_data_count(model: str, count_query: str) -> Tuple[int, str]:
     path = f"{model}/?{count_query}"
+    cached = spinta_count_cache.get(path)
+    if cached:
+        return cached
+
+    total_count = 0
+    count_data = await get_data_from_spinta_async(model, query=count_query)
+    count_data = count_data.get('_data')
+    if count_data and count_data[0].get('count()'):
+        total_count = count_data[0].get('count()')
 
-    if not cache.get(path):
-        count_data = await get_data_from_spinta_async(model, query=count_query)
-        count_data = count_data.get('_data')
-        if count_data and count_data[0].get('count()'):
-            total_count = count_data[0].get('count()')
+    total_count_saved = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    spinta_count_cache.set(path, (total_count, total_count_saved))
+    return total_count, total_count_saved
 
-        total_count_saved = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-        cache.set(path, total_count, timeout=86400)
-        cache.set(path + "_saved", total_count_saved, timeout=86400)
-    else:
-        total_count = cache.get(path)
-        total_count_saved = cache.get(path + "_saved")
 
+async def get_model_data_count(request, *args, **kwargs):
+    model = kwargs.get('model', '').replace('-', '/')
+    total_count, total_count_saved = await _get_model_data_count(model, _get_count_query(request))
     return JsonResponse({
         'total_count': total_count,
         'total_count_saved': total_count_saved
@@ -743,13 +746,7 @@ class ModelDataView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -760,14 +757,14 @@ class ModelDataView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -868,13 +865,7 @@ class ObjectDataTableView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -885,14 +876,14 @@ class ObjectDataTableView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -910,7 +901,7 @@ class ObjectDataTableView(
                 prop.name: prop
                 for prop in self.props
             }
-            all_props = self.model.get_given_props().values_list('metadata__name', flat=True)
+            all_props = self.model.get_given_props().values_list('meta_name', flat=True)
             exclude = all_props - context['properties'].keys()
             exclude.update(EXCLUDED_COLS)
 
@@ -955,13 +946,7 @@ class ObjectDataView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -972,14 +957,14 @@ class ObjectDataView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -1061,13 +1046,7 @@ class ApiView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
 
@@ -1078,12 +1057,12 @@ class ApiView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
+                order_by('meta_name')
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -1303,13 +1282,51 @@ class DatasetStructureExportView(PermissionRequiredMixin, View):
 
     def get(self, request, *args, **kwargs):
         dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
-        stream = export_dataset_structure(dataset)
-
-        response = StreamingHttpResponse(stream, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=manifest.csv'
+        fmt = 'xlsx' if request.GET.get('format') == 'xlsx' else 'csv'
+        etag = quote_etag(f'{dataset.pk}-{get_structure_version(dataset.pk)}-{fmt}')
+        if response := get_conditional_response(request, etag=etag):
+            return response
+
+        if fmt == 'xlsx':
+            response = HttpResponse(
+                export_dataset_structure_xlsx(dataset),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+            response['Content-Disposition'] = 'attachment; filename=manifest.xlsx'
+        else:
+            response = StreamingHttpResponse(export_dataset_structure(dataset), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename=manifest.csv'
+        response['ETag'] = etag
         return response
 
 
+class StructureImportJobView(PermissionRequiredMixin, View):
+    job: StructureImportJob
+
+    def dispatch(self, request, *args, **kwargs):
+        self.job = get_object_or_404(
+            StructureImportJob,
+            pk=kwargs.get('job_id'),
+            structure__dataset_id=kwargs.get('pk'),
+        )
+        return super().dispatch(request, *args, **kwargs)
+
+    def has_permission(self):
+        return has_perm(
+            self.request.user,
+            Action.CREATE,
+            DatasetStructure,
+            self.job.structure.dataset,
+        )
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'status': self.job.status,
+            'progress': self.job.progress,
+            'error': self.job.error,
+        })
+
+
 class EnumCreateView(RevisionMixin, PermissionRequiredMixin, CreateView):
     model = EnumItem
     form_class = EnumForm
@@ -1323,17 +1340,11 @@ class EnumCreateView(RevisionMixin, PermissionRequiredMixin, CreateView):
     def dispatch(self, request, *args, **kwargs):
         self.dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model_obj, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model_obj, meta_name=prop_name)
         self.enum = self.property.enums.first()
         return super().dispatch(request, *args, **kwargs)
 
@@ -1418,17 +1429,11 @@ class EnumUpdateView(RevisionMixin, PermissionRequiredMixin, UpdateView):
     def dispatch(self, request, *args, **kwargs):
         self.dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model_obj, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model_obj, meta_name=prop_name)
         return super().dispatch(request, *args, **kwargs)
 
     def has_permission(self):
@@ -1506,17 +1511,11 @@ class EnumDeleteView(PermissionRequiredMixin, DeleteView):
     def dispatch(self, request, *args, **kwargs):
         self.dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model_obj, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model_obj, meta_name=prop_name)
         return super().dispatch(request, *args, **kwargs)
 
     def has_permission(self):
@@ -1585,12 +1584,12 @@ class ModelCreateView(
                 Dataset,
                 self.dataset
         ):
-            self.models = Model.objects.filter(dataset=self.dataset).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.dataset).order_by('meta_name')
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.dataset, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
+                order_by('meta_name')
         return super().dispatch(request, *args, **kwargs)
 
     def has_permission(self):
@@ -1705,13 +1704,7 @@ class ModelUpdateView(
 
     def get_object(self, queryset=None):
         model_name = self.kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         metadata = self.model_obj.metadata.first()
@@ -1864,13 +1857,7 @@ class PropertyCreateView(
     def dispatch(self, request, *args, **kwargs):
         self.dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = self.kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         return super().dispatch(request, *args, **kwargs)
@@ -1947,17 +1934,11 @@ class PropertyUpdateView(
     def dispatch(self, request, *args, **kwargs):
         self.dataset = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.dataset).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.dataset).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model_obj, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model_obj, meta_name=prop_name)
         return super().dispatch(request, *args, **kwargs)
 
     def get_object(self, queryset=None):
@@ -2059,8 +2040,7 @@ class CreateBasePropertyView(PermissionRequiredMixin, View):
         Metadata.objects.create(
             uuid=str(uuid.uuid4()),
             dataset=self.dataset,
-            content_type=ContentType.objects.get_for_model(prop),
-            object_id=prop.pk,
+            object=prop,
             version=1,
             type='inherit',
             name=base_prop.name,
@@ -2301,12 +2281,12 @@ class DatasetStructureHistoryView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
+                order_by('meta_name')
         return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
@@ -2340,21 +2320,21 @@ class DatasetStructureHistoryView(
         return self.models[0].get_api_url() if self.models else None
 
     def get_history_objects(self):
-        model_ids = self.models.values_list('pk', flat=True)
+        model_ids = self.models.values('pk')
         if self.can_manage_structure:
-            property_ids = Property.objects.filter(
+            properties = Property.objects.filter(
                 model__pk__in=model_ids,
                 given=True
-            ).values_list('pk', flat=True)
+            )
         else:
-            property_ids = Property.objects.filter(
+            properties = Property.objects.filter(
                 model__pk__in=model_ids,
                 given=True,
-                metadata__access__gte=Metadata.PUBLIC,
-            ).values_list('pk', flat=True)
+                meta_access__gte=Metadata.PUBLIC,
+            )
 
-        property_history_objects = Version.objects.get_for_model(Property).filter(object_id__in=list(property_ids))
-        model_history_objects = Version.objects.get_for_model(Model).filter(object_id__in=list(model_ids))
+        property_history_objects = get_versions_for(Property, properties)
+        model_history_objects = get_versions_for(Model, self.models)
         history_objects = property_history_objects | model_history_objects
         return history_objects.order_by('-revision__date_created')
 
@@ -2383,13 +2363,7 @@ class ModelHistoryView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
 
@@ -2400,14 +2374,14 @@ class ModelHistoryView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model_obj.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model_obj.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model_obj.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -2454,8 +2428,7 @@ class ModelHistoryView(
         return self.model_obj.get_api_url()
 
     def get_history_objects(self):
-        property_ids = self.props.values_list('pk', flat=True)
-        property_history_objects = Version.objects.get_for_model(Property).filter(object_id__in=list(property_ids))
+        property_history_objects = get_versions_for(Property, self.props)
         model_history_objects = Version.objects.get_for_object(self.model_obj)
         history_objects = property_history_objects | model_history_objects
         return history_objects.order_by('-revision__date_created')
@@ -2486,17 +2459,11 @@ class PropertyHistoryView(
     def dispatch(self, request, *args, **kwargs):
         self.object = get_object_or_404(Dataset, pk=kwargs.get('pk'))
         model_name = kwargs.get('model')
-        self.model_obj = Model.objects.annotate(model_name=Func(
-            F('metadata__name'),
-            Value("/"),
-            Value(-1),
-            function='split_part',
-            output_field=TextField())
-        ).filter(model_name=model_name, dataset=self.object).first()
+        self.model_obj = Model.objects.filter(meta_short_name=model_name, dataset=self.object).first()
         if not self.model_obj:
             raise Http404('No Model matches the given query.')
         prop_name = kwargs.get('prop')
-        self.property = get_object_or_404(Property, model=self.model_obj, metadata__name=prop_name)
+        self.property = get_object_or_404(Property, model=self.model_obj, meta_name=prop_name)
 
         self.can_manage_structure = has_perm(
             self.request.user,
@@ -2505,14 +2472,14 @@ class PropertyHistoryView(
             self.object
         )
         if self.can_manage_structure:
-            self.models = Model.objects.filter(dataset=self.object).order_by('metadata__name')
+            self.models = Model.objects.filter(dataset=self.object).order_by('meta_name')
             self.props = self.model_obj.get_given_props()
         else:
             self.models = Model.objects. \
-                annotate(access=Max('model_properties__metadata__access')). \
+                annotate(access=Max('model_properties__meta_access')). \
                 filter(dataset=self.object, access__gte=Metadata.PUBLIC). \
-                order_by('metadata__name')
-            self.props = self.model_obj.get_given_props().filter(metadata__access__gte=Metadata.PUBLIC)
+                order_by('meta_name')
+            self.props = self.model_obj.get_given_props().filter(meta_access__gte=Metadata.PUBLIC)
 
         return super().dispatch(request, *args, **kwargs)
 
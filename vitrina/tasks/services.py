@@ -2,7 +2,7 @@ import datetime
 import functools
 import operator
 from datetime import timedelta
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
@@ -12,7 +12,7 @@ from django.utils import timezone
 from vitrina.datasets.models import Dataset
 from vitrina.orgs.models import Organization
 from vitrina.settings import VITRINA_TASK_RAISE_2, VITRINA_TASK_RAISE_1
-from vitrina.tasks.models import Task, Holiday
+from vitrina.tasks.models import Task, Holiday, get_due_date
 from vitrina.users.models import User
 
 
@@ -110,3 +110,49 @@ def get_active_tasks(
         # By default, we are only interested in open tasks.
         query = functools.reduce(operator.and_, [query, Q(status__in=[Task.CREATED, Task.ASSIGNED])])
     return queryset.filter(query)
+
+
+def create_tasks(tasks: List[Task]) -> List[Task]:
+    # `Task.save()` is not called by bulk_create.
+    due_date = get_due_date()
+    for task in tasks:
+        task.due_date = due_date
+    return Task.objects.bulk_create(tasks)
+
+
+def sync_dataset_tasks(
+    task_type: str,
+    errors: Dict[Dataset, Tuple[str, str]],  # task title and description
+    fixed: Iterable[int],  # ids of datasets, that no longer have errors
+) -> Tuple[int, int]:
+    # Open tasks are created for datasets with errors, unless they already
+    # have one, and closed for fixed datasets, all in a fixed number of queries.
+    content_type = ContentType.objects.get_for_model(Dataset)
+    open_tasks = Task.objects.filter(
+        content_type=content_type,
+        type=task_type,
+        status__in=[Task.CREATED, Task.ASSIGNED],
+    )
+    with_tasks = set(
+        open_tasks.
+        filter(object_id__in=[dataset.pk for dataset in errors]).
+        values_list('object_id', flat=True)
+    )
+    created = create_tasks([
+        Task(
+            content_type=content_type,
+            object_id=dataset.pk,
+            organization_id=dataset.organization_id,
+            title=title,
+            status=Task.CREATED,
+            type=task_type,
+            description=description,
+        )
+        for dataset, (title, description) in errors.items()
+        if dataset.pk not in with_tasks
+    ])
+    closed = open_tasks.filter(object_id__in=list(fixed)).update(
+        status=Task.COMPLETED,
+        completed=timezone.now(),
+    )
+    return len(created), closed
@@ -3,7 +3,7 @@ from django.contrib.contenttypes.models import ContentType
 
 from vitrina.comments.forms import CommentForm
 from vitrina.comments.models import Comment
-from vitrina.comments.services import get_comment_form_class
+from vitrina.comments.services import get_comment_form_class, get_comment_threads
 from vitrina.datasets.models import Dataset
 from vitrina.orgs.services import has_perm, Action
 from vitrina.requests.models import Request
@@ -12,8 +12,15 @@ from vitrina.structure.models import Metadata
 register = template.Library()
 
 
-@register.inclusion_tag('component/comments.html')
-def comments(obj, user, is_structure=False):
+def _get_comments_page(context, page):
+    # Comment pages are selected by ?comments_page=N links of comments.html.
+    if page is None and 'request' in context:
+        page = context['request'].GET.get('comments_page')
+    return page or 1
+
+
+@register.inclusion_tag('component/comments.html', takes_context=True)
+def comments(context, obj, user, is_structure=False, page=None):
     content_type = ContentType.objects.get_for_model(obj)
     obj_comments = Comment.objects.filter(
         content_type=content_type,
@@ -38,16 +45,16 @@ def comments(obj, user, is_structure=False):
     comment_form_class = get_comment_form_class(obj, user)
     is_opened = obj.is_opened() if hasattr(obj, "is_opened") else None
 
+    threads, page_obj = get_comment_threads(obj_comments, page=_get_comments_page(context, page))
     comments_array = []
-    for comment in obj_comments:
-        descendants = comment.descendants(include_self=True)
-        for reply in descendants:
-            reply_form = CommentForm(reply)
-            is_child = reply.parent is not None
-            comments_array.append((reply, reply_form, is_child))
+    for reply in threads:
+        reply_form = CommentForm(reply)
+        is_child = reply.parent_id is not None
+        comments_array.append((reply, reply_form, is_child))
 
     return {
         'comments': comments_array,
+        'page_obj': page_obj,
         'user': user,
         'content_type': content_type,
         'object': obj,
@@ -56,8 +63,8 @@ def comments(obj, user, is_structure=False):
     }
 
 
-@register.inclusion_tag('component/comments.html')
-def external_comments(content_type, object_id, user, dataset):
+@register.inclusion_tag('component/comments.html', takes_context=True)
+def external_comments(context, content_type, object_id, user, dataset, page=None):
     obj_comments = Comment.objects.filter(
         external_content_type=content_type,
         external_object_id=object_id,
@@ -71,14 +78,19 @@ def external_comments(content_type, object_id, user, dataset):
         )
     if not perm:
         obj_comments = obj_comments.filter(is_public=True)
+    threads, page_obj = get_comment_threads(
+        obj_comments,
+        include_private=perm,
+        page=_get_comments_page(context, page),
+    )
     comments_array = []
-    for comment in obj_comments:
-        children = comment.descendants(permission=perm)
+    for comment in threads:
         reply_form = CommentForm(comment, auto_id='id_%s_' + str(comment.id))
-        comments_array.append((comment, children, reply_form))
+        comments_array.append((comment, reply_form, comment.parent_id is not None))
     comment_form_class = get_comment_form_class()
     return {
         'comments': comments_array,
+        'page_obj': page_obj,
         'user': user,
         'content_type': content_type,
         'object_id': object_id,
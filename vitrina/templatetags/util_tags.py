@@ -10,7 +10,7 @@ from pyproj import Transformer
 from shapely.ops import transform
 from shapely.wkt import loads
 
-from vitrina.cms.models import Deployment
+from vitrina.landing import get_aggregate
 from vitrina.structure.services import get_srid
 
 register = template.Library()
@@ -102,7 +102,7 @@ def get_geometry_srid(type_args):
 
 @assignment_tag
 def get_deploy_banner():
-    deploy = Deployment.objects.first()
+    deploy = get_aggregate('deployment')
     now = timezone.now()
 
     if deploy and deploy.start_date <= now <= deploy.end_date:
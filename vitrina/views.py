@@ -1,46 +1,34 @@
+import datetime
+from typing import Optional
+from typing import Tuple
 from typing import Type
 
+from django.db.models import CharField
 from django.db.models import Model
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models.functions import Cast
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse
 from django.views.generic import TemplateView
-from django.db.models import Count
 
+from reversion.models import Revision
 from reversion.models import Version
 
-from vitrina.classifiers.models import Category
 from vitrina.datasets.models import Dataset
+from vitrina.landing import get_aggregate
 from vitrina.requests.models import Request
-from vitrina.orgs.models import Organization
 from vitrina.statistics.models import StatRoute
-from vitrina.users.models import User
 from vitrina.orgs.services import has_perm, Action
 from vitrina.projects.models import Project
 
 
 def home(request):
-    coordinator_count = User.objects.select_related('representative').filter(
-        representative__role='coordinator'
-    ).distinct('representative__user').count()
-    manager_count = User.objects.select_related('representative').filter(
-        representative__role='manager'
-    ).exclude(representative__role='coordinator').distinct('representative__user').count()
-    user_count = User.objects.exclude(representative__role='manager').exclude(representative__role='coordinator').count()
+    # Aggregates are served from cache, see vitrina.landing.
     return render(request, 'landing.html', {
-        'counts': {
-            'dataset': Dataset.public.count(),
-            'organization': Organization.public.count(),
-            'project': Project.objects.filter(status='APPROVED').count(),
-            'coordinators': coordinator_count,
-            'managers': manager_count,
-            'users': user_count
-        },
-        'categories': (
-            Category.objects.
-            filter(featured=True).
-            order_by('title')
-        ),
+        'counts': get_aggregate('counts'),
+        'categories': get_aggregate('categories'),
         'datasets': (
             Dataset.public.
             select_related('organization').
@@ -59,15 +47,7 @@ def home(request):
             ).
             order_by('-created')[:3]
         ),
-        'orgs': (
-            Organization.public.
-            filter(
-                numchild=0,
-                image__isnull=False,
-            ).
-            annotate(datasets=Count('dataset')).
-            order_by('-datasets')[:3]
-        ),
+        'orgs': get_aggregate('orgs'),
         'stat_routes': (
           StatRoute.objects.filter(
               featured=True
@@ -101,12 +81,35 @@ class PlanMixin:
         return self.object
 
 
+def get_versions_for(model: Type[Model], queryset: QuerySet) -> QuerySet:
+    # Version.object_id is a text column, so object ids are passed as a
+    # subquery instead of loading them into a list first.
+    return Version.objects.get_for_model(model).filter(
+        object_id__in=(
+            queryset.
+            annotate(version_object_id=Cast('pk', CharField())).
+            values('version_object_id')
+        ),
+    )
+
+
+def _parse_history_cursor(cursor: str | None) -> Tuple[datetime.datetime, int] | None:
+    if not cursor:
+        return None
+    date, _, pk = cursor.rpartition('_')
+    try:
+        return datetime.datetime.fromisoformat(date), int(pk)
+    except ValueError:
+        return None
+
+
 class HistoryView(PermissionRequiredMixin, TemplateView):
     template_name = 'history.html'
     model: Type[Model] = None
     detail_url_name = None
     history_url_name = None
     tabs_template_name: str
+    history_page_size = 50
 
     object: Model
 
@@ -120,6 +123,7 @@ class HistoryView(PermissionRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        revisions, next_cursor = self.get_history_page()
         context.update({
             'detail_url_name': self.get_detail_url_name(),
             'history_url_name': self.get_history_url_name(),
@@ -127,17 +131,14 @@ class HistoryView(PermissionRequiredMixin, TemplateView):
             'history_url': self.get_history_url(),
             "history": [
                 {
-                    'date': version.revision.date_created,
-                    'user': version.revision.user,
-                    'action': self.model.HISTORY_MESSAGES.get(
-                        version.revision.comment,
-                    ) if (
-                        hasattr(self.model, 'HISTORY_MESSAGES') and
-                        self.model.HISTORY_MESSAGES.get(version.revision.comment)
-                    ) else version.revision.comment,
+                    'date': revision.date_created,
+                    'user': revision.user,
+                    'action': self.get_history_action(revision.comment),
                 }
-                for version in self.get_history_objects()
+                for revision in revisions
             ],
+            'history_cursor': self.request.GET.get('after'),
+            'history_next_cursor': next_cursor,
             'can_manage_history': has_perm(
                 self.request.user,
                 Action.HISTORY_VIEW,
@@ -145,9 +146,44 @@ class HistoryView(PermissionRequiredMixin, TemplateView):
             ),
             'tabs_template_name': self.tabs_template_name,
         })
-        context['history'] = [dict(t) for t in {tuple(d.items()) for d in context['history']}]
         return context
 
+    def get_history_action(self, comment: str) -> str:
+        messages = getattr(self.model, 'HISTORY_MESSAGES', None)
+        if messages and messages.get(comment):
+            return messages[comment]
+        return comment
+
+    def get_history_revisions(self) -> QuerySet:
+        # Several versions are saved with one revision (e.g. a model and its
+        # properties), but only one history row per revision is shown.
+        versions = self.get_history_objects().order_by()
+        return (
+            Revision.objects.
+            filter(pk__in=versions.values('revision_id')).
+            select_related('user').
+            order_by('-date_created', '-pk')
+        )
+
+    def get_history_page(self) -> Tuple[list[Revision], Optional[str]]:
+        # History is paged by (date_created, id) keyset, so that a page costs
+        # the same regardless of how deep it is.
+        revisions = self.get_history_revisions()
+        cursor = _parse_history_cursor(self.request.GET.get('after'))
+        if cursor:
+            date, pk = cursor
+            revisions = revisions.filter(
+                Q(date_created__lt=date) |
+                Q(date_created=date, pk__lt=pk)
+            )
+        revisions = list(revisions[:self.history_page_size + 1])
+        next_cursor = None
+        if len(revisions) > self.history_page_size:
+            revisions = revisions[:self.history_page_size]
+            last = revisions[-1]
+            next_cursor = f'{last.date_created.isoformat()}_{last.pk}'
+        return revisions, next_cursor
+
     def get_detail_url_name(self):
         return self.detail_url_name
 